@@ -34,7 +34,8 @@ from slicer.util import VTKObservationMixin
 from slicer.parameterNodeWrapper import *
 from slicer import vtkMRMLSequenceNode
 from slicer import vtkMRMLSequenceBrowserNode
-from utils.Helper import SpinBox, Slider
+from slicer import vtkMRMLLinearTransformNode
+from utils.Helper import SpinBox, Slider, ProgressReporter
 from utils.TrackLogic import TrackLogic
 
 import numpy as np
@@ -90,6 +91,7 @@ class CustomParameterNode:
   node3DSegmentationLabelMap: int  # subject hierarchy id
   transformsFilePath: str
   sequenceNodeTransforms: vtkMRMLSequenceNode
+  transformNode: vtkMRMLLinearTransformNode  # single transform node of array-backed transforms, instead of a sequence
   sequenceBrowserNode: vtkMRMLSequenceBrowserNode
   totalImages: int
   fps: float
@@ -97,6 +99,25 @@ class CustomParameterNode:
   overlayAsOutline: bool
   overlayColor: list # [r, g, b] values from 0 to 1
   overlayThickness: int = 4
+  loadingWorkers: int = 0  # threads decoding cine images, 0 picks a count from the CPU cores, 1 loads serially
+  frameStorage: str = "memory"  # "memory" decodes all cine images while loading, "lazy" decodes them when displayed,
+                                # "memmap" decodes them into a memory-mapped frame stack on local disk,
+                                # "compressed" keeps them losslessly compressed in memory
+  frameCacheSizeMB: int = 1024  # memory budget of the decoded frame cache used by "lazy" frame storage
+  frameDiskCacheSizeMB: int = 0  # size cap of the on-disk cache of decoded cine images, 0 disables it
+  transformsSidecar: bool = False  # save parsed transforms files as binary sidecar files next to them
+  transformStorage: str = "sequence"  # "sequence" creates a transform node per frame, "array" updates a single
+                                      # transform node from an array of all the transforms
+  transformType: str = "translation"  # "translation", or "euler", "quaternion" or "matrix" for rigid transforms
+  rotationColumns: str = ""  # comma-separated names of the Euler angle, quaternion or matrix element columns
+  resampling: str = "linear"  # "linear" interpolates timestamped transforms at the frame times, "nearest" picks the closest
+  frameTimeSource: str = "interval"  # "interval" for frames at a constant interval, "dicom" for DICOM acquisition times
+  frameInterval: float = 0.1  # time between two cine frames in seconds, for "interval"
+  timeOffset: float = 0.0  # time of the first cine frame in seconds, counted from the first timestamped transform
+  liveMode: bool = False  # append the cine images written to the folder of the loaded images
+  liveFrameLimit: int = 1000  # number of most recent cine images kept in live mode
+  proxyDownsampleFactor: int = 4  # downsampling of the frames shown while scrubbing or playing quickly, 1 disables it
+  proxyPlaybackFps: float = 15.0  # playback speed from which the downsampled frames are shown
   
 
 
@@ -123,6 +144,8 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
     self.logic = None
     self.customParamNode = None
     self._updatingGUIFromParameterNode = False
+    # Sequence node of the cine images being loaded, whose loaded frames can already be previewed
+    self.loadingImagesSequenceNode = None
     self.isDarkMode = None
     self.labelColorButtons = {}
 
@@ -215,6 +238,51 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
 
     self.inputsFormLayout.addRow("Cine Image Files: ", self.selectorImageFilesLayout)
 
+    # Frame storage selector, deciding whether cine images are decoded up front or on demand
+    self.frameStorageSelector = qt.QComboBox()
+    self.frameStorageSelector.addItem("Decode all images while loading", "memory")
+    self.frameStorageSelector.addItem("Decode images when displayed", "lazy")
+    self.frameStorageSelector.addItem("Decode all images into a file-backed frame stack", "memmap")
+    self.frameStorageSelector.addItem("Keep all images compressed in memory", "compressed")
+    self.frameStorageSelector.setSizePolicy(qt.QSizePolicy.Minimum, qt.QSizePolicy.Fixed)
+    self.frameStorageSelector.setToolTip("Decoding images when displayed keeps memory usage bounded for long "
+                                         "sessions. It applies to the next cine images loaded.")
+    self.inputsFormLayout.addRow("Frame Storage: ", self.frameStorageSelector)
+
+    # Size cap of the on-disk cache of decoded cine images, reused when the same images are reopened
+    self.frameDiskCacheSizeSpinBox = qt.QSpinBox()
+    self.frameDiskCacheSizeSpinBox.setRange(0, 1024 * 1024)
+    self.frameDiskCacheSizeSpinBox.setSingleStep(1024)
+    self.frameDiskCacheSizeSpinBox.setSuffix(" MB")
+    self.frameDiskCacheSizeSpinBox.setSpecialValueText("Disabled")
+    self.frameDiskCacheSizeSpinBox.setSizePolicy(qt.QSizePolicy.Minimum, qt.QSizePolicy.Fixed)
+    self.frameDiskCacheSizeSpinBox.setToolTip("Keeps decoded cine images on local disk, so that reopening the same "
+                                              "images skips decoding them again.")
+    self.inputsFormLayout.addRow("Disk Cache: ", self.frameDiskCacheSizeSpinBox)
+
+    # Binary copies of parsed transforms files, read instead of the files when they are opened again
+    self.transformsSidecarCheckBox = qt.QCheckBox("Save parsed transforms files next to them")
+    self.transformsSidecarCheckBox.setToolTip("Keeps a binary copy of the parsed columns of each transforms file in "
+                                              "its folder, so that reopening a large file skips parsing it again.")
+    self.inputsFormLayout.addRow("Transforms Cache: ", self.transformsSidecarCheckBox)
+
+    # Transform storage selector, deciding whether each frame gets its own transform node
+    self.transformStorageSelector = qt.QComboBox()
+    self.transformStorageSelector.addItem("One transform node per image", "sequence")
+    self.transformStorageSelector.addItem("Single transform node updated from an array", "array")
+    self.transformStorageSelector.setSizePolicy(qt.QSizePolicy.Minimum, qt.QSizePolicy.Fixed)
+    self.transformStorageSelector.setToolTip("A single transform node keeps the scene small and is created "
+                                             "immediately for long sessions. It applies to the next transforms "
+                                             "file loaded. Sessions without a transforms file always use it.")
+    self.inputsFormLayout.addRow("Transform Storage: ", self.transformStorageSelector)
+
+    # Live mode, appending the cine images written to their folder while a session is running
+    self.liveModeCheckBox = qt.QCheckBox("Append new images written to the cine image folder")
+    self.liveModeCheckBox.setToolTip("Keeps the most recent images of a running session and follows the newest "
+                                     "one. Requires the images to be decoded while loading. Transforms are not "
+                                     "applied in live mode.")
+    self.inputsFormLayout.addRow("Live Mode: ", self.liveModeCheckBox)
+
     # Set tooltips for the widgets
     tooltipText = "Select Cine images in .mha format."
     self.selector2DImagesFiles.setToolTip(tooltipText)
@@ -304,6 +372,61 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
     self.columnSelectorsLayout.addWidget(self.columnZSelector)
     
     self.inputsFormLayout.addRow('Translations: ',self.columnSelectorsLayout)
+
+    # Rotations of rigid transforms, read from the listed columns
+    self.transformTypeSelector = qt.QComboBox()
+    self.transformTypeSelector.addItem("None", "translation")
+    self.transformTypeSelector.addItem("Euler angles", "euler")
+    self.transformTypeSelector.addItem("Quaternion", "quaternion")
+    self.transformTypeSelector.addItem("4x4 matrix", "matrix")
+    self.transformTypeSelector.setSizePolicy(qt.QSizePolicy.Maximum, qt.QSizePolicy.Fixed)
+    self.transformTypeSelector.setToolTip("Euler angles are in degrees, about X then Y then Z. Quaternions are "
+                                          "listed W, X, Y, Z. Matrices are listed row by row (12 or 16 columns) "
+                                          "and include the translation.")
+    self.rotationColumnsEdit = qt.QLineEdit()
+    self.rotationColumnsEdit.enabled = False
+    self.rotationColumnsEdit.setPlaceholderText("Rotation columns, separated by commas")
+    self.rotationsLayout = qt.QHBoxLayout()
+    self.rotationsLayout.addWidget(self.transformTypeSelector)
+    self.rotationsLayout.addWidget(self.rotationColumnsEdit)
+    self.inputsFormLayout.addRow('Rotations: ', self.rotationsLayout)
+
+    # Timestamp column of transforms logged at their own rate, which are sampled at the frame times
+    self.timestampColumnSelector = qt.QComboBox()
+    self.timestampColumnSelector.enabled = False
+    self.timestampColumnSelector.setSizePolicy(qt.QSizePolicy.Minimum, qt.QSizePolicy.Fixed)
+    self.timestampColumnSelector.setToolTip("Column holding the time in seconds each transform was logged at. "
+                                            "Without it, the file must have one row per cine image.")
+    self.resamplingSelector = qt.QComboBox()
+    self.resamplingSelector.addItem("Interpolate", "linear")
+    self.resamplingSelector.addItem("Nearest", "nearest")
+    self.resamplingSelector.setSizePolicy(qt.QSizePolicy.Maximum, qt.QSizePolicy.Fixed)
+    self.timestampsLayout = qt.QHBoxLayout()
+    self.timestampsLayout.addWidget(self.timestampColumnSelector)
+    self.timestampsLayout.addWidget(self.resamplingSelector)
+    self.inputsFormLayout.addRow('Timestamps: ', self.timestampsLayout)
+
+    # Acquisition times of the cine frames, on the clock of the timestamps
+    self.frameTimeSourceSelector = qt.QComboBox()
+    self.frameTimeSourceSelector.addItem("Constant interval", "interval")
+    self.frameTimeSourceSelector.addItem("DICOM acquisition time", "dicom")
+    self.frameTimeSourceSelector.setSizePolicy(qt.QSizePolicy.Maximum, qt.QSizePolicy.Fixed)
+    self.frameIntervalSpinBox = qt.QDoubleSpinBox()
+    self.frameIntervalSpinBox.setDecimals(4)
+    self.frameIntervalSpinBox.setRange(0.0001, 3600.0)
+    self.frameIntervalSpinBox.setSuffix(" s")
+    self.frameIntervalSpinBox.setToolTip("Time between two cine images.")
+    self.timeOffsetSpinBox = qt.QDoubleSpinBox()
+    self.timeOffsetSpinBox.setDecimals(4)
+    self.timeOffsetSpinBox.setRange(-86400.0, 86400.0)
+    self.timeOffsetSpinBox.setPrefix("Offset ")
+    self.timeOffsetSpinBox.setSuffix(" s")
+    self.timeOffsetSpinBox.setToolTip("Time of the first cine image, counted from the first timestamp.")
+    self.frameTimesLayout = qt.QHBoxLayout()
+    self.frameTimesLayout.addWidget(self.frameTimeSourceSelector)
+    self.frameTimesLayout.addWidget(self.frameIntervalSpinBox)
+    self.frameTimesLayout.addWidget(self.timeOffsetSpinBox)
+    self.inputsFormLayout.addRow('Frame Times: ', self.frameTimesLayout)
     
     # Layout for apply transformation button
     self.applyTransformButton = qt.QPushButton("Apply")
@@ -551,6 +674,7 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
     self.sequenceSlider.connect("valueChanged(int)",
                                 lambda: self.currentFrameInputBox.setValue(self.sequenceSlider.value))
     self.sequenceSlider.connect("sliderReleased()", self.onSkipImages)
+    self.sequenceSlider.connect("sliderMoved(int)", self.onScrubImages)
     self.currentFrameInputBox.connect("valueChanged(int)",
                                 lambda: self.sequenceSlider.setValue(self.currentFrameInputBox.value))
     self.currentFrameInputBox.connect("upButtonClicked()", self.onIncrement)
@@ -564,6 +688,18 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
     self.viewMoreButton.clicked.connect(self.onViewMoreClicked)
     self.deleteImagesButton.clicked.connect(self.onDeleteImagesButton)
     self.overlayThicknessSlider.connect("valueChanged(double)", self.onOverlayThicknessChange)
+    self.frameStorageSelector.connect("currentIndexChanged(int)", self.onFrameStorageChange)
+    self.frameDiskCacheSizeSpinBox.connect("valueChanged(int)", self.onFrameDiskCacheSizeChange)
+    self.transformsSidecarCheckBox.connect("toggled(bool)", self.onTransformsSidecarChange)
+    self.transformStorageSelector.connect("currentIndexChanged(int)", self.onTransformStorageChange)
+    self.transformTypeSelector.connect("currentIndexChanged(int)", self.onTransformTypeChange)
+    self.rotationColumnsEdit.connect("textEdited(QString)", self.onRotationColumnsChange)
+    self.timestampColumnSelector.connect("currentIndexChanged(int)", self.onColumnXSelectorChange)
+    self.resamplingSelector.connect("currentIndexChanged(int)", self.onFrameTimesChange)
+    self.frameTimeSourceSelector.connect("currentIndexChanged(int)", self.onFrameTimesChange)
+    self.frameIntervalSpinBox.connect("valueChanged(double)", self.onFrameTimesChange)
+    self.timeOffsetSpinBox.connect("valueChanged(double)", self.onFrameTimesChange)
+    self.liveModeCheckBox.connect("toggled(bool)", self.onLiveModeChange)
 
     # These connections ensure that whenever user changes some settings on the GUI, that is saved
     # in the MRML scene (in the selected parameter node).
@@ -614,6 +750,7 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
     Called when the application closes and the module widget is destroyed.
     """
     self.removeObservers()
+    self.logic.closeFrameSource()
 
   def enter(self):
     """
@@ -640,6 +777,9 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
     """
     Called just after the scene is closed.
     """
+    # The frames of the closed scene are no longer shown, so their frame stack file can be deleted
+    self.logic.closeFrameSource()
+    self.logic.removeTransformArray()
     # If this module is shown while the scene is closed then recreate a new parameter node immediately
     if self.parent.isEntered:
       self.initializeParameterNode()
@@ -716,7 +856,7 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
 
     # True if the 2D images, transforms and 3D segmentation have been provided
     inputsProvided = self.customParamNode.sequenceNode2DImages and \
-                     self.customParamNode.sequenceNodeTransforms and \
+                     (self.customParamNode.sequenceNodeTransforms or self.customParamNode.transformNode) and \
                      self.customParamNode.node3DSegmentation
 
     self.updatePlaybackButtons(inputsProvided)
@@ -729,15 +869,16 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
       self.sequenceSlider.setValue(imageNum)
       self.currentFrameInputBox.setValue(imageNum)
       
-      self.logic.visualize(self.customParamNode.sequenceBrowserNode,
-                           self.customParamNode.sequenceNode2DImages,
-                           self.customParamNode.node3DSegmentationLabelMap,
-                           self.customParamNode.sequenceNodeTransforms,
-                           self.customParamNode.opacity,
-                           self.customParamNode.overlayAsOutline,
-                           self.customParamNode.overlayThickness,
-                           show=False,
-                           customParamNode=self.customParamNode)
+      # Only the frame changed since the views were configured, so the per-frame path is used
+      self.logic.visualizeFrame(self.customParamNode.sequenceBrowserNode,
+                                self.customParamNode.sequenceNode2DImages,
+                                self.customParamNode.node3DSegmentationLabelMap,
+                                self.customParamNode.sequenceNodeTransforms,
+                                self.customParamNode.opacity,
+                                self.customParamNode.overlayAsOutline,
+                                self.customParamNode.overlayThickness,
+                                show=False,
+                                customParamNode=self.customParamNode)
       self.editSliceView(imageDict)
                            
     elif not self.customParamNode.sequenceBrowserNode:
@@ -752,6 +893,22 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
 
     self.overlayOutlineOnlyBox.checked = self.customParamNode.overlayAsOutline
 
+    self.frameStorageSelector.setCurrentIndex(self.frameStorageSelector.findData(self.customParamNode.frameStorage))
+    self.frameDiskCacheSizeSpinBox.setValue(self.customParamNode.frameDiskCacheSizeMB)
+    self.transformsSidecarCheckBox.checked = self.customParamNode.transformsSidecar
+    self.transformStorageSelector.setCurrentIndex(
+      self.transformStorageSelector.findData(self.customParamNode.transformStorage))
+    self.transformTypeSelector.setCurrentIndex(self.transformTypeSelector.findData(self.customParamNode.transformType))
+    self.rotationColumnsEdit.text = self.customParamNode.rotationColumns
+    self.rotationColumnsEdit.enabled = self.customParamNode.transformType != "translation"
+    self.resamplingSelector.setCurrentIndex(self.resamplingSelector.findData(self.customParamNode.resampling))
+    self.frameTimeSourceSelector.setCurrentIndex(self.frameTimeSourceSelector.findData(self.customParamNode.frameTimeSource))
+    self.frameIntervalSpinBox.value = self.customParamNode.frameInterval
+    self.frameIntervalSpinBox.enabled = self.customParamNode.frameTimeSource == "interval"
+    self.timeOffsetSpinBox.value = self.customParamNode.timeOffset
+    self.logic.setTransformsSidecar(self.customParamNode.transformsSidecar)
+    self.liveModeCheckBox.checked = self.customParamNode.liveMode
+
     # All the GUI updates are done
     self._updatingGUIFromParameterNode = False
     
@@ -832,6 +989,9 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
             nodeToRemove = nodes.GetItemAsObject(0)
             slicer.mrmlScene.RemoveNode(nodeToRemove.GetStorageNode())
             slicer.mrmlScene.RemoveNode(nodeToRemove)
+
+          # Remove the single transform node of array-backed transforms, if it exists
+          self.logic.removeTransformArray()
             
           # Remove the image nodes of each slice view used to preserve the slice views
           nodes = slicer.mrmlScene.GetNodesByClass("vtkMRMLScalarVolumeNode")
@@ -847,6 +1007,7 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
           nodes = slicer.mrmlScene.GetNodesByClassByName("vtkMRMLLinearTransformNode", "Transform Nodes Sequence")
         # Remove all nodes created
         else:
+          self.logic.removeTransformArray()
           slicer.mrmlScene.Clear()
 
       else:
@@ -902,9 +1063,20 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
             nodeToRemove = nodes.GetItemAsObject(0)
             slicer.mrmlScene.RemoveNode(nodeToRemove)
 
+          # Remove the single transform node of array-backed transforms, if it exists
+          self.logic.removeTransformArray()
+
         # Load the images into 3D Slicer
         imagesSequenceNode, cancelled = \
-          self.logic.loadImagesIntoSequenceNode(shNode, self.selector2DImagesFiles.paths)
+          self.logic.loadImagesIntoSequenceNode(shNode, self.selector2DImagesFiles.paths,
+                                                self.customParamNode.loadingWorkers,
+                                                self.customParamNode.frameStorage,
+                                                self.customParamNode.frameCacheSizeMB,
+                                                self.customParamNode.frameDiskCacheSizeMB,
+                                                self.onFramesLoaded,
+                                                self.customParamNode.proxyDownsampleFactor)
+        self.loadingImagesSequenceNode = None
+        self.logic.removeLoadingPreview()
 
         if cancelled:
           # Unset the param which holds the list of paths to the 2D images
@@ -918,6 +1090,7 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
             self.currentFrameInputBox.setMaximum(
               self.customParamNode.totalImages)  # allows for image counter to go above 99, if there are more than 99 images
             self.totalFrameLabel.setText(f"of {self.customParamNode.totalImages}")
+            self.updateLiveMode()
 
             if not activePlay:
               # Remove the unused Image Nodes Sequence node, containing each image node, if it exists
@@ -1172,9 +1345,16 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
       # Set a param to hold the path to the transformations .csv file
 
       numImages = self.customParamNode.totalImages
+      identityTransforms = False
 
 
-      if self.selectorTransformsFile.currentPath:
+      if self.selectorTransformsFile.currentPath and self.customParamNode.liveMode:
+        # Frames dropped from the live ring shift the frame indices and new frames have no transform,
+        # so the transforms would be shown with the wrong images
+        slicer.util.warningDisplay("Transforms are not applied in live mode. The cine images are shown without "
+                                   "transforms.", "Live Mode")
+
+      if self.selectorTransformsFile.currentPath and not self.customParamNode.liveMode:
         
 
         # If even one line cannot be read correctly/is missing our playback cannot be successful. We
@@ -1184,30 +1364,63 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         headers.append(self.columnXSelector.currentText)
         headers.append(self.columnYSelector.currentText)
         headers.append(self.columnZSelector.currentText)
-        transformsList = \
-          self.logic.validateTransformsInput(self.selectorTransformsFile.currentPath, numImages,headers)
+        rotationColumns = [name.strip() for name in self.customParamNode.rotationColumns.split(",") if name.strip()]
+        # Transforms logged with timestamps are sampled at the acquisition times of the cine images
+        timestampColumn = self.timestampColumnSelector.currentData
+        frameTimes = None
+        if timestampColumn:
+          frameTimes = self.logic.getFrameTimes(self.customParamNode.sequenceNode2DImages,
+                                                self.customParamNode.frameTimeSource,
+                                                self.customParamNode.frameInterval, self.customParamNode.timeOffset)
+        if timestampColumn and frameTimes is None:
+          slicer.util.warningDisplay("The DICOM acquisition times of the cine images could not be read. Use a "
+                                     "constant frame interval instead.", "Validation Error")
+          transformsList = None
+        else:
+          transformsList = \
+            self.logic.validateTransformsInput(self.selectorTransformsFile.currentPath, numImages,headers,
+                                               self.customParamNode.transformType, rotationColumns,
+                                               timestampColumn, frameTimes, self.customParamNode.resampling)
         
       else:
-        # No file provided — use identity transform (0,0,0) for each frame
+        # No file provided — use the identity transform for each frame, which needs no transform
+        # node per frame
         self.customParamNode.transformsFilePath = ""
-        transformsList = [[0.0, 0.0, 0.0] for _ in range(numImages)]
-
-      if transformsList:
-        # Create transform nodes from the transform data and place them into a sequence node
-        transformsSequenceNode = \
-           self.logic.createTransformNodesFromTransformData(shNode, transformsList, numImages)
+        transformsList = None
+        identityTransforms = True
+
+      if identityTransforms or (transformsList is not None and len(transformsList) > 0):
+        transformsSequenceNode = None
+        transformNode = None
+        if identityTransforms or self.customParamNode.transformStorage == "array":
+          # Keep the transforms in an array, shown through a single transform node
+          transformNode = \
+            self.logic.createTransformArrayFromTransformData(None if identityTransforms else transformsList,
+                                                             numImages)
+        else:
+          # Create transform nodes from the transform data and place them into a sequence node. They
+          # replace the single transform node of earlier array-backed transforms.
+          self.logic.removeTransformArray()
+          transformsSequenceNode = \
+             self.logic.createTransformNodesFromTransformData(shNode, transformsList, numImages)
 
-        if not transformsSequenceNode:
+        if not transformsSequenceNode and not transformNode:
           # If cancelled unset param to hold path to the transformations .csv file
           self.customParamNode.transformsFilePath = ""
         else:
-          # Set a param to hold the sequence node which holds the transform nodes
+          # Set a param to hold the sequence node which holds the transform nodes, or the single
+          # transform node of array-backed transforms
           self.customParamNode.sequenceNodeTransforms = transformsSequenceNode
+          self.customParamNode.transformNode = transformNode
           # Create a sequence browser node
           sequenceBrowserNode = slicer.mrmlScene.AddNewNodeByClass("vtkMRMLSequenceBrowserNode", \
                                                                    "Sequence Browser")
           sequenceBrowserNode.AddSynchronizedSequenceNode(self.customParamNode.sequenceNode2DImages)
-          sequenceBrowserNode.AddSynchronizedSequenceNode(self.customParamNode.sequenceNodeTransforms)
+          if transformsSequenceNode:
+            sequenceBrowserNode.AddSynchronizedSequenceNode(self.customParamNode.sequenceNodeTransforms)
+          else:
+            # The transform node follows the image selected in the browser
+            self.logic.getTransformArray(transformNode).observeBrowser(sequenceBrowserNode)
           # We need to observe the changes to the sequence browser so that our GUI will update as
           # the sequence progresses
           self.addObserver(sequenceBrowserNode, vtk.vtkCommand.ModifiedEvent, \
@@ -1284,6 +1497,9 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
           slicer.mrmlScene.RemoveNode(nodeToRemove.GetStorageNode())
           slicer.mrmlScene.RemoveNode(nodeToRemove)
 
+        # Remove the single transform node of array-backed transforms, if it exists
+        self.logic.removeTransformArray()
+
         # Remove filepath for the Transforms File in the `Inputs` section
         self.customParamNode.transformsFilePath = ''
         self.selectorTransformsFile.currentPath = ''
@@ -1298,6 +1514,8 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
       self.columnYSelector.enabled = False
       self.columnZSelector.clear()
       self.columnZSelector.enabled = False
+      self.timestampColumnSelector.clear()
+      self.timestampColumnSelector.enabled = False
     def addItemToColumnSeletors(self,headers):
       self.columnXSelector.enabled = True
       self.columnYSelector.enabled = True
@@ -1306,6 +1524,11 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
       self.columnXSelector.addItems(headers)     
       self.columnYSelector.addItems(headers)
       self.columnZSelector.addItems(headers)
+
+      self.timestampColumnSelector.enabled = True
+      self.timestampColumnSelector.addItem("None (one row per cine image)", "")
+      for header in headers:
+        self.timestampColumnSelector.addItem(header, header)
       
       self.columnXSelector.setCurrentIndex(0)
       self.columnYSelector.setCurrentIndex(1)
@@ -1342,6 +1565,8 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         for node in nodes:
             slicer.mrmlScene.RemoveNode(node)
 
+        self.logic.removeTransformArray()
+
     onSequenceChange()
 
     clearColumnSeletors(self)
@@ -1355,8 +1580,8 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
     layoutManager = slicer.app.layoutManager()
     self.customParamNode.sequenceBrowserNode.SetPlaybackItemSkippingEnabled(False) # Fixes image skipping bug on slower machines
     proxy2DImageNode = self.customParamNode.sequenceBrowserNode.GetProxyNode(self.customParamNode.sequenceNode2DImages)
-    sliceWidget = TrackLogic().getSliceWidget(layoutManager, proxy2DImageNode)
-    sliceView = sliceWidget.sliceView()
+    # The orientation of the frame was looked up when it was shown, so this reuses the cached routing
+    sliceWidget = self.logic.getSliceWidget(layoutManager, proxy2DImageNode)
     
     ## Pause sequence
     if self.customParamNode.sequenceBrowserNode.GetPlaybackActive():
@@ -1367,10 +1592,25 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
       self.sequenceSlider.setValue(self.currentFrameInputBox.value)
       self.currentFrameInputBox.setValue(self.sequenceSlider.value)
       self.customParamNode.sequenceBrowserNode.SetSelectedItemNumber(self.currentFrameInputBox.value - 1)
+
+      # Swap the downsampled frame shown during fast playback for the full resolution frame
+      if self.logic.lowResolution:
+        self.logic.setLowResolution(False)
+        self.logic.visualize(self.customParamNode.sequenceBrowserNode,
+                             self.customParamNode.sequenceNode2DImages,
+                             self.customParamNode.node3DSegmentationLabelMap,
+                             self.customParamNode.sequenceNodeTransforms,
+                             self.customParamNode.opacity,
+                             self.customParamNode.overlayAsOutline,
+                             self.customParamNode.overlayThickness,
+                             show=False,
+                             customParamNode=self.customParamNode)
       
       # Add an observer to the 'Current Alignment' Text to preserve the text when the sequence is paused
-      sliceView.cornerAnnotation().AddObserver(vtk.vtkCommand.ModifiedEvent, lambda caller, event: caller.SetText(vtk.vtkCornerAnnotation.UpperLeft, 'Current Alignment'))
-      sliceView.cornerAnnotation().SetText(vtk.vtkCornerAnnotation.UpperLeft, "Current Alignment")
+      if sliceWidget is not None:
+        sliceView = sliceWidget.sliceView()
+        sliceView.cornerAnnotation().AddObserver(vtk.vtkCommand.ModifiedEvent, lambda caller, event: caller.SetText(vtk.vtkCornerAnnotation.UpperLeft, 'Current Alignment'))
+        sliceView.cornerAnnotation().SetText(vtk.vtkCornerAnnotation.UpperLeft, "Current Alignment")
 
       # Rename the text in the bottom left part of slice view, and preserve the text
       for color in self.logic.backgrounds:
@@ -1393,6 +1633,8 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
       self.customParamNode.sequenceBrowserNode.SetSelectedItemNumber(self.currentFrameInputBox.value - 1)
       # if we are not playing, click this button will start the playback
       self.customParamNode.sequenceBrowserNode.SetPlaybackRateFps(self.customParamNode.fps/2)
+      self.logic.setPlaybackRate(self.customParamNode.sequenceBrowserNode.GetPlaybackRateFps())
+      self.logic.setLowResolution(self.customParamNode.fps >= self.customParamNode.proxyPlaybackFps)
       self.customParamNode.sequenceBrowserNode.SetPlaybackActive(True)
  
   
@@ -1518,6 +1760,7 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
     
     # Clear the pending colors since they've been applied
     self.pendingLabelColors = {}
+    self.logic.markDisplayDirty()
 
 
   def changeLabelColor(self, labelValue, segmentationNode, checked=None):
@@ -1532,6 +1775,8 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
           selected = colorDialog.selectedColor()
           if selected.isValid():
               rgb = [selected.redF(), selected.greenF(), selected.blueF()]
+              # The next frame shown refreshes the color table and volume rendering once
+              self.logic.markDisplayDirty()
 
               button = self.labelColorButtons.get(labelValue)
               if button:
@@ -1864,6 +2109,7 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
     Stop the playback, after the current image's visualization completes.
     """
     self.customParamNode.sequenceBrowserNode.SetPlaybackActive(False)
+    self.logic.setLowResolution(False)
     self.customParamNode.sequenceBrowserNode.SetSelectedItemNumber(0)
     self.sequenceSlider.setValue(1)
     self.currentFrameInputBox.setValue(1)
@@ -1930,18 +2176,152 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
     if fileDialog.exec():
       selectedFiles = fileDialog.selectedFiles()
       selectedFiles = sorted(list(selectedFiles))
+
+      # DICOM exports may hold several series, of which only one is loaded as the cine images
+      dicomFiles = [path for path in selectedFiles if path.lower().endswith(".dcm")]
+      if dicomFiles:
+        qt.QApplication.setOverrideCursor(qt.Qt.WaitCursor)
+        try:
+          dicomSeries = self.logic.getDicomSeries(dicomFiles)
+        finally:
+          qt.QApplication.restoreOverrideCursor()
+        if len(dicomSeries) > 1:
+          seriesNames = [f"{series['seriesNumber']}: {series['description']} ({len(series['files'])} images)"
+                         for series in dicomSeries]
+          seriesName = qt.QInputDialog.getItem(slicer.util.mainWindow(), "Select DICOM Series",
+                                               "The selected files hold several DICOM series. Series to load:",
+                                               seriesNames, 0, False)
+          if not seriesName:
+            return
+          dicomFileSet = set(dicomFiles)
+          selectedFiles = [path for path in selectedFiles if path not in dicomFileSet] + \
+                          dicomSeries[seriesNames.index(seriesName)]["files"]
+
       self.selector2DImagesFiles.addPaths(selectedFiles)
       self.updateParameterNodeFromGUI("selector2DImagesFiles", "pathsChanged")
 
   def onDeleteImagesButton(self):
     # Removes the cine images from the multi file selector
+    self.logic.stopWatchingFolder()
     self.selector2DImagesFiles.clear()
     self.customParamNode.files2DImages = []
     self.updateParameterNodeFromGUI("selector2DImagesFiles", "pathsChanged")
 
+  def onFrameStorageChange(self):
+    # Remembers how the next cine images should be loaded
+    if self.customParamNode is None or self._updatingGUIFromParameterNode:
+      return
+    self.customParamNode.frameStorage = self.frameStorageSelector.currentData
+
+  def onFrameDiskCacheSizeChange(self):
+    # Remembers the size cap of the on-disk cache used by the next cine images loaded
+    if self.customParamNode is None or self._updatingGUIFromParameterNode:
+      return
+    self.customParamNode.frameDiskCacheSizeMB = self.frameDiskCacheSizeSpinBox.value
+
+  def onTransformTypeChange(self):
+    # Rotation columns are only read for rigid transforms
+    if self.customParamNode is None or self._updatingGUIFromParameterNode:
+      return
+    self.customParamNode.transformType = self.transformTypeSelector.currentData
+    self.rotationColumnsEdit.enabled = self.customParamNode.transformType != "translation"
+    self.onColumnXSelectorChange()
+
+  def onRotationColumnsChange(self):
+    if self.customParamNode is None or self._updatingGUIFromParameterNode:
+      return
+    self.customParamNode.rotationColumns = self.rotationColumnsEdit.text
+    self.onColumnXSelectorChange()
+
+  def onFrameTimesChange(self):
+    # Remembers how timestamped transforms are sampled at the frame times
+    if self.customParamNode is None or self._updatingGUIFromParameterNode:
+      return
+    self.customParamNode.resampling = self.resamplingSelector.currentData
+    self.customParamNode.frameTimeSource = self.frameTimeSourceSelector.currentData
+    self.customParamNode.frameInterval = self.frameIntervalSpinBox.value
+    self.customParamNode.timeOffset = self.timeOffsetSpinBox.value
+    self.frameIntervalSpinBox.enabled = self.customParamNode.frameTimeSource == "interval"
+    self.onColumnXSelectorChange()
+
+  def onTransformStorageChange(self):
+    # Remembers how the transforms of the next transforms file should be stored
+    if self.customParamNode is None or self._updatingGUIFromParameterNode:
+      return
+    self.customParamNode.transformStorage = self.transformStorageSelector.currentData
+
+  def onTransformsSidecarChange(self):
+    # Chooses whether the transforms files parsed from now on are saved as binary sidecar files
+    if self.customParamNode is None or self._updatingGUIFromParameterNode:
+      return
+    self.customParamNode.transformsSidecar = self.transformsSidecarCheckBox.checked
+    self.logic.setTransformsSidecar(self.customParamNode.transformsSidecar)
+
+  def onFramesLoaded(self, imagesSequenceNode, numberOfFramesLoaded):
+    """
+    Called by the loader each time a cine image was loaded. The first image is shown as soon as it
+    is loaded, and the slider extends over the loaded images so that they can be previewed while
+    the rest are loading.
+    """
+    self.loadingImagesSequenceNode = imagesSequenceNode
+    if numberOfFramesLoaded == 1:
+      self.logic.showLoadingPreview(imagesSequenceNode, 0)
+      self.sequenceSlider.enabled = True
+      self.currentFrameInputBox.enabled = True
+    self.sequenceSlider.setMaximum(numberOfFramesLoaded)
+    self.currentFrameInputBox.setMaximum(numberOfFramesLoaded)
+    self.totalFrameLabel.setText(f"of {numberOfFramesLoaded}")
+
+  def onLiveModeChange(self):
+    # Starts or stops appending the new images written to the cine image folder
+    if self.customParamNode is None or self._updatingGUIFromParameterNode:
+      return
+    self.customParamNode.liveMode = self.liveModeCheckBox.checked
+    self.updateLiveMode()
+
+  def updateLiveMode(self):
+    # Watches the folder of the cine images while live mode is on and images are loaded
+    imagesSequenceNode = self.customParamNode.sequenceNode2DImages
+    if self.customParamNode.liveMode and imagesSequenceNode and self.customParamNode.files2DImages:
+      folder = os.path.dirname(self.customParamNode.files2DImages[0])
+      transformArray = self.logic.transformArray
+      if self.customParamNode.sequenceNodeTransforms or (transformArray is not None and
+                                                         transformArray.matrices is not None):
+        # Frames dropped from the live ring would no longer match their transforms
+        slicer.util.warningDisplay("Transforms are not applied in live mode. Apply the transforms again without "
+                                   "a transforms file before turning live mode on.", "Live Mode")
+        self.customParamNode.liveMode = False
+      elif not self.logic.startWatchingFolder(folder, imagesSequenceNode, self.customParamNode.liveFrameLimit,
+                                            self.onLiveFramesAdded):
+        self.customParamNode.liveMode = False
+    else:
+      self.logic.stopWatchingFolder()
+
+  def onLiveFramesAdded(self, numberOfFramesAdded):
+    """
+    Called when live mode appended new images to the sequence. The newest image is shown when the
+    sequence is playing or when the last image was shown.
+    """
+    wasAtLastImage = self.currentFrameInputBox.value >= self.customParamNode.totalImages
+    totalImages = self.customParamNode.sequenceNode2DImages.GetNumberOfDataNodes()
+    self.customParamNode.totalImages = totalImages
+    self.sequenceSlider.setMaximum(totalImages)
+    self.currentFrameInputBox.setMaximum(totalImages)
+    self.totalFrameLabel.setText(f"of {totalImages}")
+
+    sequenceBrowserNode = self.customParamNode.sequenceBrowserNode
+    if not sequenceBrowserNode:
+      return
+    if sequenceBrowserNode.GetPlaybackActive():
+      sequenceBrowserNode.SetSelectedItemNumber(totalImages - 1)
+    elif wasAtLastImage:
+      self.currentFrameInputBox.setValue(totalImages)
+      self.onSkipImages()
+
   def onOverlayThicknessChange(self):
     # Allows the user to adjust the thickness of the overlay
     self.customParamNode.overlayThickness = int(self.overlayThicknessSlider.value)
+    self.logic.markDisplayDirty()
     shNode = slicer.mrmlScene.GetSubjectHierarchyNode()
     labelMapNode = shNode.GetItemDataNode(self.customParamNode.node3DSegmentationLabelMap)
     displayNode = labelMapNode.GetDisplayNode()
@@ -2044,6 +2424,8 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
     self.columnYSelector.enabled = False
     self.columnZSelector.clear()
     self.columnZSelector.enabled = False
+    self.timestampColumnSelector.clear()
+    self.timestampColumnSelector.enabled = False
     self.playbackSpeedBox.value = 5.0
     self.overlayOutlineOnlyBox.checked = True
     self.opacitySlider.value = 1
@@ -2100,15 +2482,15 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
     self.customParamNode.sequenceBrowserNode.SelectNextItem()
     self.sequenceSlider.setValue(self.customParamNode.sequenceBrowserNode.GetSelectedItemNumber() + 1)
     self.currentFrameInputBox.setValue(self.sequenceSlider.value)
-    self.logic.visualize(self.customParamNode.sequenceBrowserNode,
-                           self.customParamNode.sequenceNode2DImages,
-                           self.customParamNode.node3DSegmentationLabelMap,
-                           self.customParamNode.sequenceNodeTransforms,
-                           self.customParamNode.opacity,
-                           self.customParamNode.overlayAsOutline,
-                           self.customParamNode.overlayThickness,
-                           True, # True to indicate that current alignment should be displayed
-                           customParamNode=self.customParamNode)
+    self.logic.visualizeFrame(self.customParamNode.sequenceBrowserNode,
+                              self.customParamNode.sequenceNode2DImages,
+                              self.customParamNode.node3DSegmentationLabelMap,
+                              self.customParamNode.sequenceNodeTransforms,
+                              self.customParamNode.opacity,
+                              self.customParamNode.overlayAsOutline,
+                              self.customParamNode.overlayThickness,
+                              True, # True to indicate that current alignment should be displayed
+                              customParamNode=self.customParamNode)
     self.editSliceView(imageDict)
 
   def onDecrement(self):
@@ -2119,23 +2501,29 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
     self.customParamNode.sequenceBrowserNode.SelectNextItem(-1)
     self.sequenceSlider.setValue(self.customParamNode.sequenceBrowserNode.GetSelectedItemNumber() + 1)
     self.currentFrameInputBox.setValue(self.sequenceSlider.value)
-    self.logic.visualize(self.customParamNode.sequenceBrowserNode,
-                           self.customParamNode.sequenceNode2DImages,
-                           self.customParamNode.node3DSegmentationLabelMap,
-                           self.customParamNode.sequenceNodeTransforms,
-                           self.customParamNode.opacity,
-                           self.customParamNode.overlayAsOutline,
-                           self.customParamNode.overlayThickness,
-                           True, # True to indicate that current alignment should be displayed
-                           customParamNode=self.customParamNode)
+    self.logic.visualizeFrame(self.customParamNode.sequenceBrowserNode,
+                              self.customParamNode.sequenceNode2DImages,
+                              self.customParamNode.node3DSegmentationLabelMap,
+                              self.customParamNode.sequenceNodeTransforms,
+                              self.customParamNode.opacity,
+                              self.customParamNode.overlayAsOutline,
+                              self.customParamNode.overlayThickness,
+                              True, # True to indicate that current alignment should be displayed
+                              customParamNode=self.customParamNode)
     self.editSliceView(imageDict)
 
   def onSkipImages(self):
     """
     Called when the user clicks & drags the slider either forwards or backwards, or manually edits the spinBox's value
     """
+    if self.loadingImagesSequenceNode is not None:
+      # The cine images are still loading, so the loaded ones are previewed without the sequence browser
+      self.logic.showLoadingPreview(self.loadingImagesSequenceNode, self.currentFrameInputBox.value - 1)
+      return
     imageDict = self.getSliceDict()  
     num = self.currentFrameInputBox.value
+    # Scrubbing stopped, so show the full resolution frame
+    self.logic.setLowResolution(False)
     self.resetVisuals(False)
     self.sequenceSlider.setValue(num)
     self.customParamNode.sequenceBrowserNode.SetSelectedItemNumber(num - 1)
@@ -2151,6 +2539,30 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
     self.editSliceView(imageDict)
     
     
+  def onScrubImages(self):
+    """
+    Called while the user drags the slider. The downsampled frames, if they were built, follow the
+    slider until it is released and onSkipImages shows the full resolution frame.
+    """
+    if self.loadingImagesSequenceNode is not None:
+      self.logic.showLoadingPreview(self.loadingImagesSequenceNode, self.sequenceSlider.value - 1)
+      return
+    sequenceBrowserNode = self.customParamNode.sequenceBrowserNode
+    if not sequenceBrowserNode or sequenceBrowserNode.GetPlaybackActive() or \
+       self.logic.getProxyFrames(self.customParamNode.sequenceNode2DImages) is None:
+      return
+    self.logic.setLowResolution(True)
+    sequenceBrowserNode.SetSelectedItemNumber(self.sequenceSlider.value - 1)
+    self.logic.visualizeFrame(sequenceBrowserNode,
+                              self.customParamNode.sequenceNode2DImages,
+                              self.customParamNode.node3DSegmentationLabelMap,
+                              self.customParamNode.sequenceNodeTransforms,
+                              self.customParamNode.opacity,
+                              self.customParamNode.overlayAsOutline,
+                              self.customParamNode.overlayThickness,
+                              show=False,
+                              customParamNode=self.customParamNode)
+
   def updatePlaybackButtons(self, inputsProvided):
     """
     Function to update which playback buttons are enabled or disabled according to the state.
@@ -2210,6 +2622,8 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         self.columnXSelector.enabled = False
         self.columnYSelector.enabled = False
         self.columnZSelector.enabled = False
+        self.transformTypeSelector.enabled = False
+        self.rotationColumnsEdit.enabled = False
       else:
         self.sequenceSlider.setToolTip("Select the next frame for playback.")
         self.deleteImagesButton.setToolTip("Remove Cine images.")
@@ -2232,6 +2646,8 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
         self.columnXSelector.enabled = True
         self.columnYSelector.enabled = True
         self.columnZSelector.enabled = True
+        self.transformTypeSelector.enabled = True
+        self.rotationColumnsEdit.enabled = self.customParamNode.transformType != "translation"
         self.columnXSelector.setToolTip("")
         self.columnYSelector.setToolTip("")
         self.columnZSelector.setToolTip("")
@@ -2280,6 +2696,11 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
       self.customParamNode.fps = self.playbackSpeedBox.value
     if self.customParamNode.sequenceBrowserNode:
       self.customParamNode.sequenceBrowserNode.SetPlaybackRateFps(self.customParamNode.fps)
+    # Frames decoded on demand are read further ahead at higher playback speeds
+    self.logic.setPlaybackRate(self.customParamNode.fps)
+    # Downsampled frames are shown while playing at a high speed
+    if self.customParamNode.sequenceBrowserNode and self.customParamNode.sequenceBrowserNode.GetPlaybackActive():
+      self.logic.setLowResolution(self.customParamNode.fps >= self.customParamNode.proxyPlaybackFps)
 
   def onOpacityChange(self):
     """
@@ -2287,6 +2708,7 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
     value in the opacity slider GUI widget.
     """
     self.customParamNode.opacity = self.opacitySlider.value
+    self.logic.markDisplayDirty()
 
     layoutManager = slicer.app.layoutManager()
     for name in layoutManager.sliceViewNames():
@@ -2299,6 +2721,7 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
     region within the slice views, according to the value within the overlay outline checkbox.
     """
     self.customParamNode.overlayAsOutline = self.overlayOutlineOnlyBox.checked
+    self.logic.markDisplayDirty()
 
     layoutManager = slicer.app.layoutManager()
     for name in layoutManager.sliceViewNames():
@@ -2351,7 +2774,7 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
     # After the visual reset we also want to setup our slice views for playback if all three
     # inputs have been provided
     inputsProvided = self.customParamNode.sequenceNode2DImages and \
-                     self.customParamNode.sequenceNodeTransforms and \
+                     (self.customParamNode.sequenceNodeTransforms or self.customParamNode.transformNode) and \
                      self.customParamNode.node3DSegmentation
     if inputsProvided and reset:
       # Reset the Sequence back to the first image
@@ -2373,7 +2796,9 @@ class TrackWidget(ScriptedLoadableModuleWidget, VTKObservationMixin):
                                  show=False,
                                  customParamNode=self.customParamNode)
       # center 3D images on segmentation
-      if self.customParamNode.sequenceNode2DImages.GetDataNodeAtValue("0").GetImageData().GetDataDimension() == 3:
+      # The proxy node is used since the sequence may only hold placeholder images (lazy frame storage)
+      proxy2DImageNode = self.customParamNode.sequenceBrowserNode.GetProxyNode(self.customParamNode.sequenceNode2DImages)
+      if proxy2DImageNode.GetImageData().GetDataDimension() == 3:
         labelmap = slicer.mrmlScene.GetNodesByClass('vtkMRMLLabelMapVolumeNode').GetItemAsObject(0)
         seg = slicer.mrmlScene.AddNewNodeByClass('vtkMRMLSegmentationNode')
         slicer.modules.segmentations.logic().ImportLabelmapToSegmentationNode(labelmap, seg)
@@ -2433,13 +2858,41 @@ class TrackTest(ScriptedLoadableModuleTest):
     """Run as few or as many tests as needed here.
     """
     self.setUp()
+    # These tests do not need the sample data
+    self.test_progressReporter()
+    self.test_nodeCreationScaling()
+    self.test_readTransformColumns()
+    self.test_transformsTableCache()
+    self.test_readSpreadsheetTable()
+    self.test_rigidTransforms()
+    self.test_resampleTransforms()
+    self.test_transformsValidationReport()
+    self.test_transformArray()
+    self.test_sliceOrientation()
+    self.test_renderScheduler()
+    self.test_compressedFramePrefetch()
+
     # check if folder exists
-    if self.cine_images_folder_path is None or self.csv_file_path is None or self.cine_files_paths is None or not os.path.exists(self.cine_images_folder_path) or not os.path.exists(self.csv_file_path) or not os.path.exists(self.cine_files_paths):
+    if self.cine_images_folder_path is None or self.csv_file_path is None or not self.cine_files_paths or not os.path.exists(self.cine_images_folder_path) or not os.path.exists(self.csv_file_path):
         self.delayDisplay('Data is not available for testing',None,2000)
         return
     
     self.test_loadImagesIntoSequenceNode()
     self.test_validateTransformsInput()
+    self.test_loadImagesInParallel()
+    self.test_loadImagesLazily()
+    self.test_prefetchFrames()
+    self.test_loadImagesIntoFrameStack()
+    self.test_loadMultiFrameFile()
+    self.test_diskFrameCache()
+    self.test_scanImageGeometries()
+    self.test_indexDicomSeries()
+    self.test_watchFolder()
+    self.test_proxyFrames()
+    self.test_loadImagesCompressed()
+    self.test_timeToFirstFrame()
+    self.test_visualizeFrame()
+    self.test_displayRefresh()
     self.delayDisplay('Test passed')
     
 
@@ -2466,4 +2919,681 @@ class TrackTest(ScriptedLoadableModuleTest):
     for transform in transformationList:
       self.assertTrue(isinstance(transform, list))
       for num in transform:
-        self.assertTrue(isinstance(num, (float)))
\ No newline at end of file
+        self.assertTrue(isinstance(num, (float)))
+
+  def test_loadImagesInParallel(self):
+    shNode = slicer.mrmlScene.GetSubjectHierarchyNode()
+    if self.cine_files_paths is None:
+        return
+    timings = self.logic.benchmarkImageLoading(shNode, self.cine_files_paths, [1, 4])
+    self.assertEqual(len(timings), 2)
+    serialSequenceNode, cancelled = \
+        self.logic.loadImagesIntoSequenceNode(shNode, self.cine_files_paths, 1)
+    parallelSequenceNode, cancelled = \
+        self.logic.loadImagesIntoSequenceNode(shNode, self.cine_files_paths, 4)
+    self.assertEqual(parallelSequenceNode.GetNumberOfDataNodes(), serialSequenceNode.GetNumberOfDataNodes())
+    # The parallel path must produce the same voxels and geometry as slicer.util.loadVolume
+    for index in [0, serialSequenceNode.GetNumberOfDataNodes() - 1]:
+      serialNode = serialSequenceNode.GetDataNodeAtValue(str(index))
+      parallelNode = parallelSequenceNode.GetDataNodeAtValue(str(index))
+      self.assertTrue(np.array_equal(arrayFromVolume(serialNode), arrayFromVolume(parallelNode)))
+      serialMatrix = vtk.vtkMatrix4x4()
+      parallelMatrix = vtk.vtkMatrix4x4()
+      serialNode.GetIJKToRASMatrix(serialMatrix)
+      parallelNode.GetIJKToRASMatrix(parallelMatrix)
+      self.assertTrue(np.allclose(slicer.util.arrayFromVTKMatrix(serialMatrix),
+                                  slicer.util.arrayFromVTKMatrix(parallelMatrix)))
+
+  def test_loadImagesLazily(self):
+    shNode = slicer.mrmlScene.GetSubjectHierarchyNode()
+    if self.cine_files_paths is None:
+        return
+    imagesSequenceNode, cancelled = \
+        self.logic.loadImagesIntoSequenceNode(shNode, self.cine_files_paths, frameStorage="lazy", cacheSizeMB=1)
+    self.assertEqual(imagesSequenceNode.GetNumberOfDataNodes(), 71)
+    frameSource = self.logic.getFrameSource(imagesSequenceNode)
+    self.assertTrue(frameSource is not None)
+    # Decoding on demand must give the same voxels as loading the image directly
+    firstImageNode = slicer.util.loadVolume(frameSource.paths[0], {"singleFile": True, "show": False})
+    self.assertTrue(np.array_equal(frameSource.getFrame(0), arrayFromVolume(firstImageNode)))
+    # The 1 MB cache budget bounds the number of decoded frames kept in memory
+    for index in range(frameSource.getNumberOfFrames()):
+      frameSource.getFrame(index)
+    self.assertTrue(frameSource.cache.currentBytes <= max(1024 * 1024, frameSource.getFrame(0).nbytes))
+
+  def test_prefetchFrames(self):
+    shNode = slicer.mrmlScene.GetSubjectHierarchyNode()
+    if self.cine_files_paths is None:
+        return
+    imagesSequenceNode, cancelled = \
+        self.logic.loadImagesIntoSequenceNode(shNode, self.cine_files_paths, frameStorage="lazy")
+    frameSource = self.logic.getFrameSource(imagesSequenceNode)
+    self.logic.setPlaybackRate(30.0)
+    self.assertEqual(frameSource.prefetchDepth, 30)
+    frameSource.resetStatistics()
+    frameSource.getFrame(0)
+    frameSource.prefetch(0)
+    # Let the prefetch threads decode the frames ahead of the displayed one
+    frameSource.waitForPrefetch()
+    for index in range(1, 11):
+      frameSource.getFrame(index)
+    statistics = self.logic.getPrefetchStatistics()
+    self.assertEqual(statistics["misses"], 1)
+    self.assertEqual(statistics["hits"], 10)
+
+  def test_loadImagesIntoFrameStack(self):
+    shNode = slicer.mrmlScene.GetSubjectHierarchyNode()
+    if self.cine_files_paths is None:
+        return
+    imagesSequenceNode, cancelled = \
+        self.logic.loadImagesIntoSequenceNode(shNode, self.cine_files_paths, 4, frameStorage="memmap")
+    frameStack = self.logic.getFrameSource(imagesSequenceNode)
+    self.assertEqual(frameStack.getNumberOfFrames(), imagesSequenceNode.GetNumberOfDataNodes())
+    # Frames are views into the one memory-mapped stack
+    lastIndex = frameStack.getNumberOfFrames() - 1
+    self.assertTrue(np.shares_memory(frameStack.getFrame(lastIndex), frameStack.frames))
+    lastImageNode = slicer.util.loadVolume(sorted(self.cine_files_paths)[lastIndex], {"singleFile": True, "show": False})
+    self.assertTrue(np.array_equal(frameStack.getFrame(lastIndex), arrayFromVolume(lastImageNode)))
+    filePath = frameStack.filePath
+    frameStack.close()
+    self.assertFalse(os.path.exists(filePath))
+
+  def test_loadMultiFrameFile(self):
+    import SimpleITK as sitk
+    shNode = slicer.mrmlScene.GetSubjectHierarchyNode()
+    if self.cine_files_paths is None:
+        return
+    # Write the first cine images into a single file whose last axis is time
+    framePaths = sorted(self.cine_files_paths)[:10]
+    frames = np.stack([sitk.GetArrayFromImage(sitk.ReadImage(path)).squeeze() for path in framePaths])
+    multiFramePath = os.path.join(slicer.app.temporaryPath, 'TrackMultiFrame.mha')
+    sitk.WriteImage(sitk.GetImageFromArray(frames), multiFramePath)
+    imagesSequenceNode, cancelled = \
+        self.logic.loadImagesIntoSequenceNode(shNode, [multiFramePath])
+    self.assertEqual(imagesSequenceNode.GetNumberOfDataNodes(), 10)
+    frameSource = self.logic.getFrameSource(imagesSequenceNode)
+    # Frames are views into the one decoded buffer
+    self.assertTrue(np.shares_memory(frameSource.getFrame(9), frameSource.frames))
+    self.assertTrue(np.array_equal(frameSource.getFrame(9).squeeze(), frames[9]))
+    os.remove(multiFramePath)
+
+  def test_diskFrameCache(self):
+    from utils.FrameSources import DiskFrameCache
+    if self.cine_files_paths is None:
+        return
+    framePaths = sorted(self.cine_files_paths)[:10]
+    cacheDirectory = os.path.join(slicer.app.temporaryPath, 'TrackDiskFrameCache')
+    diskCache = DiskFrameCache(cacheDirectory, 1024 * 1024 * 1024)
+    diskCache.clear()
+    for path in framePaths:
+      diskCache.readFrame(path)
+    # A new cache over the same directory, as in a later session, finds the decoded frames
+    diskCache = DiskFrameCache(cacheDirectory, 1024 * 1024 * 1024)
+    for path in framePaths:
+      array, ijkToRAS = diskCache.readFrame(path)
+    self.assertEqual(diskCache.getStatistics()["hits"], 10)
+    self.assertEqual(diskCache.getStatistics()["misses"], 0)
+    lastImageNode = slicer.util.loadVolume(framePaths[-1], {"singleFile": True, "show": False})
+    self.assertTrue(np.array_equal(array, arrayFromVolume(lastImageNode)))
+    # The size cap evicts the least recently used frames
+    diskCache.clear()
+    diskCache.maxBytes = 1
+    diskCache.readFrame(framePaths[0])
+    diskCache.readFrame(framePaths[1])
+    self.assertEqual(len(diskCache), 1)
+    diskCache.clear()
+    self.assertEqual(len(os.listdir(cacheDirectory)), 0)
+
+  def test_scanImageGeometries(self):
+    from utils.FrameDecoding import groupFramesByGeometry
+    if self.cine_files_paths is None:
+        return
+    progressDialog = qt.QProgressDialog("Loading cine images", "Cancel", 0, len(self.cine_files_paths))
+    imageFiles, ijkToRASMatrices = self.logic.scanImageGeometries(sorted(self.cine_files_paths), progressDialog)
+    progressDialog.close()
+    self.assertEqual(len(imageFiles), 71)
+    self.assertEqual(ijkToRASMatrices.shape, (71, 4, 4))
+    # A frame with a different spacing is split from the others, while a moved frame is not
+    sizes = np.tile([256, 256, 1], (71, 1))
+    ijkToRASMatrices[3, :3, 3] += 10.0
+    ijkToRASMatrices[5, 0, 0] *= 2.0
+    groups = groupFramesByGeometry(sizes, ijkToRASMatrices)
+    self.assertEqual(len(groups), 2)
+    self.assertEqual(len(groups[0]), 70)
+    self.assertEqual(list(groups[1]), [5])
+
+  def test_indexDicomSeries(self):
+    import SimpleITK as sitk
+    from utils.DicomIndex import INDEX_FILE_NAME
+    if self.cine_files_paths is None:
+        return
+    dicomFolder = os.path.join(slicer.app.temporaryPath, 'TrackDicomIndex')
+    os.makedirs(dicomFolder, exist_ok=True)
+    for fileName in os.listdir(dicomFolder):
+      os.remove(os.path.join(dicomFolder, fileName))
+    # Two series, whose instance numbers run opposite to the file names
+    dicomPaths = []
+    for fileIndex, path in enumerate(sorted(self.cine_files_paths)[:6]):
+      image = sitk.Cast(sitk.ReadImage(path), sitk.sitkInt16)
+      image.SetMetaData('0020|000e', '1.2.3.4.' + str(fileIndex % 2 + 1))
+      image.SetMetaData('0020|0011', str(fileIndex % 2 + 1))
+      image.SetMetaData('0020|0013', str(10 - fileIndex))
+      dicomPath = os.path.join(dicomFolder, f'frame{fileIndex}.dcm')
+      sitk.WriteImage(image, dicomPath)
+      dicomPaths.append(dicomPath)
+    dicomSeries = self.logic.getDicomSeries(dicomPaths)
+    self.assertEqual(len(dicomSeries), 2)
+    self.assertEqual([os.path.basename(path) for path in dicomSeries[0]['files']],
+                     ['frame4.dcm', 'frame2.dcm', 'frame0.dcm'])
+    # The index is stored next to the images and reused
+    self.assertTrue(os.path.exists(os.path.join(dicomFolder, INDEX_FILE_NAME)))
+    self.assertEqual(self.logic.getDicomSeries(dicomPaths), dicomSeries)
+
+  def test_watchFolder(self):
+    import shutil, time
+    shNode = slicer.mrmlScene.GetSubjectHierarchyNode()
+    if self.cine_files_paths is None:
+        return
+    liveFolder = os.path.join(slicer.app.temporaryPath, 'TrackLiveFolder')
+    shutil.rmtree(liveFolder, ignore_errors=True)
+    os.makedirs(liveFolder)
+    framePaths = sorted(self.cine_files_paths)[:8]
+    for path in framePaths[:5]:
+      shutil.copy(path, liveFolder)
+    imagesSequenceNode, cancelled = \
+        self.logic.loadImagesIntoSequenceNode(shNode, [os.path.join(liveFolder, f) for f in os.listdir(liveFolder)])
+    self.assertTrue(self.logic.startWatchingFolder(liveFolder, imagesSequenceNode, 6))
+    watcher = self.logic.folderWatcher
+    watcher.timer.stop()
+    # New images are appended without reloading the earlier ones, and the ring keeps the newest 6
+    for path in framePaths[5:]:
+      shutil.copy(path, liveFolder)
+    for _ in range(100):
+      watcher.poll()
+      if watcher.getStatistics()['framesAdded'] == 3:
+        break
+      time.sleep(0.05)
+    statistics = watcher.getStatistics()
+    self.assertEqual(statistics['framesAdded'], 3)
+    self.assertEqual(statistics['framesDropped'], 2)
+    self.assertEqual(imagesSequenceNode.GetNumberOfDataNodes(), 6)
+    self.assertEqual(imagesSequenceNode.GetNthIndexValue(5), '7')
+    # The files of the frames follow the ring
+    frameFiles = self.logic.frameFiles[1]
+    self.assertEqual(len(frameFiles), 6)
+    self.assertEqual(os.path.basename(frameFiles[-1]), os.path.basename(framePaths[7]))
+    self.logic.stopWatchingFolder()
+    shutil.rmtree(liveFolder, ignore_errors=True)
+
+  def test_proxyFrames(self):
+    shNode = slicer.mrmlScene.GetSubjectHierarchyNode()
+    if self.cine_files_paths is None:
+        return
+    imagesSequenceNode, cancelled = \
+        self.logic.loadImagesIntoSequenceNode(shNode, self.cine_files_paths, 4, proxyDownsampleFactor=4)
+    # The downsampled frames are built while the images are loaded
+    proxyFrames = self.logic.getProxyFrames(imagesSequenceNode)
+    self.assertEqual(len(proxyFrames.frames), imagesSequenceNode.GetNumberOfDataNodes())
+    dataNode = imagesSequenceNode.GetNthDataNode(0)
+    fullResolution = arrayFromVolume(dataNode)
+    self.assertEqual(proxyFrames.frames[0].shape[1], fullResolution.shape[1] // 4)
+    # A downsampled frame covers the same extent as the full resolution frame
+    proxyNode = slicer.mrmlScene.AddNewNodeByClass("vtkMRMLScalarVolumeNode")
+    proxyFrames.updateProxyNode(proxyNode, dataNode, 0)
+    self.assertTrue(proxyFrames.isShownIn(proxyNode))
+    self.assertTrue(np.allclose(np.array(proxyNode.GetSpacing()[:2]), np.array(dataNode.GetSpacing()[:2]) * 4))
+    proxyFrames.restoreProxyNode(proxyNode, dataNode)
+    self.assertFalse(proxyFrames.isShownIn(proxyNode))
+    self.assertTrue(np.array_equal(arrayFromVolume(proxyNode), fullResolution))
+
+  def test_loadImagesCompressed(self):
+    shNode = slicer.mrmlScene.GetSubjectHierarchyNode()
+    if self.cine_files_paths is None:
+        return
+    imagesSequenceNode, cancelled = \
+        self.logic.loadImagesIntoSequenceNode(shNode, self.cine_files_paths, 4, frameStorage="compressed",
+                                              proxyDownsampleFactor=4)
+    frameSource = self.logic.getFrameSource(imagesSequenceNode)
+    self.assertEqual(frameSource.getNumberOfFrames(), imagesSequenceNode.GetNumberOfDataNodes())
+    # The frames are downsampled on the worker threads that compress them
+    self.assertEqual(len(self.logic.getProxyFrames(imagesSequenceNode).frames), frameSource.getNumberOfFrames())
+    # Compression is lossless
+    lastIndex = frameSource.getNumberOfFrames() - 1
+    lastImageNode = slicer.util.loadVolume(sorted(self.cine_files_paths)[lastIndex], {"singleFile": True, "show": False})
+    self.assertTrue(np.array_equal(frameSource.getFrame(lastIndex), arrayFromVolume(lastImageNode)))
+    results = self.logic.benchmarkFrameDecompression(imagesSequenceNode)
+    self.assertTrue(results["compressionRatio"] > 1.0)
+    self.assertTrue(results["meanMs"] > 0.0)
+
+  def test_compressedFramePrefetch(self):
+    from utils.FrameSources import CompressedFrameSource, compressFrame
+    frames = [np.full((1, 16, 16), index, dtype=np.uint8) for index in range(20)]
+    frameSource = CompressedFrameSource(len(frames))
+    for index, array in enumerate(frames):
+      frameSource.setFrame(index, compressFrame(array))
+    proxyNode = slicer.mrmlScene.AddNewNodeByClass("vtkMRMLScalarVolumeNode")
+    # Once the first frame is shown, the next frames of the window are decompressed ahead of playback
+    for index in range(CompressedFrameSource.HOT_WINDOW + 1):
+      frameSource.updateProxyNode(proxyNode, index)
+      self.assertTrue(np.array_equal(arrayFromVolume(proxyNode), frames[index]))
+      frameSource.waitForPrefetch()
+    statistics = frameSource.getStatistics()
+    self.assertEqual(statistics["misses"], 1)
+    self.assertEqual(statistics["hits"], CompressedFrameSource.HOT_WINDOW)
+    frameSource.close()
+    slicer.mrmlScene.RemoveNode(proxyNode)
+
+    # A sequence without any compressed frame has nothing to benchmark
+    sequenceNode = slicer.mrmlScene.AddNewNodeByClass("vtkMRMLSequenceNode")
+    emptyFrameSource = CompressedFrameSource(3)
+    emptyFrameSource.sequenceNodeID = sequenceNode.GetID()
+    previousFrameSource = self.logic.frameSource
+    self.logic.frameSource = emptyFrameSource
+    self.assertIsNone(self.logic.benchmarkFrameDecompression(sequenceNode))
+    self.logic.frameSource = previousFrameSource
+    emptyFrameSource.close()
+    slicer.mrmlScene.RemoveNode(sequenceNode)
+
+  def test_timeToFirstFrame(self):
+    shNode = slicer.mrmlScene.GetSubjectHierarchyNode()
+    if self.cine_files_paths is None:
+        return
+    framesLoaded = []
+    def onFramesLoaded(imagesSequenceNode, numberOfFramesLoaded):
+      # The loaded frames can be shown while the rest of the sequence is loading
+      framesLoaded.append(numberOfFramesLoaded)
+      self.assertEqual(imagesSequenceNode.GetNumberOfDataNodes(), numberOfFramesLoaded)
+      if numberOfFramesLoaded == 1:
+        self.logic.showLoadingPreview(imagesSequenceNode, 0)
+    imagesSequenceNode, cancelled = \
+        self.logic.loadImagesIntoSequenceNode(shNode, self.cine_files_paths, 4, onFramesLoaded=onFramesLoaded)
+    self.assertEqual(framesLoaded, list(range(1, imagesSequenceNode.GetNumberOfDataNodes() + 1)))
+    self.assertTrue(self.logic.loadingPreviewNode is not None)
+    self.logic.removeLoadingPreview()
+    statistics = self.logic.getLoadingStatistics()
+    self.assertTrue(0 < statistics["timeToFirstFrame"] <= statistics["loadingTime"])
+
+  def test_progressReporter(self):
+    numberOfItems = 10000
+    progressDialog = qt.QProgressDialog("Loading cine images", "Cancel", 0, numberOfItems)
+    progress = ProgressReporter(progressDialog, "Loading cine images", intervalMs=100)
+    for count in range(1, numberOfItems + 1):
+      progress.update(count, 1024)
+    progressDialog.close()
+    # The dialog is updated on a time budget rather than once per item, and always for the last item
+    self.assertTrue(1 <= progress.numberOfUpdates < numberOfItems / 10)
+    self.assertEqual(progress.numberOfBytes, numberOfItems * 1024)
+    statusText = progress.getStatusText(numberOfItems // 2, 1.0)
+    self.assertTrue("frames/s" in statusText and "MB/s" in statusText and "remaining" in statusText)
+
+  def test_nodeCreationScaling(self):
+    shNode = slicer.mrmlScene.GetSubjectHierarchyNode()
+    numberOfNodes = slicer.mrmlScene.GetNumberOfNodes()
+    frameCounts = (250, 2000)
+    # The timings are per frame already, so a constant cost per node gives the same value for both counts
+    timings = self.logic.benchmarkNodeCreation(shNode, frameCounts)
+    # A cost per node proportional to the sequence size would make the time per frame grow with the
+    # number of frames, 8 times here. Up to half of that growth is tolerated, as timing noise.
+    tolerance = frameCounts[1] / frameCounts[0] / 2
+    self.assertLess(timings[frameCounts[1]], timings[frameCounts[0]] * tolerance,
+                    f"{timings[frameCounts[0]]:.3f} ms per frame for {frameCounts[0]} frames, "
+                    f"{timings[frameCounts[1]]:.3f} ms per frame for {frameCounts[1]} frames")
+    # The transform nodes are kept in the sequences only, and the sequences were removed
+    self.assertEqual(slicer.mrmlScene.GetNumberOfNodes(), numberOfNodes)
+
+  def test_readTransformColumns(self):
+    from utils.TransformsData import detectEncoding, readTransformColumns, iterTransformColumns, readTransformsTable
+    transforms = np.random.default_rng(0).uniform(-50.0, 50.0, (1000, 3))
+    filepath = os.path.join(slicer.app.temporaryPath, "TrackTransformsTest.csv")
+    with open(filepath, "w", encoding="cp1252", newline="") as f:
+      f.write("Time,Z,Y,X,Commentaire é\n")
+      for index, (x, y, z) in enumerate(transforms.tolist()):
+        f.write(f"{index * 0.01},{z!r},{y!r},{x!r},0\n")
+    self.assertEqual(detectEncoding(filepath), "cp1252")
+    # The selected columns are returned in the requested order, whether the file is read at once or streamed
+    self.assertTrue(np.array_equal(readTransformColumns(filepath, ["X", "Y", "Z"]), transforms))
+    chunks = list(iterTransformColumns(filepath, ["X", "Y", "Z"], chunkRows=300))
+    self.assertEqual([len(chunk) for chunk in chunks], [300, 300, 300, 100])
+    self.assertTrue(np.array_equal(np.concatenate(chunks), transforms))
+    with self.assertRaises(ValueError):
+      readTransformColumns(filepath, ["X", "Y", "W"])
+
+    # Quoted cells are read like the header row, whether they hold numbers or commas
+    with open(filepath, "w", encoding="utf-8", newline="") as f:
+      f.write('Note,"X","Y",Z\n')
+      f.write('"first, second","1.5",2,3\n')
+      f.write('plain,"4",5,"6"\n')
+    self.assertTrue(np.array_equal(readTransformColumns(filepath, ["X", "Y", "Z"]), [[1.5, 2.0, 3.0], [4.0, 5.0, 6.0]]))
+    self.assertTrue(np.array_equal(readTransformColumns(filepath, ["Y"]), [[2.0], [5.0]]))
+    # A text column only fails the chunks holding it, and leaves the other columns usable
+    table = readTransformsTable(filepath, chunkRows=1)
+    self.assertEqual(list(table.errors), ["Note"])
+    self.assertTrue(np.array_equal(table.getColumns(["X", "Y", "Z"]), [[1.5, 2.0, 3.0], [4.0, 5.0, 6.0]]))
+    os.remove(filepath)
+
+  def test_transformsTableCache(self):
+    filepath = os.path.join(slicer.app.temporaryPath, "TrackTransformsTableTest.csv")
+    with open(filepath, "w", encoding="utf-8", newline="") as f:
+      f.write("Date,X,Y,Z\n")
+      for index in range(100):
+        f.write(f"2024-01-01,{index},{index * 2},{index * 3}\n")
+    self.logic.setTransformsSidecar(True)
+    self.logic.transformsTableCache.clear()
+    self.logic.transformsTableCache.resetStatistics()
+
+    # Listing the columns parses the file, and validating any selection reuses the parsed table
+    self.assertEqual(list(self.logic.getColumnNamesFromTransformsInput(filepath)), ["Date", "X", "Y", "Z"])
+    transforms = self.logic.validateTransformsInput(filepath, 100, ["Z", "Y", "X"])
+    self.assertEqual(transforms[10], [30.0, 20.0, 10.0])
+    self.logic.validateTransformsInput(filepath, 100, ["X", "Y", "Z"])
+    self.assertEqual(self.logic.transformsTableCache.getStatistics(), {"hits": 2, "misses": 1, "sidecarLoads": 0})
+    with self.assertRaises(ValueError):
+      self.logic.getTransformsTable(filepath).getColumns(["Date", "Y", "Z"])
+
+    # A new session reads the sidecar file instead of parsing the transforms file
+    self.logic.transformsTableCache.clear()
+    self.logic.getTransformsTable(filepath)
+    self.assertEqual(self.logic.transformsTableCache.getStatistics()["sidecarLoads"], 1)
+
+    # A modified file is parsed again
+    with open(filepath, "a", encoding="utf-8", newline="") as f:
+      f.write("2024-01-01,100,200,300\n")
+    self.assertEqual(self.logic.getTransformsTable(filepath).getNumberOfRows(), 101)
+    self.assertEqual(self.logic.transformsTableCache.getStatistics()["misses"], 2)
+    self.logic.setTransformsSidecar(False)
+    os.remove(filepath)
+    os.remove(os.path.join(slicer.app.temporaryPath, ".TrackTransformsTableTest.csv.TrackTable.npz"))
+
+  def test_readSpreadsheetTable(self):
+    from utils.TransformsData import readSpreadsheetTable
+    try:
+      import openpyxl
+    except ModuleNotFoundError:
+      return
+    filepath = os.path.join(slicer.app.temporaryPath, "TrackTransformsTest.xlsx")
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(["Time", "X", "Y", "Z", "Note"])
+    for index in range(5000):
+      sheet.append([index * 0.01, float(index), index * 2.0, index * 3.0, "tracked"])
+    workbook.save(filepath)
+
+    table = readSpreadsheetTable(filepath, ["X", "Y", "Z"])
+    self.assertEqual(table.columnNames, ["Time", "X", "Y", "Z", "Note"])
+    # Only the requested columns are converted
+    self.assertEqual(sorted(table.columns), ["X", "Y", "Z"])
+    self.assertEqual(table.getColumns(["Z", "X"])[100].tolist(), [300.0, 100.0])
+    self.assertTrue("Note" in readSpreadsheetTable(filepath).errors)
+
+    results = self.logic.benchmarkSpreadsheetReading(filepath, ["X", "Y", "Z"])
+    self.assertTrue(results["streaming"]["peakMB"] < results["full"]["peakMB"])
+    os.remove(filepath)
+
+  def test_rigidTransforms(self):
+    from utils.TransformsData import eulerAnglesToMatrices, quaternionsToMatrices, lpsToRasMatrices
+    # A rotation of 90 degrees about Z, given as Euler angles or as a quaternion
+    translations = np.array([[1.0, 2.0, 3.0]])
+    eulerMatrices = eulerAnglesToMatrices(translations, [[0.0, 0.0, 90.0]])
+    quaternionMatrices = quaternionsToMatrices(translations, [[np.cos(np.pi / 4), 0.0, 0.0, np.sin(np.pi / 4)]])
+    self.assertTrue(np.allclose(eulerMatrices, quaternionMatrices))
+    self.assertTrue(np.allclose(eulerMatrices[0] @ [1.0, 0.0, 0.0, 1.0], [1.0, 3.0, 3.0, 1.0]))
+    rasMatrices = lpsToRasMatrices(eulerMatrices)
+    self.assertTrue(np.allclose(rasMatrices[0, :3, 3], [-1.0, -2.0, 3.0]))
+    self.assertTrue(np.allclose(eulerMatrices[0, :3, 3], [1.0, 2.0, 3.0]))
+
+    filepath = os.path.join(slicer.app.temporaryPath, "TrackRigidTransformsTest.csv")
+    with open(filepath, "w", encoding="utf-8", newline="") as f:
+      f.write("X,Y,Z,RX,RY,RZ\n")
+      for index in range(10):
+        f.write(f"{index},0,0,0,0,{index * 10}\n")
+    transforms = self.logic.validateTransformsInput(filepath, 10, ["X", "Y", "Z"], "euler", ["RX", "RY", "RZ"])
+    self.assertEqual(transforms.shape, (10, 4, 4))
+    shNode = slicer.mrmlScene.GetSubjectHierarchyNode()
+    transformsSequenceNode = self.logic.createTransformNodesFromTransformData(shNode, transforms, 10)
+    matrix = vtk.vtkMatrix4x4()
+    transformsSequenceNode.GetNthDataNode(9).GetMatrixTransformToParent(matrix)
+    self.assertTrue(np.allclose(slicer.util.arrayFromVTKMatrix(matrix), lpsToRasMatrices(transforms)[9]))
+    slicer.mrmlScene.RemoveNode(transformsSequenceNode)
+
+    # Translations given as lists are converted without being modified
+    translationsList = [[1.0, 2.0, 3.0]]
+    transformsSequenceNode = self.logic.createTransformNodesFromTransformData(shNode, translationsList, 1)
+    self.assertEqual(translationsList, [[1.0, 2.0, 3.0]])
+    slicer.mrmlScene.RemoveNode(transformsSequenceNode)
+    os.remove(filepath)
+
+  def test_resampleTransforms(self):
+    from utils.TransformsData import eulerAnglesToMatrices, resampleTransforms
+    # Transforms logged at 100 Hz, moving at constant speed, sampled at frames acquired at 8 Hz
+    timestamps = np.arange(0.0, 10.0, 0.01)
+    translations = np.stack([timestamps * 2.0, timestamps, -timestamps], axis=1)
+    frameTimes = np.arange(80) * 0.125 + 0.003
+    resampled = resampleTransforms(timestamps, translations, frameTimes)
+    self.assertTrue(np.allclose(resampled[:, 0], frameTimes * 2.0))
+    nearest = resampleTransforms(timestamps, translations, frameTimes, "nearest")
+    self.assertTrue(np.allclose(nearest[:, 1], np.round(frameTimes, 2)))
+    # Rotations stay rotations once interpolated
+    matrices = eulerAnglesToMatrices(translations, np.stack([timestamps * 30.0] * 3, axis=1))
+    resampledMatrices = resampleTransforms(timestamps, matrices, frameTimes)
+    self.assertTrue(np.allclose(np.linalg.det(resampledMatrices[:, :3, :3]), 1.0))
+
+    filepath = os.path.join(slicer.app.temporaryPath, "TrackTimestampedTransformsTest.csv")
+    with open(filepath, "w", encoding="utf-8", newline="") as f:
+      f.write("Time,X,Y,Z\n")
+      for time, (x, y, z) in zip(timestamps.tolist(), translations.tolist()):
+        f.write(f"{time + 100.0},{x},{y},{z}\n")
+    # Timestamps are counted from the first one
+    transforms = self.logic.validateTransformsInput(filepath, 80, ["X", "Y", "Z"], timestampColumn="Time",
+                                                    frameTimes=frameTimes)
+    self.assertEqual(len(transforms), 80)
+    self.assertTrue(np.allclose(np.array(transforms), resampled))
+    os.remove(filepath)
+
+  def test_transformsValidationReport(self):
+    filepath = os.path.join(slicer.app.temporaryPath, "TrackTransformsValidationTest.csv")
+    with open(filepath, "w", encoding="utf-8", newline="") as f:
+      f.write("Time,X,Y,Z\n")
+      for index in range(50):
+        y = "n/a" if index in (7, 40) else index * 0.5
+        z = "" if index == 12 else index * 0.1
+        x = 500 if index == 30 else index * 0.3
+        time = (index - 1 if index == 20 else index) * 0.1
+        f.write(f"{time},{x},{y},{z}\n")
+
+    # Every problem of the file is found in one pass, without any dialog
+    report = self.logic.getTransformsValidationReport(filepath, 48, ["X", "Y", "Z"])
+    self.assertFalse(report.isValid)
+    self.assertEqual(report.invalidRows.tolist(), [7, 40])
+    self.assertEqual(report.missingRows.tolist(), [12])
+    self.assertTrue(report.countMismatch)
+    self.assertEqual(report.jumpRows.tolist(), [30, 31])
+    self.assertIsNone(self.logic.validateTransformsInput(filepath, 48, ["X", "Y", "Z"], showDialogs=False))
+    self.assertIs(self.logic.transformsValidationReport.isValid, False)
+
+    report = self.logic.getTransformsValidationReport(filepath, 48, ["X", "Y", "Z"], timestampColumn="Time")
+    self.assertFalse(report.countMismatch)
+    self.assertEqual(report.duplicateTimestampRows.tolist(), [20])
+    report = self.logic.getTransformsValidationReport(filepath, 50, ["X", "Time", "W"])
+    self.assertEqual(list(report.columnErrors), ["W"])
+    self.assertEqual(report.jumpRows.tolist(), [])
+    os.remove(filepath)
+
+  def test_transformArray(self):
+    # The scene grows by a single node whatever the number of frames
+    for numberOfFrames in (10, 2000):
+      self.logic.removeTransformArray()
+      numberOfSceneNodes = slicer.mrmlScene.GetNumberOfNodes()
+      transforms = [[float(i), 2.0 * i, 3.0 * i] for i in range(numberOfFrames)]
+      transformNode = self.logic.createTransformArrayFromTransformData(transforms, numberOfFrames)
+      self.assertEqual(slicer.mrmlScene.GetNumberOfNodes(), numberOfSceneNodes + 1)
+    transformArray = self.logic.getTransformArray(transformNode)
+    self.assertEqual(transformArray.getNumberOfFrames(), 2000)
+
+    # The matrix of the selected frame is updated in place, converted from LPS to RAS
+    imagesSequenceNode = slicer.mrmlScene.AddNewNodeByClass("vtkMRMLSequenceNode", "TrackTransformArrayTest")
+    for index in range(2000):
+      imagesSequenceNode.SetDataNodeAtValue(slicer.vtkMRMLScalarVolumeNode(), str(index))
+    browserNode = slicer.mrmlScene.AddNewNodeByClass("vtkMRMLSequenceBrowserNode")
+    browserNode.AddSynchronizedSequenceNode(imagesSequenceNode)
+    transformArray.observeBrowser(browserNode)
+    browserNode.SetSelectedItemNumber(9)
+    matrix = slicer.util.arrayFromTransformMatrix(transformNode)
+    self.assertTrue(np.allclose(matrix[:3, 3], [-9.0, -18.0, 27.0]))
+
+    # Sessions without transforms keep no array
+    transformNode = self.logic.createTransformArrayFromTransformData(None, 2000)
+    self.assertIsNone(self.logic.getTransformArray(transformNode).matrices)
+    self.logic.getTransformArray(transformNode).setFrame(1999)
+    self.assertTrue(np.allclose(slicer.util.arrayFromTransformMatrix(transformNode), np.eye(4)))
+
+    self.logic.removeTransformArray()
+    self.assertIsNone(transformNode.GetScene())
+    slicer.mrmlScene.RemoveNode(browserNode)
+    slicer.mrmlScene.RemoveNode(imagesSequenceNode)
+
+  def setUpVisualization(self, name, translateFrames=False):
+    """
+    Loads the sample cine images with an empty label map and array-backed transforms following a
+    sequence browser, as the visualization tests use them. Call removeTransformArray afterwards.
+    :param name: name of the label map node
+    :param translateFrames: translate frame i by i along X instead of using identity transforms
+    :return: tuple of the label map node and the arguments of visualize: the sequence browser, the
+    image sequence, the label map ID, no transforms sequence, an opacity of 0.5, an outline overlay
+    and a thickness of 4
+    """
+    shNode = slicer.mrmlScene.GetSubjectHierarchyNode()
+    imagesSequenceNode, cancelled = self.logic.loadImagesIntoSequenceNode(shNode, self.cine_files_paths)
+    numberOfFrames = imagesSequenceNode.GetNumberOfDataNodes()
+    labelMapNode = slicer.mrmlScene.AddNewNodeByClass("vtkMRMLLabelMapVolumeNode", name)
+    slicer.util.updateVolumeFromArray(labelMapNode, np.zeros((8, 8, 8), dtype=np.uint8))
+    labelMapNode.CreateDefaultDisplayNodes()
+    labelMapID = shNode.GetItemByDataNode(labelMapNode)
+    transforms = [[float(i), 0.0, 0.0] for i in range(numberOfFrames)] if translateFrames else None
+    self.logic.createTransformArrayFromTransformData(transforms, numberOfFrames)
+    browserNode = slicer.mrmlScene.AddNewNodeByClass("vtkMRMLSequenceBrowserNode")
+    browserNode.AddSynchronizedSequenceNode(imagesSequenceNode)
+    self.logic.transformArray.observeBrowser(browserNode)
+    return labelMapNode, (browserNode, imagesSequenceNode, labelMapID, None, 0.5, True, 4)
+
+  def test_visualizeFrame(self):
+    if self.cine_files_paths is None:
+        return
+    labelMapNode, arguments = self.setUpVisualization("TrackVisualizeFrameTest", translateFrames=True)
+    browserNode, imagesSequenceNode = arguments[:2]
+
+    # Once the views are configured, the next frames only swap the image, transform and label
+    timings = self.logic.benchmarkFrameUpdates(*arguments, numberOfFrames=10)
+    self.assertEqual(set(timings), {"full", "fast"})
+    self.assertEqual(self.logic.frameUpdateCounts["fast"], 10)
+    browserNode.SetSelectedItemNumber(5)
+    self.logic.visualizeFrame(*arguments)
+    self.assertEqual(self.logic.frameUpdateCounts["fast"], 11)
+    proxyNode = browserNode.GetProxyNode(imagesSequenceNode)
+    background = getattr(self.logic, self.logic.visualizationState["sliceViewName"].lower() + "Background")
+    self.assertIs(background.GetImageData(), proxyNode.GetImageData())
+    self.assertEqual(slicer.util.arrayFromTransformMatrix(self.logic.transformArray.transformNode)[0, 3], -5.0)
+
+    # Changing a display setting configures the views again
+    self.logic.visualizeFrame(*arguments[:4], 0.8, *arguments[5:])
+    self.assertEqual(self.logic.frameUpdateCounts["fast"], 11)
+    self.logic.removeTransformArray()
+
+  def test_sliceOrientation(self):
+    from utils.FrameDecoding import sliceOrientationFromGeometry
+    # Flat frames are shown in the view normal to their single-voxel axis, whatever its sign
+    self.assertEqual(sliceOrientationFromGeometry((256, 256, 1), np.eye(3)), "Axial")
+    self.assertEqual(sliceOrientationFromGeometry((256, 256, 1), np.diag([-1.0, -1.0, 1.0])), "Axial")
+    self.assertEqual(sliceOrientationFromGeometry((1, 256, 256), np.eye(3)), "Sagittal")
+    self.assertEqual(sliceOrientationFromGeometry((256, 1, 256), np.eye(3)), "Coronal")
+    sagittalDirections = np.array([[0.0, 0.0, -1.0], [1.0, 0.0, 0.0], [0.0, -1.0, 0.0]])
+    self.assertEqual(sliceOrientationFromGeometry((256, 256, 1), sagittalDirections), "Sagittal")
+
+    # The routing is computed once per frame geometry, without adding nodes to the scene
+    layoutManager = slicer.app.layoutManager()
+    imageNode = slicer.mrmlScene.AddNewNodeByClass("vtkMRMLScalarVolumeNode", "TrackSliceOrientationTest")
+    slicer.util.updateVolumeFromArray(imageNode, np.zeros((1, 64, 64), dtype=np.uint8))
+    imageNode.SetIJKToRASDirections(0.0, 0.0, -1.0, 1.0, 0.0, 0.0, 0.0, -1.0, 0.0)
+    self.logic.sliceOrientations.clear()
+    numberOfSceneNodes = slicer.mrmlScene.GetNumberOfNodes()
+    for _ in range(10):
+      sliceWidget = self.logic.getSliceWidget(layoutManager, imageNode)
+    self.assertEqual(sliceWidget.sliceOrientation, "Sagittal")
+    self.assertEqual(len(self.logic.sliceOrientations), 1)
+    self.assertEqual(slicer.mrmlScene.GetNumberOfNodes(), numberOfSceneNodes)
+    slicer.mrmlScene.RemoveNode(imageNode)
+
+  def test_displayRefresh(self):
+    if self.cine_files_paths is None:
+        return
+    labelMapNode, arguments = self.setUpVisualization("TrackDisplayRefreshTest")
+    browserNode = arguments[0]
+
+    # The color table and volume rendering are refreshed once, then only after a change
+    self.logic.visualize(*arguments)
+    refreshCount = self.logic.displayRefreshCount
+    for index in range(5):
+      browserNode.SetSelectedItemNumber(index)
+      self.logic.visualize(*arguments)
+    self.assertEqual(self.logic.displayRefreshCount, refreshCount)
+    self.logic.markDisplayDirty()
+    self.logic.visualizeFrame(*arguments)
+    self.logic.visualizeFrame(*arguments)
+    self.assertEqual(self.logic.displayRefreshCount, refreshCount + 1)
+    # Editing the color table is noticed even when the flag was not set
+    labelMapNode.GetDisplayNode().GetColorNode().Modified()
+    self.logic.visualize(*arguments)
+    self.assertEqual(self.logic.displayRefreshCount, refreshCount + 2)
+
+    fps = self.logic.benchmarkPlaybackFps(*arguments, numberOfFrames=10)
+    self.assertEqual(set(fps), {"refreshEveryFrame", "visualize", "visualizeFrame"})
+    self.logic.removeTransformArray()
+
+  def test_renderScheduler(self):
+    from utils.Helper import RenderScheduler
+    layoutManager = slicer.app.layoutManager()
+    redView = layoutManager.sliceWidget("Red").sliceView()
+    greenView = layoutManager.sliceWidget("Green").sliceView()
+
+    # A view changed several times during a frame is rendered once, unchanged views are not rendered
+    scheduler = RenderScheduler()
+    for _ in range(3):
+      scheduler.requestRender(redView)
+    scheduler.requestRender(None)
+    self.assertEqual(scheduler.flush(), 1)
+    self.assertEqual(scheduler.flush(), 0)
+    scheduler.requestRender(redView)
+    scheduler.requestRender(greenView)
+    self.assertEqual(scheduler.flush(), 2)
+    statistics = scheduler.getStatistics()
+    self.assertEqual(statistics["frames"], 3)
+    self.assertEqual(statistics["renders"], 3)
+    self.assertEqual(statistics["rendersPerFrame"], 1.0)
+    self.assertGreaterEqual(statistics["renderTimePerFrame"], 0.0)
+    scheduler.resetStatistics()
+    self.assertEqual(scheduler.getStatistics()["renders"], 0)
+
+    if self.cine_files_paths is None:
+        return
+    labelMapNode, arguments = self.setUpVisualization("TrackRenderSchedulerTest")
+    browserNode, imagesSequenceNode = arguments[:2]
+
+    # With identity transforms only the slice view showing the frame changes during playback
+    self.logic.visualize(*arguments)
+    self.logic.renderScheduler.resetStatistics()
+    for index in range(1, 6):
+      browserNode.SetSelectedItemNumber(index % imagesSequenceNode.GetNumberOfDataNodes())
+      self.logic.visualizeFrame(*arguments)
+    statistics = self.logic.getRenderStatistics()
+    self.assertEqual(statistics["frames"], 5)
+    self.assertEqual(statistics["rendersPerFrame"], 1.0)
+    self.logic.removeTransformArray()
+
+    # Moving transforms move the label map in every view, even once the browser updated the transform
+    labelMapNode, arguments = self.setUpVisualization("TrackRenderSchedulerTest", translateFrames=True)
+    browserNode = arguments[0]
+    self.logic.visualize(*arguments)
+    self.logic.renderScheduler.resetStatistics()
+    browserNode.SetSelectedItemNumber(1)
+    self.logic.visualizeFrame(*arguments)
+    self.assertGreater(self.logic.getRenderStatistics()["rendersPerFrame"], 1.0)
+    self.logic.removeTransformArray()
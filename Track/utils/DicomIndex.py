@@ -0,0 +1,157 @@
+import os, json, datetime
+
+import SimpleITK as sitk
+
+from utils.FrameDecoding import decodeFramesInOrder
+
+# Name of the index file stored in every indexed DICOM folder
+INDEX_FILE_NAME = ".TrackDicomIndex.json"
+INDEX_VERSION = 1
+
+def _dicomDateTimeToSeconds(date, time):
+  """
+  Converts a DICOM date (YYYYMMDD) and time (HHMMSS.FFFFFF) to seconds, or returns None if the time
+  is missing. Times without a date are counted from midnight.
+  """
+  time = time.strip()
+  if len(time) < 2:
+    return None
+  try:
+    seconds = int(time[0:2]) * 3600.0
+    if len(time) >= 4:
+      seconds += int(time[2:4]) * 60.0
+    if len(time) >= 6:
+      seconds += float(time[4:])
+    date = date.strip()
+    if len(date) == 8:
+      seconds += datetime.date(int(date[0:4]), int(date[4:6]), int(date[6:8])).toordinal() * 86400.0
+  except ValueError:
+    return None
+  return seconds
+
+def readDicomHeader(path):
+  """
+  Reads the tags needed to group and order cine frames from the header of a DICOM file, without
+  decoding any pixels.
+  :param path: path to the DICOM file
+  :return: dictionary of the header values, or None if the file cannot be read as DICOM
+  """
+  reader = sitk.ImageFileReader()
+  reader.SetImageIO("GDCMImageIO")
+  reader.SetFileName(path)
+  try:
+    reader.ReadImageInformation()
+  except RuntimeError:
+    return None
+
+  def tag(key):
+    return reader.GetMetaData(key).strip() if reader.HasMetaDataKey(key) else ""
+
+  acquisitionDateTime = tag("0008|002a")
+  if acquisitionDateTime:
+    acquisitionTime = _dicomDateTimeToSeconds(acquisitionDateTime[:8], acquisitionDateTime[8:])
+  else:
+    acquisitionTime = _dicomDateTimeToSeconds(tag("0008|0022"), tag("0008|0032"))
+  try:
+    instanceNumber = int(tag("0020|0013"))
+  except ValueError:
+    instanceNumber = None
+  try:
+    seriesNumber = int(tag("0020|0011"))
+  except ValueError:
+    seriesNumber = None
+
+  return {
+    "seriesInstanceUID": tag("0020|000e"),
+    "seriesNumber": seriesNumber,
+    "seriesDescription": tag("0008|103e"),
+    "acquisitionTime": acquisitionTime,
+    "instanceNumber": instanceNumber,
+  }
+
+def _loadFolderIndex(folder):
+  try:
+    with open(os.path.join(folder, INDEX_FILE_NAME), "r", encoding="utf-8") as f:
+      index = json.load(f)
+    if index.get("version") == INDEX_VERSION:
+      return index["files"]
+  except (OSError, ValueError, KeyError):
+    pass
+  return {}
+
+def _saveFolderIndex(folder, entries):
+  indexPath = os.path.join(folder, INDEX_FILE_NAME)
+  try:
+    with open(indexPath + ".tmp", "w", encoding="utf-8") as f:
+      json.dump({"version": INDEX_VERSION, "files": entries}, f)
+    os.replace(indexPath + ".tmp", indexPath)
+  except OSError as e:
+    # Read-only folders are indexed again next time
+    print(f"Could not save the DICOM index of {folder}: {e}")
+
+def indexDicomFiles(paths, numWorkers):
+  """
+  Reads the headers of DICOM files on worker threads. The headers are stored in an index file in
+  each folder, keyed by file name, size and modification time, so that reopening a folder only
+  reads the headers of new or modified files.
+  :param paths: paths to the DICOM files
+  :param numWorkers: number of threads reading headers
+  :return: dictionary mapping each path to its header, or to None if it is not a readable DICOM file
+  """
+  pathsByFolder = {}
+  for path in paths:
+    pathsByFolder.setdefault(os.path.dirname(os.path.abspath(path)), []).append(path)
+
+  headers = {}
+  for folder, folderPaths in pathsByFolder.items():
+    entries = _loadFolderIndex(folder)
+    stalePaths = []
+    for path in folderPaths:
+      stat = os.stat(path)
+      entry = entries.get(os.path.basename(path))
+      if entry is not None and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime_ns:
+        headers[path] = entry["header"]
+      else:
+        stalePaths.append(path)
+
+    if stalePaths:
+      for path, header in zip(stalePaths, decodeFramesInOrder(stalePaths, numWorkers, readDicomHeader)):
+        stat = os.stat(path)
+        entries[os.path.basename(path)] = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "header": header}
+        headers[path] = header
+      # Entries of files deleted or renamed since the last scan would otherwise accumulate
+      scannedNames = {os.path.basename(path) for path in folderPaths}
+      _saveFolderIndex(folder, {name: entry for name, entry in entries.items() if name in scannedNames})
+
+  return headers
+
+def groupDicomSeries(headers):
+  """
+  Groups DICOM files by SeriesInstanceUID and orders the frames of each series by acquisition time,
+  then instance number, then file name.
+  :param headers: dictionary mapping paths to headers, as returned by indexDicomFiles
+  :return: list of series ordered by series number, each a dictionary holding the series instance
+  UID, number and description, and the ordered list of its files
+  """
+  seriesByUID = {}
+  for path, header in headers.items():
+    if header is None:
+      continue
+    series = seriesByUID.setdefault(header["seriesInstanceUID"], {
+      "seriesInstanceUID": header["seriesInstanceUID"],
+      "seriesNumber": header["seriesNumber"],
+      "description": header["seriesDescription"],
+      "files": [],
+    })
+    series["files"].append(path)
+
+  for series in seriesByUID.values():
+    # Acquisition times only order the frames when every frame of the series has one
+    useTime = all(headers[path]["acquisitionTime"] is not None for path in series["files"])
+    useInstance = all(headers[path]["instanceNumber"] is not None for path in series["files"])
+    series["files"].sort(key=lambda path: (headers[path]["acquisitionTime"] if useTime else 0,
+                                           headers[path]["instanceNumber"] if useInstance else 0,
+                                           os.path.basename(path)))
+
+  return sorted(seriesByUID.values(),
+                key=lambda series: (series["seriesNumber"] is None, series["seriesNumber"] or 0, series["files"][0]))
@@ -0,0 +1,227 @@
+import os, re, collections
+import concurrent.futures
+
+import numpy as np
+import vtk
+from vtk.util import numpy_support
+import SimpleITK as sitk
+import slicer
+
+# 3D Slicer uses the RAS (Right, Anterior, Superior) basis, while SimpleITK/DICOM use LPS (Left,
+# Posterior, Superior). Multiplying an IJK to LPS matrix by this matrix gives the IJK to RAS matrix.
+LPS_TO_RAS = np.diag([-1.0, -1.0, 1.0, 1.0])
+
+# File name patterns of the supported cine image formats
+IMAGE_FILE_FORMATS = [r'.*\.mha', r'.*\.dcm', r'.*\.nrrd', r'.*\.nii', r'.*\.hdr', r'.*\.nhdr', r'.*\.mhd']
+
+def isImageFile(path):
+  """
+  Returns True if the path has the extension of a supported cine image format.
+  """
+  return any(re.match(format, path) for format in IMAGE_FILE_FORMATS)
+
+def defaultWorkerCount():
+  """
+  Number of worker threads used for decoding when no explicit count is configured.
+  """
+  return max(1, min(os.cpu_count() or 1, 16))
+
+def ijkToRASFromSitkImage(image):
+  """
+  Computes the 4x4 IJK to RAS matrix of a SimpleITK image. 2D images are treated as a single
+  slice volume so that they can be stored in a vtkMRMLScalarVolumeNode.
+  :param image: SimpleITK image (only the image information needs to have been read)
+  """
+  dimension = min(image.GetDimension(), 3)
+  direction = np.eye(3)
+  direction[:dimension, :dimension] = \
+    np.array(image.GetDirection()).reshape(image.GetDimension(), image.GetDimension())[:dimension, :dimension]
+  spacing = np.ones(3)
+  spacing[:dimension] = image.GetSpacing()[:dimension]
+  origin = np.zeros(3)
+  origin[:dimension] = image.GetOrigin()[:dimension]
+
+  ijkToLPS = np.eye(4)
+  ijkToLPS[:3, :3] = direction * spacing
+  ijkToLPS[:3, 3] = origin
+  return LPS_TO_RAS @ ijkToLPS
+
+# Orientations of the slice views normal to the R-L, A-P and I-S axes
+SLICE_ORIENTATIONS = ("Sagittal", "Coronal", "Axial")
+
+def sliceOrientationFromGeometry(dimensions, directions):
+  """
+  Returns the orientation of the slice view that shows a frame, from its geometry only. The view is
+  normal to the single-voxel axis of the frame: the I or J axis when the K axis has more than one
+  voxel, the K axis otherwise.
+  :param dimensions: image dimensions (i, j, k)
+  :param directions: 3x3 array whose columns are the directions of the I, J and K axes in RAS
+  :return: "Sagittal", "Coronal" or "Axial"
+  """
+  normalAxis = 2
+  if dimensions[2] != 1:
+    if dimensions[0] == 1:
+      normalAxis = 0
+    elif dimensions[1] == 1:
+      normalAxis = 1
+  # Flipping an axis does not change the view it is shown in, so only the dominant component counts
+  return SLICE_ORIENTATIONS[int(np.argmax(np.abs(np.asarray(directions)[:, normalAxis])))]
+
+def readFrame(path):
+  """
+  Decodes a single cine image file. SimpleITK releases the GIL while reading and decompressing,
+  so this can be called from worker threads.
+  :param path: path to the image file
+  :return: tuple of the voxel array (k, j, i ordering) and the 4x4 IJK to RAS matrix
+  """
+  image = sitk.ReadImage(path)
+  array = sitk.GetArrayFromImage(image)
+  if image.GetDimension() == 2:
+    array = array[np.newaxis, ...]
+  return array, ijkToRASFromSitkImage(image)
+
+def readFrameGeometry(path):
+  """
+  Reads only the header of a cine image file, without decoding any pixels.
+  :param path: path to the image file
+  :return: tuple of the image size (i, j, k, 1 for the axes a 2D image lacks) and the 4x4 IJK to
+  RAS matrix of the frame
+  """
+  reader = sitk.ImageFileReader()
+  reader.SetFileName(path)
+  reader.ReadImageInformation()
+  size = np.ones(3, dtype=int)
+  size[:min(reader.GetDimension(), 3)] = reader.GetSize()[:3]
+  return size, ijkToRASFromSitkImage(reader)
+
+def groupFramesByGeometry(sizes, ijkToRASMatrices, decimals=4):
+  """
+  Groups the frames sharing the same size, spacing and axis directions. Frames of a group may
+  still be at different positions.
+  :param sizes: (N, 3) array of image sizes
+  :param ijkToRASMatrices: (N, 4, 4) array of IJK to RAS matrices
+  :param decimals: number of decimals up to which spacings and directions must agree
+  :return: list of arrays of frame indices, largest group first
+  """
+  keys = np.concatenate([sizes, np.round(ijkToRASMatrices[:, :3, :3].reshape(-1, 9), decimals)], axis=1)
+  _, groupOfFrames = np.unique(keys, axis=0, return_inverse=True)
+  groupOfFrames = groupOfFrames.reshape(-1)
+  groups = [np.flatnonzero(groupOfFrames == group) for group in range(groupOfFrames.max() + 1)]
+  # Among groups of the same size, the one holding the earliest frame comes first
+  groups.sort(key=lambda indices: (-len(indices), indices[0]))
+  return groups
+
+def readNumberOfFrames(path):
+  """
+  Returns the number of cine frames stored in a single image file, reading only its header. A
+  4D image, or a 3D image with more than one slice, is taken to hold one frame per index along
+  its last axis (time). Any other image holds a single frame.
+  :param path: path to the image file
+  """
+  reader = sitk.ImageFileReader()
+  reader.SetFileName(path)
+  reader.ReadImageInformation()
+  size = reader.GetSize()
+  if reader.GetDimension() == 4 or (reader.GetDimension() == 3 and size[2] > 1):
+    return size[-1]
+  return 1
+
+def readMultiFrameFile(path):
+  """
+  Decodes an image file holding a whole cine acquisition, whose last axis is time. The file is
+  read once, and the returned frames are views into that single decoded buffer.
+  :param path: path to the image file
+  :return: tuple of an (N, k, j, i) array of frames and the 4x4 IJK to RAS matrix they share
+  """
+  image = sitk.ReadImage(path)
+  # SimpleITK orders the array axes in reverse, so time becomes the first axis
+  frames = sitk.GetArrayFromImage(image)
+  ijkToRAS = ijkToRASFromSitkImage(image)
+  if image.GetDimension() == 3:
+    # Each frame is a single slice, and all of them are acquired at the same position. The
+    # spacing along the third axis is a time step, so it is not used as the slice thickness.
+    frames = frames[:, np.newaxis, ...]
+    ijkToRAS[:3, 2] /= image.GetSpacing()[2]
+  return frames, ijkToRAS
+
+def downsampleFrame(array, factor):
+  """
+  Averages blocks of factor x factor voxels within every slice of a frame. Voxels past the last
+  whole block of a row or column are dropped.
+  :param array: voxel array of the frame (k, j, i[, components] ordering)
+  :param factor: downsampling factor along the rows and columns
+  """
+  rows = array.shape[1] // factor
+  columns = array.shape[2] // factor
+  blocks = array[:, :rows * factor, :columns * factor].reshape(
+    (array.shape[0], rows, factor, columns, factor) + array.shape[3:])
+  return blocks.mean(axis=(2, 4)).astype(array.dtype)
+
+def imageDataFromArray(array, deepCopy=True):
+  """
+  Wraps a voxel array (k, j, i[, components] ordering) in a vtkImageData.
+  :param array: numpy array holding the voxels
+  :param deepCopy: if False the image data references the array memory instead of copying it
+  """
+  components = 1 if array.ndim == 3 else array.shape[3]
+  array = np.ascontiguousarray(array)
+  imageData = vtk.vtkImageData()
+  imageData.SetDimensions(array.shape[2], array.shape[1], array.shape[0])
+  scalars = numpy_support.numpy_to_vtk(array.reshape(-1, components) if components > 1 else array.reshape(-1),
+                                       deep=deepCopy)
+  imageData.GetPointData().SetScalars(scalars)
+  return imageData
+
+def createVolumeNodeFromArray(array, ijkToRAS, name):
+  """
+  Creates a scalar volume node that is not added to the MRML scene. Such a node can be placed into
+  a sequence node directly, without creating subject hierarchy items that must be removed again.
+  :param array: voxel array (k, j, i ordering)
+  :param ijkToRAS: 4x4 IJK to RAS matrix of the frame
+  :param name: name of the volume node
+  """
+  volumeNode = slicer.vtkMRMLScalarVolumeNode()
+  volumeNode.SetName(name)
+  volumeNode.SetIJKToRASMatrix(slicer.util.vtkMatrixFromArray(ijkToRAS))
+  volumeNode.SetAndObserveImageData(imageDataFromArray(array))
+  return volumeNode
+
+def createPlaceholderVolumeNode(ijkToRAS, name):
+  """
+  Creates a volume node holding the geometry of a frame but only a single voxel of image data.
+  Sequences of placeholder nodes are filled in on demand by a frame source.
+  :param ijkToRAS: 4x4 IJK to RAS matrix of the frame
+  :param name: name of the volume node
+  """
+  imageData = vtk.vtkImageData()
+  imageData.SetDimensions(1, 1, 1)
+  imageData.AllocateScalars(vtk.VTK_UNSIGNED_CHAR, 1)
+  imageData.GetPointData().GetScalars().Fill(0)
+  volumeNode = slicer.vtkMRMLScalarVolumeNode()
+  volumeNode.SetName(name)
+  volumeNode.SetIJKToRASMatrix(slicer.util.vtkMatrixFromArray(ijkToRAS))
+  volumeNode.SetAndObserveImageData(imageData)
+  return volumeNode
+
+def decodeFramesInOrder(paths, numWorkers, decode=readFrame):
+  """
+  Decodes the given files on a pool of worker threads and yields the results in the order of
+  `paths`. Only a few frames per worker are decoded ahead of the consumer, so memory stays bounded
+  regardless of the number of files. Closing the generator cancels the frames not started yet.
+  :param paths: list of paths to decode
+  :param numWorkers: number of worker threads
+  :param decode: function decoding a single path
+  """
+  maxInFlight = numWorkers * 4
+  with concurrent.futures.ThreadPoolExecutor(max_workers=numWorkers) as executor:
+    pending = collections.deque()
+    nextIndex = 0
+    try:
+      while pending or nextIndex < len(paths):
+        while nextIndex < len(paths) and len(pending) < maxInFlight:
+          pending.append(executor.submit(decode, paths[nextIndex]))
+          nextIndex += 1
+        yield pending.popleft().result()
+    finally:
+      for future in pending:
+        future.cancel()
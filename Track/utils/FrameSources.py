@@ -0,0 +1,753 @@
+import os, collections, threading, math, time, tempfile, hashlib, zlib
+from abc import ABC, abstractmethod
+import concurrent.futures
+
+import numpy as np
+import vtk
+import slicer
+
+from utils.FrameDecoding import readFrame, imageDataFromArray, downsampleFrame
+
+class FrameCache:
+  """
+  Least recently used cache of decoded frames, bounded by the total number of bytes it holds.
+  It can be used from several threads at once.
+  """
+
+  def __init__(self, maxBytes):
+    self.maxBytes = maxBytes
+    self.currentBytes = 0
+    self._frames = collections.OrderedDict()
+    self._lock = threading.Lock()
+
+  def get(self, index):
+    """
+    Returns the cached frame, or None if it is not cached. A hit marks the frame as recently used.
+    """
+    with self._lock:
+      array = self._frames.get(index)
+      if array is not None:
+        self._frames.move_to_end(index)
+      return array
+
+  def put(self, index, array):
+    """
+    Adds a frame to the cache, evicting the least recently used frames above the byte budget. The
+    frame just added is always kept, even when it alone is larger than the budget.
+    """
+    with self._lock:
+      if index in self._frames:
+        self.currentBytes -= self._frames.pop(index).nbytes
+      self._frames[index] = array
+      self.currentBytes += array.nbytes
+      while self.currentBytes > self.maxBytes and len(self._frames) > 1:
+        _, evictedArray = self._frames.popitem(last=False)
+        self.currentBytes -= evictedArray.nbytes
+
+  def __contains__(self, index):
+    with self._lock:
+      return index in self._frames
+
+  def __len__(self):
+    with self._lock:
+      return len(self._frames)
+
+  def clear(self):
+    with self._lock:
+      self._frames.clear()
+      self.currentBytes = 0
+
+class DiskFrameCache:
+  """
+  Persistent cache of decoded frames in a local directory, so that cine folders opened again load
+  at close to disk bandwidth instead of being parsed and decompressed again. Entries are raw .npy
+  files keyed by the path, size and modification time of the source image, so an edited image is
+  decoded again. The directory is bounded by a byte budget, evicting the least recently used
+  entries. The modification time of an entry records its last use across sessions.
+  It can be used from several threads at once.
+  """
+
+  def __init__(self, directory, maxBytes):
+    """
+    :param directory: local directory holding the cached frames
+    :param maxBytes: size cap of the directory, in bytes
+    """
+    os.makedirs(directory, exist_ok=True)
+    self.directory = directory
+    self.maxBytes = maxBytes
+    self.currentBytes = 0
+    self._entries = collections.OrderedDict()  # entry file name -> size, least recently used first
+    self._lock = threading.Lock()
+
+    # Pick up the entries left by previous sessions, oldest first
+    entries = []
+    for fileName in os.listdir(directory):
+      if fileName.endswith(".npy"):
+        stat = os.stat(os.path.join(directory, fileName))
+        entries.append((stat.st_mtime, fileName, stat.st_size))
+    for _, fileName, size in sorted(entries):
+      self._entries[fileName] = size
+      self.currentBytes += size
+    self.resetStatistics()
+
+  def _entryFileName(self, path):
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest() + ".npy"
+
+  def readFrame(self, path):
+    """
+    Drop-in replacement of FrameDecoding.readFrame, returning the cached frame when there is one
+    and decoding and caching the image otherwise.
+    :param path: path to the image file
+    :return: tuple of the voxel array (k, j, i ordering) and the 4x4 IJK to RAS matrix
+    """
+    fileName = self._entryFileName(path)
+    entryPath = os.path.join(self.directory, fileName)
+    with self._lock:
+      cached = fileName in self._entries
+      if cached:
+        self._entries.move_to_end(fileName)
+
+    if cached:
+      try:
+        with open(entryPath, "rb") as f:
+          ijkToRAS = np.load(f)
+          array = np.load(f)
+        os.utime(entryPath)
+        with self._lock:
+          self.hits += 1
+        return array, ijkToRAS
+      except (OSError, ValueError) as e:
+        print(f"Could not read the cached frame of {path}: {e}")
+        self._removeEntry(fileName)
+
+    array, ijkToRAS = readFrame(path)
+    with self._lock:
+      self.misses += 1
+    self._addEntry(fileName, array, ijkToRAS)
+    return array, ijkToRAS
+
+  def _addEntry(self, fileName, array, ijkToRAS):
+    """
+    Writes a decoded frame to the cache directory, then evicts the least recently used entries
+    above the byte budget. The frame just added is always kept.
+    """
+    entryPath = os.path.join(self.directory, fileName)
+    # Write under a temporary name, so other threads and sessions never read a partial entry
+    temporaryPath = f"{entryPath}.{threading.get_ident()}.tmp"
+    try:
+      with open(temporaryPath, "wb") as f:
+        np.save(f, ijkToRAS)
+        np.save(f, array)
+      os.replace(temporaryPath, entryPath)
+      size = os.path.getsize(entryPath)
+    except OSError as e:
+      print(f"Could not cache the decoded frame {fileName}: {e}")
+      if os.path.exists(temporaryPath):
+        os.remove(temporaryPath)
+      return
+
+    evicted = []
+    with self._lock:
+      if fileName in self._entries:
+        self.currentBytes -= self._entries.pop(fileName)
+      self._entries[fileName] = size
+      self.currentBytes += size
+      while self.currentBytes > self.maxBytes and len(self._entries) > 1:
+        evictedFileName, evictedSize = self._entries.popitem(last=False)
+        self.currentBytes -= evictedSize
+        evicted.append(evictedFileName)
+    for evictedFileName in evicted:
+      self._removeFile(evictedFileName)
+
+  def _removeEntry(self, fileName):
+    with self._lock:
+      if fileName in self._entries:
+        self.currentBytes -= self._entries.pop(fileName)
+    self._removeFile(fileName)
+
+  def _removeFile(self, fileName):
+    try:
+      os.remove(os.path.join(self.directory, fileName))
+    except OSError:
+      pass
+
+  def __len__(self):
+    with self._lock:
+      return len(self._entries)
+
+  def clear(self):
+    """
+    Deletes every cached frame.
+    """
+    with self._lock:
+      fileNames = list(self._entries)
+      self._entries.clear()
+      self.currentBytes = 0
+    for fileName in fileNames:
+      self._removeFile(fileName)
+
+  def resetStatistics(self):
+    self.hits = 0
+    self.misses = 0
+
+  def getStatistics(self):
+    """
+    Returns the cache hits and misses since the statistics were last reset, along with the number
+    of cached frames and the bytes they take on disk.
+    """
+    with self._lock:
+      return {
+        "hits": self.hits,
+        "misses": self.misses,
+        "entries": len(self._entries),
+        "bytes": self.currentBytes,
+      }
+
+class FrameSource(ABC):
+  """
+  Base class of the sources filling in image sequences that hold placeholder volume nodes. The
+  sequence nodes carry the geometry of every frame, and a frame source provides the voxels of the
+  frame selected in the sequence browser. Subclasses implement getNumberOfFrames and getFrame.
+  """
+
+  def __init__(self):
+    # ID of the sequence node whose placeholder frames this source fills in
+    self.sequenceNodeID = None
+
+  @abstractmethod
+  def getNumberOfFrames(self):
+    pass
+
+  @abstractmethod
+  def getFrame(self, index):
+    """
+    Returns the voxel array (k, j, i ordering) of a frame.
+    :param index: index of the frame within the sequence
+    """
+
+  def updateProxyNode(self, proxyNode, index):
+    """
+    Replaces the placeholder image data of the sequence proxy node with the selected frame. The
+    image data references the frame array instead of copying it.
+    :param proxyNode: proxy volume node of the sequence browser
+    :param index: index of the selected frame
+    """
+    proxyNode.SetAndObserveImageData(imageDataFromArray(self.getFrame(index), deepCopy=False))
+
+  def setPlaybackRate(self, fps):
+    pass
+
+  def getStatistics(self):
+    return {}
+
+  def close(self):
+    pass
+
+class ProxyFrames:
+  """
+  Downsampled copies of the cine frames, shown in place of the full resolution frames while the
+  user scrubs through the sequence or plays it back quickly. A frame shown in low resolution
+  covers the same extent as the full resolution frame, with a spacing larger by the factor.
+  """
+
+  def __init__(self, factor):
+    """
+    :param factor: downsampling factor along the rows and columns of the frames
+    """
+    self.factor = factor
+    # ID of the sequence node whose frames are downsampled
+    self.sequenceNodeID = None
+    self.frames = {}  # frame index -> downsampled voxel array
+    self._shownImageData = None
+
+  def addFrame(self, index, array):
+    """
+    Stores the downsampled copy of a frame. Frames smaller than the factor are not downsampled.
+    """
+    self.setDownsampledFrame(index, self.downsample(array))
+
+  def downsample(self, array):
+    """
+    Returns the downsampled copy of a frame, or None if the frame is smaller than the factor. Does
+    not change the stored frames, so it may be called from worker threads.
+    """
+    if array.shape[1] >= self.factor and array.shape[2] >= self.factor:
+      return downsampleFrame(array, self.factor)
+    return None
+
+  def setDownsampledFrame(self, index, downsampledFrame):
+    """
+    Stores a copy returned by downsample, if any.
+    """
+    if downsampledFrame is not None:
+      self.frames[index] = downsampledFrame
+
+  def __contains__(self, index):
+    return index in self.frames
+
+  def isShownIn(self, proxyNode):
+    """
+    Returns True if the proxy node currently shows a low resolution frame.
+    """
+    return self._shownImageData is not None and proxyNode.GetImageData() is self._shownImageData
+
+  def updateProxyNode(self, proxyNode, dataNode, index):
+    """
+    Shows the low resolution copy of a frame in the sequence proxy node.
+    :param proxyNode: proxy volume node of the sequence browser
+    :param dataNode: sequence data node of the frame, holding its full resolution geometry
+    :param index: index of the frame
+    """
+    ijkToRASMatrix = vtk.vtkMatrix4x4()
+    dataNode.GetIJKToRASMatrix(ijkToRASMatrix)
+    ijkToRAS = slicer.util.arrayFromVTKMatrix(ijkToRASMatrix)
+    # The center of an averaged block lies between the centers of the voxels it averages
+    ijkToRAS[:3, 3] += ijkToRAS[:3, :2] @ np.full(2, (self.factor - 1) / 2.0)
+    ijkToRAS[:3, :2] *= self.factor
+    proxyNode.SetIJKToRASMatrix(slicer.util.vtkMatrixFromArray(ijkToRAS))
+    self._shownImageData = imageDataFromArray(self.frames[index], deepCopy=False)
+    proxyNode.SetAndObserveImageData(self._shownImageData)
+
+  def restoreProxyNode(self, proxyNode, dataNode):
+    """
+    Puts the full resolution geometry and image data of the sequence data node back into the proxy
+    node showing a low resolution frame.
+    """
+    ijkToRASMatrix = vtk.vtkMatrix4x4()
+    dataNode.GetIJKToRASMatrix(ijkToRASMatrix)
+    proxyNode.SetIJKToRASMatrix(ijkToRASMatrix)
+    proxyNode.SetAndObserveImageData(dataNode.GetImageData())
+    self._shownImageData = None
+
+class LazyFrameSource(FrameSource):
+  """
+  Frame source that keeps only the path of every cine frame in memory. The sequence node holds
+  placeholder volume nodes with the geometry of each frame, and pixels are decoded when a frame
+  is selected for display. Decoded frames are held in a bounded LRU cache.
+
+  While a frame is displayed, the next frames in the current playback direction are decoded on
+  background threads, so that playback does not have to wait for the disk.
+  """
+
+  # Seconds of playback decoded ahead of the displayed frame
+  PREFETCH_SECONDS = 1.0
+  MIN_PREFETCH_DEPTH = 2
+  MAX_PREFETCH_DEPTH = 64
+
+  def __init__(self, paths, cacheSizeMB, numWorkers=2, decode=readFrame):
+    """
+    :param paths: ordered list of paths to the cine images
+    :param cacheSizeMB: memory budget of the decoded frame cache, in megabytes
+    :param numWorkers: number of threads decoding frames ahead of playback
+    :param decode: function decoding a single path, such as DiskFrameCache.readFrame
+    """
+    FrameSource.__init__(self)
+    self.paths = paths
+    self._decodeFile = decode
+    self.cache = FrameCache(cacheSizeMB * 1024 * 1024)
+
+    self.prefetchDepth = self.MIN_PREFETCH_DEPTH
+    self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=numWorkers)
+    self._pending = {}  # frame index -> future decoding it
+    self._pendingLock = threading.Lock()
+    self._lastIndex = None
+    self._direction = 1
+    self.resetStatistics()
+
+  def getNumberOfFrames(self):
+    return len(self.paths)
+
+  def getFrame(self, index):
+    """
+    Returns the voxel array of a frame, decoding it if it is not cached. If the frame is being
+    prefetched, this waits for the background decode instead of starting another one.
+    :param index: index of the frame within the sequence
+    """
+    array = self.cache.get(index)
+    if array is not None:
+      with self._pendingLock:
+        self.hits += 1
+      return array
+
+    startTime = time.perf_counter()
+    with self._pendingLock:
+      self.misses += 1
+      future = self._pending.get(index)
+    if future is not None:
+      array = future.result()
+    else:
+      array = self._decode(index)
+    with self._pendingLock:
+      self.stallTime += time.perf_counter() - startTime
+    return array
+
+  def updateProxyNode(self, proxyNode, index):
+    """
+    Replaces the placeholder image data of the sequence proxy node with the decoded frame, then
+    starts decoding the frames that follow in the playback direction.
+    :param proxyNode: proxy volume node of the sequence browser
+    :param index: index of the selected frame
+    """
+    FrameSource.updateProxyNode(self, proxyNode, index)
+    self.prefetch(index)
+
+  def setPlaybackRate(self, fps):
+    """
+    Adapts the number of frames decoded ahead to the playback speed.
+    :param fps: playback speed in frames per second
+    """
+    self.prefetchDepth = min(max(math.ceil(fps * self.PREFETCH_SECONDS), self.MIN_PREFETCH_DEPTH),
+                             self.MAX_PREFETCH_DEPTH)
+
+  def prefetch(self, index):
+    """
+    Queues the decoding of the next frames after `index`, in the current playback direction.
+    Playback loops, so frames past the end wrap around to the start of the sequence.
+    :param index: index of the displayed frame
+    """
+    if self._lastIndex is not None and index != self._lastIndex:
+      self._direction = 1 if (index - self._lastIndex) % len(self.paths) <= len(self.paths) // 2 else -1
+    self._lastIndex = index
+
+    # Never prefetch more frames than half of the cache can hold, or they would evict each other
+    frameBytes = max(self.cache.currentBytes // max(len(self.cache), 1), 1)
+    depth = min(self.prefetchDepth, len(self.paths) - 1, max(self.cache.maxBytes // (2 * frameBytes), 1))
+
+    for step in range(1, depth + 1):
+      nextIndex = (index + step * self._direction) % len(self.paths)
+      if nextIndex in self.cache:
+        continue
+      with self._pendingLock:
+        if nextIndex not in self._pending:
+          self._pending[nextIndex] = self._executor.submit(self._decode, nextIndex)
+
+  def waitForPrefetch(self):
+    """
+    Blocks until the frames queued for prefetching have been decoded.
+    """
+    with self._pendingLock:
+      futures = list(self._pending.values())
+    concurrent.futures.wait(futures)
+
+  def _decode(self, index):
+    """
+    Decodes a frame and adds it to the cache. Runs on the main thread or on a prefetch thread.
+    """
+    try:
+      array, _ = self._decodeFile(self.paths[index])
+      self.cache.put(index, array)
+      return array
+    finally:
+      with self._pendingLock:
+        self._pending.pop(index, None)
+
+  def resetStatistics(self):
+    # The statistics are updated by getFrame, which may be called from several threads
+    with self._pendingLock:
+      self.hits = 0
+      self.misses = 0
+      self.stallTime = 0.0
+
+  def getStatistics(self):
+    """
+    Returns the prefetch hits and misses and the total time (in seconds) spent waiting for frames
+    to be decoded since the statistics were last reset.
+    """
+    with self._pendingLock:
+      return {
+        "hits": self.hits,
+        "misses": self.misses,
+        "stallTime": self.stallTime,
+        "prefetchDepth": self.prefetchDepth,
+      }
+
+  def close(self):
+    """
+    Stops the prefetch threads. Queued decodes are cancelled.
+    """
+    with self._pendingLock:
+      for future in self._pending.values():
+        future.cancel()
+      self._pending.clear()
+    self._executor.shutdown(wait=False)
+
+class MultiFrameSource(FrameSource):
+  """
+  Frame source for a cine acquisition stored in one multi-frame file (4D NRRD, multi-frame DICOM,
+  cine MHA, ...). The file is decoded once, and every frame is a view into that buffer.
+  """
+
+  def __init__(self, path, frames):
+    """
+    :param path: path to the multi-frame file
+    :param frames: (N, k, j, i) array holding all the frames
+    """
+    FrameSource.__init__(self)
+    self.path = path
+    self.frames = frames
+
+  def getNumberOfFrames(self):
+    return self.frames.shape[0]
+
+  def getFrame(self, index):
+    return self.frames[index]
+
+# Losslessly compressed voxels of a frame, with the shape and type needed to restore them
+CompressedFrame = collections.namedtuple("CompressedFrame", ["data", "shape", "dtype"])
+
+def compressFrame(array, level=1):
+  """
+  Compresses the voxels of a frame with zlib. Cine frames are mostly dark background, so even the
+  fastest compression level shrinks them several-fold. zlib releases the GIL, so this can be
+  called from worker threads.
+  :param array: voxel array of the frame
+  :param level: zlib compression level, 1 being the fastest
+  """
+  array = np.ascontiguousarray(array)
+  return CompressedFrame(zlib.compress(array.tobytes(), level), array.shape, array.dtype)
+
+def decompressFrame(compressedFrame):
+  """
+  Restores the voxel array of a frame compressed by compressFrame.
+  """
+  data = bytearray(zlib.decompress(compressedFrame.data))
+  return np.frombuffer(data, dtype=compressedFrame.dtype).reshape(compressedFrame.shape)
+
+class CompressedFrameSource(FrameSource):
+  """
+  Frame source keeping every cine frame losslessly compressed in memory. The frames decompressed
+  within a small window around the displayed frame are kept, so that stepping back and forth does
+  not decompress them again. While a frame is displayed, the next frames of the window in the
+  current playback direction are decompressed on a background thread, so that playback finds them
+  ready.
+  """
+
+  # Number of frames on each side of the displayed frame kept decompressed
+  HOT_WINDOW = 8
+
+  def __init__(self, numberOfFrames, numWorkers=1):
+    """
+    :param numberOfFrames: number of frames in the sequence
+    :param numWorkers: number of threads decompressing frames ahead of playback
+    """
+    FrameSource.__init__(self)
+    self.compressedFrames = [None] * numberOfFrames
+    self._hotFrames = {}  # frame index -> decompressed voxel array
+    self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=numWorkers)
+    self._pending = {}  # frame index -> future decompressing it
+    self._lock = threading.Lock()
+    self._lastIndex = None
+    self._direction = 1
+    self.resetStatistics()
+
+  def getNumberOfFrames(self):
+    return len(self.compressedFrames)
+
+  def setFrame(self, index, compressedFrame):
+    """
+    :param index: index of the frame within the sequence
+    :param compressedFrame: frame compressed by compressFrame
+    """
+    self.compressedFrames[index] = compressedFrame
+
+  def getFrame(self, index):
+    """
+    Returns the voxel array of a frame, decompressing it if it is not in the window. If the frame is
+    being prefetched, this waits for the background decompression instead of starting another one.
+    :param index: index of the frame within the sequence
+    """
+    with self._lock:
+      array = self._hotFrames.get(index)
+      future = self._pending.get(index)
+    if array is not None:
+      self.hits += 1
+      return array
+    self.misses += 1
+    startTime = time.perf_counter()
+    array = future.result() if future is not None else self._decompress(index)
+    self.stallTime += time.perf_counter() - startTime
+    return array
+
+  def updateProxyNode(self, proxyNode, index):
+    """
+    Replaces the placeholder image data of the sequence proxy node with the decompressed frame,
+    releases the decompressed frames outside of the window around it, and starts decompressing the
+    frames of the window that follow in the playback direction.
+    :param proxyNode: proxy volume node of the sequence browser
+    :param index: index of the selected frame
+    """
+    array = self.getFrame(index)
+    with self._lock:
+      self._hotFrames[index] = array
+    FrameSource.updateProxyNode(self, proxyNode, index)
+    with self._lock:
+      for hotIndex in list(self._hotFrames):
+        if self._distance(hotIndex, index) > self.HOT_WINDOW:
+          del self._hotFrames[hotIndex]
+    self.prefetch(index)
+
+  def _distance(self, index, otherIndex):
+    # Playback loops, so the first frames are close to the last ones
+    distance = abs(index - otherIndex)
+    return min(distance, len(self.compressedFrames) - distance)
+
+  def prefetch(self, index):
+    """
+    Queues the decompression of the frames of the window after `index`, in the current playback
+    direction. Playback loops, so frames past the end wrap around to the start of the sequence.
+    :param index: index of the displayed frame
+    """
+    numberOfFrames = len(self.compressedFrames)
+    if self._lastIndex is not None and index != self._lastIndex:
+      self._direction = 1 if (index - self._lastIndex) % numberOfFrames <= numberOfFrames // 2 else -1
+    self._lastIndex = index
+
+    with self._lock:
+      for step in range(1, min(self.HOT_WINDOW, numberOfFrames - 1) + 1):
+        nextIndex = (index + step * self._direction) % numberOfFrames
+        if nextIndex in self._hotFrames or nextIndex in self._pending or self.compressedFrames[nextIndex] is None:
+          continue
+        self._pending[nextIndex] = self._executor.submit(self._decompress, nextIndex)
+
+  def waitForPrefetch(self):
+    """
+    Blocks until the frames queued for prefetching have been decompressed.
+    """
+    with self._lock:
+      futures = list(self._pending.values())
+    concurrent.futures.wait(futures)
+
+  def _decompress(self, index):
+    """
+    Decompresses a frame. Runs on the main thread, or on the prefetch thread, which keeps the frame
+    in the window. zlib releases the GIL, so both can run at once.
+    """
+    try:
+      startTime = time.perf_counter()
+      array = decompressFrame(self.compressedFrames[index])
+      with self._lock:
+        self.decompressTime += time.perf_counter() - startTime
+        self.decompressions += 1
+        if index in self._pending:
+          self._hotFrames[index] = array
+      return array
+    finally:
+      with self._lock:
+        self._pending.pop(index, None)
+
+  def getCompressedBytes(self):
+    return sum(len(compressedFrame.data) for compressedFrame in self.compressedFrames if compressedFrame)
+
+  def getUncompressedBytes(self):
+    return sum(int(np.prod(compressedFrame.shape)) * np.dtype(compressedFrame.dtype).itemsize
+               for compressedFrame in self.compressedFrames if compressedFrame)
+
+  def resetStatistics(self):
+    self.decompressions = 0
+    self.decompressTime = 0.0
+    self.hits = 0
+    self.misses = 0
+    self.stallTime = 0.0
+
+  def getStatistics(self):
+    """
+    Returns the number of frames decompressed and the total time (in seconds) spent decompressing
+    them since the statistics were last reset, the frames found already decompressed (hits) or not
+    (misses) when displayed and the total time (in seconds) spent waiting for the latter, along with
+    the memory taken by the compressed frames.
+    """
+    return {
+      "decompressions": self.decompressions,
+      "decompressTime": self.decompressTime,
+      "hits": self.hits,
+      "misses": self.misses,
+      "stallTime": self.stallTime,
+      "compressedBytes": self.getCompressedBytes(),
+      "uncompressedBytes": self.getUncompressedBytes(),
+    }
+
+  def close(self):
+    """
+    Stops the prefetch thread. Queued decompressions are cancelled.
+    """
+    with self._lock:
+      for future in self._pending.values():
+        future.cancel()
+    self._executor.shutdown(wait=False)
+
+class MemmapFrameSource(FrameSource):
+  """
+  Frame source backed by one contiguous (N, slices, rows, columns) memory-mapped file on local
+  disk, with the geometry of every frame kept alongside in an (N, 4, 4) array. Frames are read by
+  slicing the map without copying, and the operating system pages them in from disk as needed,
+  so sessions larger than the available memory can be played back.
+  """
+
+  def __init__(self, directory, numberOfFrames, frameShape, dtype):
+    """
+    :param directory: local directory holding the memory-mapped file
+    :param numberOfFrames: number of frames in the stack
+    :param frameShape: shape of a single frame (k, j, i ordering)
+    :param dtype: voxel type shared by all frames
+    """
+    FrameSource.__init__(self)
+    os.makedirs(directory, exist_ok=True)
+    fileDescriptor, self.filePath = tempfile.mkstemp(prefix="TrackFrames", suffix=".raw", dir=directory)
+    os.close(fileDescriptor)
+    self.frames = np.memmap(self.filePath, dtype=dtype, mode="w+", shape=(numberOfFrames,) + tuple(frameShape))
+    self.ijkToRASMatrices = np.tile(np.eye(4), (numberOfFrames, 1, 1))
+
+  def getNumberOfFrames(self):
+    return self.frames.shape[0]
+
+  def setFrame(self, index, array, ijkToRAS):
+    """
+    Copies a decoded frame into the stack.
+    :param index: index of the frame within the sequence
+    :param array: voxel array of the frame, which must match the shape and type of the stack
+    :param ijkToRAS: 4x4 IJK to RAS matrix of the frame
+    """
+    self.frames[index] = array
+    self.ijkToRASMatrices[index] = ijkToRAS
+
+  def getFrame(self, index):
+    return self.frames[index]
+
+  def close(self):
+    """
+    Releases the frame stack and deletes its file. The map is closed once no image data references
+    its frames any more. A file that cannot be deleted yet, because the map is still open (Windows
+    does not delete mapped files), is deleted by removePendingFrameStackFiles.
+    """
+    if self.frames is None:
+      return
+    mapping = self.frames._mmap
+    self.frames = None
+    if mapping is not None:
+      try:
+        mapping.close()
+      except BufferError:
+        # Image data still references frames, which keeps the map open until it is released
+        pass
+    _pendingFrameStackFiles.add(self.filePath)
+    removePendingFrameStackFiles()
+
+# Files of closed frame stacks that could not be deleted yet
+_pendingFrameStackFiles = set()
+
+def removePendingFrameStackFiles():
+  """
+  Deletes the files of closed frame stacks, once their maps are released. Called when a frame stack
+  is closed, and again when the scene or the application is closed.
+  :return: number of files that still could not be deleted
+  """
+  for filePath in list(_pendingFrameStackFiles):
+    try:
+      if os.path.exists(filePath):
+        os.remove(filePath)
+      _pendingFrameStackFiles.discard(filePath)
+    except OSError:
+      pass
+  return len(_pendingFrameStackFiles)
@@ -1,3 +1,5 @@
+import time
+
 import qt
 import slicer
 from slicer.ScriptedLoadableModule import *
@@ -21,6 +23,7 @@ class Slider(qt.QSlider):
     def mouseMoveEvent(self, event):
     # Reimplements the default scrolling functionality of QSlider
         self.setValue(qt.QStyle.sliderValueFromPosition(self.minimum, self.maximum, event.pos().x(), self.width))
+        self.sliderMoved.emit(self.value) # Lets listeners follow the slider while it is dragged
         event.accept()
     
     def mouseReleaseEvent(self, event):
@@ -41,4 +44,122 @@ class SpinBox(qt.QSpinBox):
         if steps > 0:
             self.upButtonClicked.emit() # emit upButtonClicked if value on QSpinBox increased
         elif steps < 0:
-            self.downButtonClicked.emit() # emit downButtonClicked if value on QSpinBox decreased
\ No newline at end of file
+            self.downButtonClicked.emit() # emit downButtonClicked if value on QSpinBox decreased
+
+class ProgressReporter():
+    """
+    Reports the progress of a long operation in a progress dialog. The dialog is updated at most
+    once per interval and the views are never forced to render, so that reporting stays cheap
+    however many items are processed. The dialog label shows the throughput and the estimated time
+    remaining.
+    """
+    def __init__(self, progressDialog, labelText, itemName="frames", intervalMs=100):
+        """
+        :param progressDialog: progress dialog to update, whose maximum is the number of items
+        :param labelText: description of the operation shown above the statistics
+        :param itemName: name of the processed items, shown in the statistics
+        :param intervalMs: minimum time between two updates of the dialog, in milliseconds
+        """
+        self.progressDialog = progressDialog
+        self.labelText = labelText
+        self.itemName = itemName
+        self.interval = intervalMs / 1000.0
+        self.startTime = time.perf_counter()
+        self.lastUpdateTime = None
+        self.numberOfBytes = 0
+        self.numberOfUpdates = 0
+
+    @property
+    def wasCanceled(self):
+        return self.progressDialog.wasCanceled
+
+    def update(self, count, numberOfBytes=0):
+        """
+        Records the progress of the operation. The dialog is only updated if the interval has passed
+        since its last update, or once all the items were processed.
+        :param count: number of items processed so far
+        :param numberOfBytes: number of bytes processed since the last call, used for the MB/s rate
+        """
+        self.numberOfBytes += numberOfBytes
+        now = time.perf_counter()
+        if count < self.progressDialog.maximum and self.lastUpdateTime is not None \
+           and now - self.lastUpdateTime < self.interval:
+            return
+        self.lastUpdateTime = now
+        self.numberOfUpdates += 1
+        self.progressDialog.setLabelText(self.getStatusText(count, now - self.startTime))
+        self.progressDialog.setValue(count)
+        # Lets the dialog repaint and the 'Cancel' button be pressed
+        slicer.app.processEvents()
+
+    def getStatusText(self, count, elapsedTime):
+        """
+        Returns the label text showing the number of processed items, the throughput and the
+        estimated time remaining.
+        :param count: number of items processed so far
+        :param elapsedTime: time since the operation started, in seconds
+        """
+        total = self.progressDialog.maximum
+        text = f"{self.labelText}\n{count} of {total} {self.itemName}"
+        if count == 0 or elapsedTime <= 0:
+            return text
+        rate = count / elapsedTime
+        text += f", {rate:.1f} {self.itemName}/s"
+        if self.numberOfBytes > 0:
+            text += f", {self.numberOfBytes / elapsedTime / 1e6:.1f} MB/s"
+        if count < total:
+            remaining = int(round((total - count) / rate))
+            text += f", {remaining // 60}:{remaining % 60:02d} remaining"
+        return text
+
+class RenderScheduler():
+    """
+    Collects the views changed while a frame is shown, and renders each of them once when the frame
+    update is complete, however many times it was changed. Views that did not change are not
+    rendered. The number of renders and the time spent rendering are recorded per frame.
+    """
+    def __init__(self):
+        self._dirtyViews = {}  # slice or 3D view node ID -> view, in the order they were changed
+        self.resetStatistics()
+
+    def requestRender(self, view):
+        """
+        Marks a slice or 3D view as changed, so that it is rendered by the next flush.
+        :param view: qMRMLSliceView or qMRMLThreeDView, None is ignored
+        """
+        if view is None:
+            return
+        self._dirtyViews[view.mrmlAbstractViewNode().GetID()] = view
+
+    def flush(self):
+        """
+        Renders every view changed since the last flush, once, and ends the frame.
+        :return: number of views rendered
+        """
+        views = list(self._dirtyViews.values())
+        self._dirtyViews.clear()
+        startTime = time.perf_counter()
+        for view in views:
+            view.forceRender()
+        self.renderTime += time.perf_counter() - startTime
+        self.numberOfRenders += len(views)
+        self.numberOfFrames += 1
+        return len(views)
+
+    def resetStatistics(self):
+        self.numberOfFrames = 0
+        self.numberOfRenders = 0
+        self.renderTime = 0.0
+
+    def getStatistics(self):
+        """
+        Returns the number of frames shown and views rendered since the statistics were last reset,
+        with the mean number of renders and time spent rendering (in milliseconds) per frame.
+        """
+        frames = max(self.numberOfFrames, 1)
+        return {
+            "frames": self.numberOfFrames,
+            "renders": self.numberOfRenders,
+            "rendersPerFrame": self.numberOfRenders / frames,
+            "renderTimePerFrame": self.renderTime * 1000.0 / frames,
+        }
@@ -0,0 +1,135 @@
+import os, time, collections
+import concurrent.futures
+
+import qt
+
+from utils.FrameDecoding import readFrame, createVolumeNodeFromArray, isImageFile
+
+class LiveFolderWatcher:
+  """
+  Watches a folder receiving cine images during a running session, and appends the new images to
+  an existing image sequence without reloading the earlier frames. Only the most recent frames
+  are kept, so memory stays bounded however long the session runs.
+
+  The folder is polled from the main thread, and new images are decoded on worker threads. An
+  image is only decoded once its size stayed the same between two polls, so that images still
+  being written are not read.
+  """
+
+  def __init__(self, folder, imagesSequenceNode, maxFrames, numWorkers=2, pollIntervalMs=100,
+               onFramesAdded=None):
+    """
+    :param folder: folder receiving the new cine images
+    :param imagesSequenceNode: sequence node the new images are appended to
+    :param maxFrames: number of most recent frames kept in the sequence
+    :param numWorkers: number of threads decoding new images
+    :param pollIntervalMs: time between two scans of the folder, in milliseconds
+    :param onFramesAdded: function called after each poll that appended frames, with the paths of the
+    images appended and the number of oldest frames dropped from the sequence
+    """
+    self.folder = folder
+    self.imagesSequenceNode = imagesSequenceNode
+    self.maxFrames = maxFrames
+    self.onFramesAdded = onFramesAdded
+
+    # The images already in the folder were loaded with the sequence
+    self._knownFiles = set(os.listdir(folder))
+    self._fileSizes = {}  # file name -> (size at the last poll, time it was first seen)
+    self._decoding = collections.deque()  # (file name, time first seen, future), in file name order
+    self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=numWorkers)
+
+    numberOfDataNodes = imagesSequenceNode.GetNumberOfDataNodes()
+    self.nextIndexValue = 0
+    if numberOfDataNodes > 0:
+      self.nextIndexValue = int(float(imagesSequenceNode.GetNthIndexValue(numberOfDataNodes - 1))) + 1
+
+    self.resetStatistics()
+    self.timer = qt.QTimer()
+    self.timer.setInterval(pollIntervalMs)
+    self.timer.timeout.connect(self.poll)
+
+  def start(self):
+    self.timer.start()
+
+  def stop(self):
+    """
+    Stops watching the folder. Images queued for decoding are dropped.
+    """
+    self.timer.stop()
+    for _, _, future in self._decoding:
+      future.cancel()
+    self._decoding.clear()
+    self._executor.shutdown(wait=False)
+
+  def poll(self):
+    """
+    Queues the decoding of the images that finished being written since the last poll, and appends
+    the decoded images to the sequence in file name order.
+    """
+    newFiles = []
+    try:
+      with os.scandir(self.folder) as entries:
+        for entry in entries:
+          if entry.name in self._knownFiles or not isImageFile(entry.path):
+            continue
+          size = entry.stat().st_size
+          previousSize, firstSeen = self._fileSizes.get(entry.name, (None, time.perf_counter()))
+          if size > 0 and size == previousSize:
+            del self._fileSizes[entry.name]
+            self._knownFiles.add(entry.name)
+            newFiles.append((entry.name, firstSeen))
+          else:
+            self._fileSizes[entry.name] = (size, firstSeen)
+    except OSError as e:
+      print(f"Could not scan {self.folder}: {e}")
+
+    for fileName, firstSeen in sorted(newFiles):
+      future = self._executor.submit(readFrame, os.path.join(self.folder, fileName))
+      self._decoding.append((fileName, firstSeen, future))
+
+    addedPaths = []
+    framesDropped = self.framesDropped
+    while self._decoding and self._decoding[0][2].done():
+      fileName, firstSeen, future = self._decoding.popleft()
+      try:
+        array, ijkToRAS = future.result()
+      except Exception as e:
+        print(f"{fileName} failed to load: {e}")
+        continue
+      self.appendFrame(fileName, array, ijkToRAS)
+      self.latencies.append(time.perf_counter() - firstSeen)
+      addedPaths.append(os.path.join(self.folder, fileName))
+
+    if addedPaths and self.onFramesAdded is not None:
+      self.onFramesAdded(addedPaths, self.framesDropped - framesDropped)
+
+  def appendFrame(self, fileName, array, ijkToRAS):
+    """
+    Appends a decoded image to the sequence, removing the oldest frames beyond the frame limit.
+    """
+    nodeName = f"Image {self.nextIndexValue + 1} ({fileName})"
+    self.imagesSequenceNode.SetDataNodeAtValue(createVolumeNodeFromArray(array, ijkToRAS, nodeName),
+                                               str(self.nextIndexValue))
+    self.nextIndexValue += 1
+    self.framesAdded += 1
+
+    while self.imagesSequenceNode.GetNumberOfDataNodes() > self.maxFrames:
+      self.imagesSequenceNode.RemoveDataNodeAtValue(self.imagesSequenceNode.GetNthIndexValue(0))
+      self.framesDropped += 1
+
+  def resetStatistics(self):
+    self.framesAdded = 0
+    self.framesDropped = 0
+    self.latencies = collections.deque(maxlen=100)
+
+  def getStatistics(self):
+    """
+    Returns the number of frames appended and dropped from the ring since the statistics were last
+    reset, and the mean time (in seconds) from an image appearing in the folder to it being in the
+    sequence, over the last 100 images.
+    """
+    return {
+      "framesAdded": self.framesAdded,
+      "framesDropped": self.framesDropped,
+      "meanLatency": sum(self.latencies) / len(self.latencies) if self.latencies else None,
+    }
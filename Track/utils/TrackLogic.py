@@ -3,9 +3,22 @@ import slicer
 from slicer.ScriptedLoadableModule import *
 import qt, vtk, ctk
 
-import os, csv, re
-import SimpleITK as sitk
-import sitkUtils
+import os, re, time, tracemalloc, zipfile
+import numpy as np
+
+from utils.FrameDecoding import defaultWorkerCount, decodeFramesInOrder, createVolumeNodeFromArray, \
+                                readFrameGeometry, createPlaceholderVolumeNode, readNumberOfFrames, \
+                                readMultiFrameFile, readFrame, groupFramesByGeometry, isImageFile, \
+                                sliceOrientationFromGeometry
+from utils.FrameSources import LazyFrameSource, MemmapFrameSource, MultiFrameSource, DiskFrameCache, ProxyFrames, \
+                               CompressedFrameSource, compressFrame, decompressFrame, removePendingFrameStackFiles
+from utils.DicomIndex import indexDicomFiles, groupDicomSeries
+from utils.LiveIngest import LiveFolderWatcher
+from utils.Helper import ProgressReporter, RenderScheduler
+from utils.TransformsData import TransformsTableCache, readTransformsTable, readSpreadsheetTable, \
+                                 matricesFromTable, transformsToMatrices, lpsToRasMatrices, resampleTransforms, \
+                                 validateTransformsTable
+from utils.TransformArray import TransformArray
 
 class TrackLogic(ScriptedLoadableModuleLogic):
   """This class should implement all the actual
@@ -32,6 +45,44 @@ class TrackLogic(ScriptedLoadableModuleLogic):
       "Green": self.greenBackground,
       "Yellow": self.yellowBackground
     }
+    # Fills in the frames of an image sequence that was not fully decoded while loading
+    self.frameSource = None
+    # Persistent cache of decoded cine images, created once it is enabled
+    self.diskFrameCache = None
+    # Appends the cine images written to a folder during a live session
+    self.folderWatcher = None
+    # Volume node showing the loaded frames while the rest of the sequence loads
+    self.loadingPreviewNode = None
+    self.loadingStatistics = {"timeToFirstFrame": None, "loadingTime": None}
+    self._onFramesLoaded = None
+    # Downsampled frames shown instead of the full resolution ones while lowResolution is set
+    self.proxyFrames = None
+    # Downsampled frames built by the loaders while a sequence loads
+    self._loadingProxyFrames = None
+    self.lowResolution = False
+    # Parsed transforms files, shared by the column selectors and the validation
+    self.transformsTableCache = TransformsTableCache()
+    self.useTransformsSidecar = False
+    # Problems found by the last validation of a transforms file
+    self.transformsValidationReport = None
+    # Transforms of the frames shown through a single transform node, for array-backed transforms
+    self.transformArray = None
+    # Inputs, display settings and slice view visualize configured, which visualizeFrame relies on
+    self.visualizationState = None
+    self.frameUpdateCounts = {"full": 0, "fast": 0}
+    self._directionMatrix = vtk.vtkMatrix4x4()
+    # Frame geometry (dimensions and axis directions) -> orientation of the slice view showing the frame
+    self.sliceOrientations = {}
+    # Set when the color, opacity or thickness of the label map changed, see markDisplayDirty
+    self.displayDirty = True
+    self._displayState = None
+    self.displayRefreshCount = 0
+    # Views changed while showing a frame, each rendered once when the frame is complete
+    self.renderScheduler = RenderScheduler()
+    # Array-backed transform node and matrix version last shown, see _updateTransformNode
+    self._shownTransform = None
+    # ID of the last loaded image sequence and the files of its frames, in frame order
+    self.frameFiles = (None, [])
 
   def setDefaultParameters(self, customParameterNode):
     """
@@ -43,26 +94,73 @@ class TrackLogic(ScriptedLoadableModuleLogic):
     customParameterNode.overlayAsOutline = True
     customParameterNode.overlayColor = [0, 0.7, 0]
 
-  def loadImagesIntoSequenceNode(self, shNode, paths):
+  def loadImagesIntoSequenceNode(self, shNode, paths, numWorkers=1, frameStorage="memory", cacheSizeMB=1024,
+                                 diskCacheSizeMB=0, onFramesLoaded=None, proxyDownsampleFactor=1):
     """
     Loads the cine images located in the provided paths into 3D Slicer. They are
     placed within a sequence node and the loaded image nodes are deleted thereafter.
     :param shNode: node representing the subject hierarchy
-    :param paths: list of paths to the 2D images to be imported
+    :param paths: list of paths to the 2D images to be imported. A single multi-frame file (3D or
+    4D image whose last axis is time) is split into one image per frame
+    :param numWorkers: number of threads decoding images concurrently. 1 loads the images one at a
+    time through slicer.util.loadVolume (unless the disk cache is enabled), 0 picks a worker count
+    based on the number of CPU cores
+    :param frameStorage: "memory" decodes every image while loading, "lazy" only reads the image
+    headers and decodes each image when it is displayed, "memmap" decodes every image into one
+    memory-mapped file on local disk that is paged in as frames are displayed, "compressed" keeps
+    every decoded image losslessly compressed in memory and decompresses it when it is displayed
+    :param cacheSizeMB: memory budget of the decoded frame cache used by the "lazy" storage
+    :param diskCacheSizeMB: size cap of the on-disk cache of decoded images, 0 disables the cache
+    :param onFramesLoaded: function called with the sequence node and the number of frames loaded so
+    far each time a frame is added, so that the first frames can be shown while the rest loads
+    :param proxyDownsampleFactor: downsampling factor of the copies of the frames shown while
+    scrubbing or playing quickly, 1 or less builds no copies. Each copy is built from the frame just
+    decoded, so frames decoded on demand ("lazy" storage) get none
     """
+    startTime = time.perf_counter()
+    self.loadingStatistics = {"timeToFirstFrame": None, "loadingTime": None}
+    self._loadingStartTime = startTime
+    self._onFramesLoaded = onFramesLoaded
+
     # NOTE: This represents a node within the MRML scene, not within the subject hierarchy
     imagesSequenceNode = None
 
     # Find all the image file names within the provided paths
     imageFiles = []
     # Only accept valid file formats
-    fileFormats = ['.*\.mha', '.*\.dcm', '.*\.nrrd', '.*\.nii', '.*\.hdr','.*\.nhdr', '.*\.mhd']  
     for path in paths:
-      validFormat = any(re.match(format, path) for format in fileFormats)
-      if validFormat:
+      if isImageFile(path):
         imageFiles.append(path)
     imageFiles.sort()
 
+    # DICOM frames are ordered by acquisition time or instance number rather than by file name
+    if len(imageFiles) > 1 and all(path.lower().endswith(".dcm") for path in imageFiles):
+      orderedFiles = [path for series in self.getDicomSeries(imageFiles) for path in series["files"]]
+      # Files that cannot be read as DICOM are kept at the end, where the header pre-scan reports them
+      orderedFileSet = set(orderedFiles)
+      imageFiles = orderedFiles + [path for path in imageFiles if path not in orderedFileSet]
+
+    if numWorkers == 0:
+      numWorkers = defaultWorkerCount()
+
+    # A previous frame source or live folder watcher belongs to the sequence being replaced
+    self.stopWatchingFolder()
+    self.proxyFrames = None
+    self.closeFrameSource()
+    self._loadingProxyFrames = ProxyFrames(proxyDownsampleFactor) if proxyDownsampleFactor > 1 else None
+
+    decode = readFrame
+    if diskCacheSizeMB > 0:
+      decode = self.getDiskFrameCache(diskCacheSizeMB).readFrame
+
+    # A single file may hold the whole cine acquisition
+    numberOfFrames = len(imageFiles)
+    if len(imageFiles) == 1:
+      try:
+        numberOfFrames = readNumberOfFrames(imageFiles[0])
+      except Exception as e:
+        print(e)
+
     # We only want to create a sequence node if image files were found within the provided paths
     if len(imageFiles) != 0:
       imagesSequenceNode = slicer.mrmlScene.AddNewNodeByClass("vtkMRMLSequenceNode",
@@ -70,35 +168,60 @@ class TrackLogic(ScriptedLoadableModuleLogic):
 
       # Create a progress/loading bar to display the progress of the images loading process
       progressDialog = qt.QProgressDialog("Loading cine images", "Cancel",
-                                          0, len(imageFiles))
+                                          0, numberOfFrames)
       progressDialog.minimumDuration = 0
 
-      for fileIndex in range(len(imageFiles)):
-        # If the 'Cancel' button was pressed, we want to return to a default state
-        if progressDialog.wasCanceled:
-          # Remove sequence node
+      # Check the geometry of every image from its header before decoding any pixels
+      ijkToRASMatrices = None
+      if len(imageFiles) > 1:
+        imageFiles, ijkToRASMatrices = self.scanImageGeometries(imageFiles, progressDialog)
+        if imageFiles is None:
           slicer.mrmlScene.RemoveNode(imagesSequenceNode)
           return None, True
+        numberOfFrames = len(imageFiles)
+        progressDialog.setMaximum(numberOfFrames)
+
+      # The sequence node fires a single modified event once all the frames are in place, rather
+      # than one per frame
+      wasModifying = imagesSequenceNode.StartModify()
+      try:
+        if numberOfFrames > len(imageFiles):
+          cancelled = self.loadMultiFrameFile(imagesSequenceNode, imageFiles[0], progressDialog)
+        elif frameStorage == "lazy":
+          cancelled = self.loadImagesLazily(imagesSequenceNode, imageFiles, cacheSizeMB, progressDialog, decode,
+                                            ijkToRASMatrices)
+        elif frameStorage == "memmap":
+          cancelled = self.loadImagesIntoFrameStack(imagesSequenceNode, imageFiles, numWorkers, progressDialog,
+                                                    decode)
+        elif frameStorage == "compressed":
+          cancelled = self.loadImagesCompressed(imagesSequenceNode, imageFiles, numWorkers, progressDialog, decode)
+        elif numWorkers > 1 or decode is not readFrame:
+          cancelled = self.loadImagesInParallel(imagesSequenceNode, imageFiles, numWorkers, progressDialog, decode)
+        else:
+          cancelled = self.loadImagesSerially(shNode, imagesSequenceNode, imageFiles, progressDialog)
+      finally:
+        imagesSequenceNode.EndModify(wasModifying)
 
-        filepath = imageFiles[fileIndex]
-        nodeName = (f"Image {fileIndex + 1} ({os.path.basename(filepath)})")
-
-        loadedImageNode = slicer.util.loadVolume(filepath, {"singleFile": True, "show": False})
-        loadedImageNode.SetName(nodeName)
-        # Place image node into sequence
-        imagesSequenceNode.SetDataNodeAtValue(loadedImageNode, str(fileIndex))
-        # Remove loaded image node
-        imageID = shNode.GetItemByDataNode(loadedImageNode)
-        shNode.RemoveItem(imageID)
-
-        #  Update how far we are in the progress bar
-        progressDialog.setValue(fileIndex + 1)
+      self._onFramesLoaded = None
+      proxyFrames = self._loadingProxyFrames
+      self._loadingProxyFrames = None
 
-        # This render step is needed for the progress bar to visually update in the GUI
-        slicer.util.forceRenderAllViews()
-        slicer.app.processEvents()
-
-      print(f"{len(imageFiles)} cine images were loaded into 3D Slicer")
+      # If the 'Cancel' button was pressed, we want to return to a default state
+      if cancelled:
+        self.closeFrameSource()
+        # Remove sequence node
+        slicer.mrmlScene.RemoveNode(imagesSequenceNode)
+        return None, True
+
+      self.loadingStatistics["loadingTime"] = time.perf_counter() - startTime
+      if proxyFrames is not None and proxyFrames.frames:
+        proxyFrames.sequenceNodeID = imagesSequenceNode.GetID()
+        self.proxyFrames = proxyFrames
+      # A multi-frame file has no file per frame
+      self.frameFiles = (imagesSequenceNode.GetID(), imageFiles if numberOfFrames == len(imageFiles) else [])
+      print(f"{numberOfFrames} cine images were loaded into 3D Slicer in "
+            f"{self.loadingStatistics['loadingTime']:.2f} s, the first one after "
+            f"{self.loadingStatistics['timeToFirstFrame']:.2f} s")
 
       # We do the following to clear the view of the slices. I expected {"show": False} to
       # prevent anything from being shown at all, but the first loaded image will appear in the
@@ -107,30 +230,665 @@ class TrackLogic(ScriptedLoadableModuleLogic):
 
     return imagesSequenceNode, False
 
+  def reportFramesLoaded(self, imagesSequenceNode, numberOfFramesLoaded):
+    """
+    Called by the loaders each time a frame was added to the sequence node. Records the time to
+    the first frame and lets the caller of loadImagesIntoSequenceNode show the loaded frames.
+    :param imagesSequenceNode: sequence node receiving the images
+    :param numberOfFramesLoaded: number of frames in the sequence node so far
+    """
+    if numberOfFramesLoaded == 1:
+      self.loadingStatistics["timeToFirstFrame"] = time.perf_counter() - self._loadingStartTime
+    if self._onFramesLoaded is not None:
+      self._onFramesLoaded(imagesSequenceNode, numberOfFramesLoaded)
+
+  def addLoadedProxyFrame(self, frameIndex, array):
+    """
+    Called by the loaders with each frame they just decoded, so that its downsampled copy is built
+    while the frame is still in memory rather than by decoding it again afterwards.
+    """
+    if self._loadingProxyFrames is not None:
+      self._loadingProxyFrames.addFrame(frameIndex, array)
+
+  def getLoadingStatistics(self):
+    """
+    Returns the time (in seconds) until the first cine image of the last loaded sequence could be
+    shown, and the time taken to load all of them.
+    """
+    return self.loadingStatistics
+
+  def showLoadingPreview(self, imagesSequenceNode, index):
+    """
+    Shows a frame of a sequence that is still loading in the slice view matching its orientation.
+    The sequence browser only exists once loading completes, so the frame is shown through a
+    preview volume node that removeLoadingPreview deletes.
+    :param imagesSequenceNode: sequence node receiving the images
+    :param index: index of a frame that was already loaded
+    """
+    dataNode = imagesSequenceNode.GetNthDataNode(index)
+    newPreview = self.loadingPreviewNode is None
+    if newPreview:
+      self.loadingPreviewNode = slicer.mrmlScene.AddNewNodeByClass("vtkMRMLScalarVolumeNode", "Cine Image Preview")
+      self.loadingPreviewNode.CreateDefaultDisplayNodes()
+    self.loadingPreviewNode.CopyOrientation(dataNode)
+    frameSource = self.getFrameSource(imagesSequenceNode)
+    if frameSource is not None:
+      frameSource.updateProxyNode(self.loadingPreviewNode, index)
+    else:
+      self.loadingPreviewNode.SetAndObserveImageData(dataNode.GetImageData())
+    self.loadingPreviewNode.SetName(dataNode.GetName())
+
+    if newPreview:
+      sliceWidget = self.getSliceWidget(slicer.app.layoutManager(), self.loadingPreviewNode)
+      if sliceWidget is not None:
+        sliceWidget.mrmlSliceCompositeNode().SetBackgroundVolumeID(self.loadingPreviewNode.GetID())
+        sliceWidget.fitSliceToBackground()
+
+  def removeLoadingPreview(self):
+    if self.loadingPreviewNode is not None:
+      slicer.mrmlScene.RemoveNode(self.loadingPreviewNode)
+      self.loadingPreviewNode = None
+
+  def scanImageGeometries(self, imageFiles, progressDialog):
+    """
+    Reads only the headers of the cine images, on worker threads, and checks that all the images
+    share the same size, spacing and axis directions. When they do not, the user can choose to load
+    only the largest group of consistent images, so that inconsistent frames are caught in seconds
+    rather than after every image was decoded.
+    :param imageFiles: sorted list of paths to the images
+    :param progressDialog: progress dialog to update and to check for cancellation
+    :return: tuple of the list of images to load and the (N, 4, 4) array of their IJK to RAS
+    matrices, or (None, None) if loading was cancelled or failed
+    """
+    sizes = np.ones((len(imageFiles), 3), dtype=int)
+    ijkToRASMatrices = np.zeros((len(imageFiles), 4, 4))
+
+    progress = ProgressReporter(progressDialog, "Reading cine image headers", "images")
+    geometries = decodeFramesInOrder(imageFiles, defaultWorkerCount(), readFrameGeometry)
+    try:
+      for fileIndex, filepath in enumerate(imageFiles):
+        # If the 'Cancel' button was pressed, we want to return to a default state
+        if progress.wasCanceled:
+          return None, None
+
+        try:
+          sizes[fileIndex], ijkToRASMatrices[fileIndex] = next(geometries)
+        except Exception as e:
+          print(e)
+          slicer.util.warningDisplay(f"{os.path.basename(filepath)} failed to load.", "Failed to Load File")
+          return None, None
+
+        # The value stays below the maximum, which would close the progress dialog
+        progress.update(fileIndex)
+    finally:
+      geometries.close()
+    progressDialog.setLabelText("Loading cine images")
+    progressDialog.setValue(0)
+
+    groups = groupFramesByGeometry(sizes, ijkToRASMatrices)
+    if len(groups) > 1:
+      consistentIndices = groups[0]
+      rejectedFiles = [os.path.basename(imageFiles[index]) for group in groups[1:] for index in group]
+      rejectedList = ", ".join(rejectedFiles[:5]) + (", ..." if len(rejectedFiles) > 5 else "")
+      if not slicer.util.confirmOkCancelDisplay(f"{len(rejectedFiles)} of the {len(imageFiles)} cine images do not "
+                                                "have the same size, spacing or orientation as the others "
+                                                f"({rejectedList}). Click OK to load only the other "
+                                                f"{len(consistentIndices)} images.", "Inconsistent Cine Images"):
+        return None, None
+      imageFiles = [imageFiles[index] for index in consistentIndices]
+      ijkToRASMatrices = ijkToRASMatrices[consistentIndices]
+
+    return imageFiles, ijkToRASMatrices
+
+  def loadImagesSerially(self, shNode, imagesSequenceNode, imageFiles, progressDialog):
+    """
+    Loads the cine images one at a time through slicer.util.loadVolume and places them into the
+    sequence node.
+    :param shNode: node representing the subject hierarchy
+    :param imagesSequenceNode: sequence node receiving the images
+    :param imageFiles: sorted list of paths to the images
+    :param progressDialog: progress dialog to update and to check for cancellation
+    :return: True if loading was cancelled
+    """
+    progress = ProgressReporter(progressDialog, "Loading cine images")
+    # loadVolume adds every image to the scene before it is moved into the sequence. Batch processing
+    # defers the scene and subject hierarchy updates these additions and removals trigger to a single
+    # update at the end.
+    slicer.mrmlScene.StartState(slicer.vtkMRMLScene.BatchProcessState)
+    try:
+      return self._loadImagesSerially(shNode, imagesSequenceNode, imageFiles, progress)
+    finally:
+      slicer.mrmlScene.EndState(slicer.vtkMRMLScene.BatchProcessState)
+
+  def _loadImagesSerially(self, shNode, imagesSequenceNode, imageFiles, progress):
+    for fileIndex in range(len(imageFiles)):
+      if progress.wasCanceled:
+        return True
+
+      filepath = imageFiles[fileIndex]
+      nodeName = (f"Image {fileIndex + 1} ({os.path.basename(filepath)})")
+
+      loadedImageNode = slicer.util.loadVolume(filepath, {"singleFile": True, "show": False})
+      loadedImageNode.SetName(nodeName)
+      # Place image node into sequence
+      imagesSequenceNode.SetDataNodeAtValue(loadedImageNode, str(fileIndex))
+      # Remove loaded image node
+      imageID = shNode.GetItemByDataNode(loadedImageNode)
+      shNode.RemoveItem(imageID)
+      if self._loadingProxyFrames is not None:
+        self.addLoadedProxyFrame(fileIndex, slicer.util.arrayFromVolume(loadedImageNode))
+
+      self.reportFramesLoaded(imagesSequenceNode, fileIndex + 1)
+
+      #  Update how far we are in the progress bar
+      progress.update(fileIndex + 1, loadedImageNode.GetImageData().GetActualMemorySize() * 1024)
+
+    return False
+
+  def loadImagesInParallel(self, imagesSequenceNode, imageFiles, numWorkers, progressDialog, decode=readFrame):
+    """
+    Decodes the cine images on a pool of worker threads and places them into the sequence node in
+    order. Only the insertion into the sequence node happens on the main thread.
+    :param imagesSequenceNode: sequence node receiving the images
+    :param imageFiles: sorted list of paths to the images
+    :param numWorkers: number of decoding threads
+    :param progressDialog: progress dialog to update and to check for cancellation
+    :param decode: function decoding a single path
+    :return: True if loading was cancelled or failed
+    """
+    progress = ProgressReporter(progressDialog, "Loading cine images")
+    frames = decodeFramesInOrder(imageFiles, numWorkers, decode)
+    try:
+      for fileIndex, filepath in enumerate(imageFiles):
+        # If the 'Cancel' button was pressed, we want to return to a default state
+        if progress.wasCanceled:
+          return True
+
+        try:
+          array, ijkToRAS = next(frames)
+        except Exception as e:
+          print(e)
+          slicer.util.warningDisplay(f"{os.path.basename(filepath)} failed to load.", "Failed to Load File")
+          return True
+
+        nodeName = (f"Image {fileIndex + 1} ({os.path.basename(filepath)})")
+        imageNode = createVolumeNodeFromArray(array, ijkToRAS, nodeName)
+        # Place image node into sequence. The node was never added to the scene, so there is no
+        # subject hierarchy item to remove afterwards.
+        imagesSequenceNode.SetDataNodeAtValue(imageNode, str(fileIndex))
+        self.addLoadedProxyFrame(fileIndex, array)
+
+        self.reportFramesLoaded(imagesSequenceNode, fileIndex + 1)
+
+        #  Update how far we are in the progress bar
+        progress.update(fileIndex + 1, array.nbytes)
+    finally:
+      # Cancels the frames that are still queued and waits for the running ones
+      frames.close()
+
+    return False
+
+  def loadImagesLazily(self, imagesSequenceNode, imageFiles, cacheSizeMB, progressDialog, decode=readFrame,
+                       ijkToRASMatrices=None):
+    """
+    Fills the sequence node with placeholder nodes carrying the geometry of each image, read from
+    the image headers only. The pixels are decoded by a LazyFrameSource once a frame is displayed.
+    :param imagesSequenceNode: sequence node receiving the placeholder nodes
+    :param imageFiles: sorted list of paths to the images
+    :param cacheSizeMB: memory budget of the decoded frame cache, in megabytes
+    :param progressDialog: progress dialog to update and to check for cancellation
+    :param decode: function decoding a single path once its frame is displayed
+    :param ijkToRASMatrices: (N, 4, 4) array of the IJK to RAS matrices found by the header pre-scan.
+    The headers are read here if it is not provided
+    :return: True if loading was cancelled or failed
+    """
+    # The frame source is set first, so that the frames can be shown while the rest loads
+    self.frameSource = LazyFrameSource(imageFiles, cacheSizeMB, decode=decode)
+    self.frameSource.sequenceNodeID = imagesSequenceNode.GetID()
+
+    progress = ProgressReporter(progressDialog, "Loading cine images")
+    for fileIndex, filepath in enumerate(imageFiles):
+      # If the 'Cancel' button was pressed, we want to return to a default state
+      if progress.wasCanceled:
+        return True
+
+      if ijkToRASMatrices is not None:
+        ijkToRAS = ijkToRASMatrices[fileIndex]
+      else:
+        try:
+          _, ijkToRAS = readFrameGeometry(filepath)
+        except Exception as e:
+          print(e)
+          slicer.util.warningDisplay(f"{os.path.basename(filepath)} failed to load.", "Failed to Load File")
+          return True
+
+      nodeName = (f"Image {fileIndex + 1} ({os.path.basename(filepath)})")
+      imagesSequenceNode.SetDataNodeAtValue(createPlaceholderVolumeNode(ijkToRAS, nodeName), str(fileIndex))
+
+      self.reportFramesLoaded(imagesSequenceNode, fileIndex + 1)
+
+      #  Update how far we are in the progress bar
+      progress.update(fileIndex + 1)
+
+    return False
+
+  def loadMultiFrameFile(self, imagesSequenceNode, filepath, progressDialog):
+    """
+    Loads a cine acquisition stored in one multi-frame file. The file is opened and decoded once,
+    and each frame is a view into the decoded buffer provided by a MultiFrameSource.
+    :param imagesSequenceNode: sequence node receiving a placeholder node per frame
+    :param filepath: path to the multi-frame file
+    :param progressDialog: progress dialog to update and to check for cancellation
+    :return: True if loading was cancelled or failed
+    """
+    try:
+      frames, ijkToRAS = readMultiFrameFile(filepath)
+    except Exception as e:
+      print(e)
+      slicer.util.warningDisplay(f"{os.path.basename(filepath)} failed to load.", "Failed to Load File")
+      return True
+
+    self.frameSource = MultiFrameSource(filepath, frames)
+    self.frameSource.sequenceNodeID = imagesSequenceNode.GetID()
+
+    progress = ProgressReporter(progressDialog, "Loading cine images")
+    for frameIndex in range(frames.shape[0]):
+      # If the 'Cancel' button was pressed, we want to return to a default state
+      if progress.wasCanceled:
+        return True
+
+      nodeName = (f"Image {frameIndex + 1} ({os.path.basename(filepath)} frame {frameIndex + 1})")
+      imagesSequenceNode.SetDataNodeAtValue(createPlaceholderVolumeNode(ijkToRAS, nodeName), str(frameIndex))
+      self.addLoadedProxyFrame(frameIndex, frames[frameIndex])
+
+      self.reportFramesLoaded(imagesSequenceNode, frameIndex + 1)
+
+      #  Update how far we are in the progress bar
+      progress.update(frameIndex + 1, frames[frameIndex].nbytes)
+
+    return False
+
+  def loadImagesIntoFrameStack(self, imagesSequenceNode, imageFiles, numWorkers, progressDialog, decode=readFrame):
+    """
+    Decodes the cine images into a single contiguous memory-mapped frame stack on local disk. The
+    sequence node receives placeholder nodes carrying the geometry of each image, and frames are
+    read from the stack without copying once they are displayed.
+    :param imagesSequenceNode: sequence node receiving the placeholder nodes
+    :param imageFiles: sorted list of paths to the images
+    :param numWorkers: number of decoding threads
+    :param progressDialog: progress dialog to update and to check for cancellation
+    :param decode: function decoding a single path
+    :return: True if loading was cancelled or failed
+    """
+    frameStack = None
+    progress = ProgressReporter(progressDialog, "Loading cine images")
+    frames = decodeFramesInOrder(imageFiles, max(numWorkers, 1), decode)
+    try:
+      for fileIndex, filepath in enumerate(imageFiles):
+        # If the 'Cancel' button was pressed, we want to return to a default state
+        if progress.wasCanceled:
+          break
+
+        try:
+          array, ijkToRAS = next(frames)
+        except Exception as e:
+          print(e)
+          slicer.util.warningDisplay(f"{os.path.basename(filepath)} failed to load.", "Failed to Load File")
+          break
+
+        # The stack is allocated once the size and type of the frames are known
+        if frameStack is None:
+          frameStack = MemmapFrameSource(os.path.join(slicer.app.temporaryPath, "Track"),
+                                         len(imageFiles), array.shape, array.dtype)
+          frameStack.sequenceNodeID = imagesSequenceNode.GetID()
+          self.frameSource = frameStack
+        if array.shape != frameStack.frames.shape[1:]:
+          slicer.util.warningDisplay(f"{os.path.basename(filepath)} does not have the same size as the "
+                                     "previous cine images, so the images cannot be stored in a single "
+                                     "frame stack.", "Failed to Load File")
+          break
+        # Storing the frame would silently cast its voxels to the type of the stack
+        if array.dtype != frameStack.frames.dtype:
+          slicer.util.warningDisplay(f"{os.path.basename(filepath)} does not have the same voxel type as the "
+                                     "previous cine images, so the images cannot be stored in a single "
+                                     "frame stack.", "Failed to Load File")
+          break
+        frameStack.setFrame(fileIndex, array, ijkToRAS)
+        self.addLoadedProxyFrame(fileIndex, array)
+
+        nodeName = (f"Image {fileIndex + 1} ({os.path.basename(filepath)})")
+        imagesSequenceNode.SetDataNodeAtValue(createPlaceholderVolumeNode(ijkToRAS, nodeName), str(fileIndex))
+
+        self.reportFramesLoaded(imagesSequenceNode, fileIndex + 1)
+
+        #  Update how far we are in the progress bar
+        progress.update(fileIndex + 1, array.nbytes)
+      else:
+        frameStack.frames.flush()
+        return False
+    finally:
+      # Cancels the frames that are still queued and waits for the running ones
+      frames.close()
+
+    if frameStack is not None:
+      frameStack.close()
+    return True
+
+  def startWatchingFolder(self, folder, imagesSequenceNode, maxFrames, onFramesAdded=None):
+    """
+    Starts appending the cine images written to a folder to the image sequence, keeping only the
+    most recent frames.
+    :param folder: folder receiving the new cine images
+    :param imagesSequenceNode: sequence node containing the cine images loaded so far
+    :param maxFrames: number of most recent frames kept in the sequence
+    :param onFramesAdded: function called with the number of frames appended
+    :return: True if the folder is being watched
+    """
+    self.stopWatchingFolder()
+    # Frames dropped from the ring shift the frame indices, so the downsampled frames no longer match
+    self.proxyFrames = None
+    # Frames decoded on demand are indexed by the frame source, which cannot grow
+    if self.getFrameSource(imagesSequenceNode) is not None:
+      slicer.util.warningDisplay("Watching a folder for new cine images requires the images to be decoded "
+                                 "while loading.", "Live Mode")
+      return False
+
+    def onLiveFramesAdded(addedPaths, numberOfFramesDropped):
+      # Keeps the file of every frame in the ring, so that frame i is still read from the file of frame i
+      sequenceNodeID, files = self.frameFiles
+      if sequenceNodeID == imagesSequenceNode.GetID():
+        self.frameFiles = (sequenceNodeID, files[numberOfFramesDropped:] + addedPaths)
+      if onFramesAdded is not None:
+        onFramesAdded(len(addedPaths))
+
+    self.folderWatcher = LiveFolderWatcher(folder, imagesSequenceNode, maxFrames, onFramesAdded=onLiveFramesAdded)
+    self.folderWatcher.start()
+    return True
+
+  def stopWatchingFolder(self):
+    if self.folderWatcher is not None:
+      self.folderWatcher.stop()
+      self.folderWatcher = None
+
+  def getProxyFrames(self, sequenceNode2DImages):
+    """
+    Returns the downsampled copies of the frames of the provided image sequence, which are built
+    while the images are loaded, or None if none was built.
+    :param sequenceNode2DImages: sequence node containing the 2D images
+    """
+    if self.proxyFrames is None or sequenceNode2DImages is None:
+      return None
+    if self.proxyFrames.sequenceNodeID != sequenceNode2DImages.GetID():
+      return None
+    return self.proxyFrames
+
+  def setLowResolution(self, lowResolution):
+    """
+    Chooses whether visualize shows the downsampled frames, when they were built, or the full
+    resolution frames.
+    """
+    self.lowResolution = lowResolution
+
+  def loadImagesCompressed(self, imagesSequenceNode, imageFiles, numWorkers, progressDialog, decode=readFrame):
+    """
+    Decodes the cine images and keeps them losslessly compressed in memory. Images are decoded and
+    compressed on worker threads, and the sequence node receives placeholder nodes carrying the
+    geometry of each image. A CompressedFrameSource decompresses frames once they are displayed.
+    :param imagesSequenceNode: sequence node receiving the placeholder nodes
+    :param imageFiles: sorted list of paths to the images
+    :param numWorkers: number of decoding threads
+    :param progressDialog: progress dialog to update and to check for cancellation
+    :param decode: function decoding a single path
+    :return: True if loading was cancelled or failed
+    """
+    proxyFrames = self._loadingProxyFrames
+
+    def decodeAndCompress(path):
+      # The frame is downsampled on the worker thread too, before only its compressed copy is kept
+      array, ijkToRAS = decode(path)
+      return compressFrame(array), ijkToRAS, proxyFrames.downsample(array) if proxyFrames is not None else None
+
+    compressedFrameSource = CompressedFrameSource(len(imageFiles))
+    compressedFrameSource.sequenceNodeID = imagesSequenceNode.GetID()
+    self.frameSource = compressedFrameSource
+    progress = ProgressReporter(progressDialog, "Loading and compressing cine images")
+    frames = decodeFramesInOrder(imageFiles, max(numWorkers, 1), decodeAndCompress)
+    try:
+      for fileIndex, filepath in enumerate(imageFiles):
+        # If the 'Cancel' button was pressed, we want to return to a default state
+        if progress.wasCanceled:
+          return True
+
+        try:
+          compressedFrame, ijkToRAS, downsampledFrame = next(frames)
+        except Exception as e:
+          print(e)
+          slicer.util.warningDisplay(f"{os.path.basename(filepath)} failed to load.", "Failed to Load File")
+          return True
+        compressedFrameSource.setFrame(fileIndex, compressedFrame)
+        if proxyFrames is not None:
+          proxyFrames.setDownsampledFrame(fileIndex, downsampledFrame)
+
+        nodeName = (f"Image {fileIndex + 1} ({os.path.basename(filepath)})")
+        imagesSequenceNode.SetDataNodeAtValue(createPlaceholderVolumeNode(ijkToRAS, nodeName), str(fileIndex))
+
+        self.reportFramesLoaded(imagesSequenceNode, fileIndex + 1)
+
+        #  Update how far we are in the progress bar
+        progress.update(fileIndex + 1,
+                        int(np.prod(compressedFrame.shape)) * np.dtype(compressedFrame.dtype).itemsize)
+    finally:
+      # Cancels the frames that are still queued and waits for the running ones
+      frames.close()
+
+    statistics = compressedFrameSource.getStatistics()
+    print(f"Cine images compressed from {statistics['uncompressedBytes'] / 1e6:.1f} MB "
+          f"to {statistics['compressedBytes'] / 1e6:.1f} MB")
+    return False
+
+  def benchmarkFrameDecompression(self, sequenceNode2DImages):
+    """
+    Decompresses every frame of a sequence loaded with "compressed" frame storage and reports the
+    time taken per frame.
+    :param sequenceNode2DImages: sequence node containing the 2D images
+    :return: dictionary with the mean and maximum decompression time per frame (in milliseconds)
+    and the compression ratio, or None if the frames are not compressed or none was loaded
+    """
+    frameSource = self.getFrameSource(sequenceNode2DImages)
+    if not isinstance(frameSource, CompressedFrameSource):
+      return None
+
+    timings = []
+    for compressedFrame in frameSource.compressedFrames:
+      if compressedFrame is None:
+        continue
+      startTime = time.perf_counter()
+      decompressFrame(compressedFrame)
+      timings.append((time.perf_counter() - startTime) * 1000.0)
+    if not timings:
+      return None
+    results = {
+      "meanMs": sum(timings) / len(timings),
+      "maxMs": max(timings),
+      "compressionRatio": frameSource.getUncompressedBytes() / max(frameSource.getCompressedBytes(), 1),
+    }
+    print(f"Decompressing a cine frame takes {results['meanMs']:.2f} ms on average "
+          f"({results['maxMs']:.2f} ms at most), compression ratio {results['compressionRatio']:.1f}")
+    return results
+
+  def getDicomSeries(self, paths):
+    """
+    Groups DICOM files into series, reading their headers on worker threads. The headers are kept
+    in an index file next to the images, so that opening the same folder again is instant.
+    :param paths: paths to the DICOM files
+    :return: list of series, each a dictionary holding the series instance UID, number and
+    description, and its files ordered by acquisition time or instance number
+    """
+    return groupDicomSeries(indexDicomFiles(paths, defaultWorkerCount()))
+
+  def getDiskFrameCache(self, diskCacheSizeMB):
+    """
+    Returns the on-disk cache of decoded cine images, kept in the Slicer cache directory across
+    sessions, with its size cap updated.
+    :param diskCacheSizeMB: size cap of the cache, in megabytes
+    """
+    if self.diskFrameCache is None:
+      self.diskFrameCache = DiskFrameCache(os.path.join(slicer.app.cachePath, "Track", "Frames"),
+                                           diskCacheSizeMB * 1024 * 1024)
+    self.diskFrameCache.maxBytes = diskCacheSizeMB * 1024 * 1024
+    return self.diskFrameCache
+
+  def getDiskCacheStatistics(self):
+    """
+    Returns the hits and misses of the on-disk cache of decoded cine images, or None if the cache
+    was never enabled.
+    """
+    if self.diskFrameCache is None:
+      return None
+    return self.diskFrameCache.getStatistics()
+
+  def getFrameSource(self, sequenceNode2DImages):
+    """
+    Returns the frame source filling in the frames of the provided image sequence, or None if the
+    sequence holds fully decoded images.
+    :param sequenceNode2DImages: sequence node containing the 2D images
+    """
+    if self.frameSource is None or sequenceNode2DImages is None:
+      return None
+    if self.frameSource.sequenceNodeID != sequenceNode2DImages.GetID():
+      return None
+    return self.frameSource
+
+  def closeFrameSource(self):
+    """
+    Closes the frame source of the loaded image sequence, and deletes the files of the closed frame
+    stacks that could not be deleted while their frames were still shown.
+    """
+    if self.frameSource is not None:
+      self.frameSource.close()
+      self.frameSource = None
+    removePendingFrameStackFiles()
+
+  def setPlaybackRate(self, fps):
+    """
+    Lets the frame source adapt how many frames it decodes ahead of playback.
+    :param fps: playback speed in frames per second
+    """
+    if self.frameSource is not None:
+      self.frameSource.setPlaybackRate(fps)
+
+  def getPrefetchStatistics(self):
+    """
+    Returns the prefetch hits, misses and stall time of the frame source, or None if the images
+    were fully decoded while loading.
+    """
+    if self.frameSource is None:
+      return None
+    return self.frameSource.getStatistics()
+
+  def benchmarkImageLoading(self, shNode, paths, workerCounts=None):
+    """
+    Loads the same cine images with different numbers of decoding threads and reports the time
+    taken by each. The sequence nodes created by the benchmark are removed afterwards.
+    :param shNode: node representing the subject hierarchy
+    :param paths: list of paths to the images to be imported
+    :param workerCounts: worker counts to compare, 1 being the serial loadVolume path
+    :return: dictionary mapping each worker count to the loading time in seconds
+    """
+    if workerCounts is None:
+      workerCounts = [1, defaultWorkerCount()]
+
+    timings = {}
+    for numWorkers in workerCounts:
+      startTime = time.perf_counter()
+      imagesSequenceNode, cancelled = self.loadImagesIntoSequenceNode(shNode, paths, numWorkers)
+      timings[numWorkers] = time.perf_counter() - startTime
+      if imagesSequenceNode:
+        slicer.mrmlScene.RemoveNode(imagesSequenceNode)
+      print(f"Loading {len(paths)} cine images with {numWorkers} worker(s) took {timings[numWorkers]:.2f} s")
+    return timings
+
+  def benchmarkNodeCreation(self, shNode, frameCounts=(250, 500, 1000, 2000), transformStorage="sequence"):
+    """
+    Creates the transforms of increasing numbers of frames and reports the time taken per frame and
+    the number of nodes added to the scene. With the node creation batched, the time per frame should
+    stay about the same as the number of frames grows, rather than increasing with the size of the
+    sequence. Array-backed transforms add a single node whatever the number of frames. The nodes
+    created by the benchmark are removed afterwards.
+    :param shNode: node representing the subject hierarchy
+    :param frameCounts: numbers of frames to create transforms for
+    :param transformStorage: "sequence" for a sequence of transform nodes, "array" for array-backed transforms
+    :return: dictionary mapping each frame count to the creation time per frame, in milliseconds
+    """
+    timings = {}
+    for numberOfFrames in frameCounts:
+      transforms = [[float(i), 0.0, 0.0] for i in range(numberOfFrames)]
+      numberOfSceneNodes = slicer.mrmlScene.GetNumberOfNodes()
+      startTime = time.perf_counter()
+      if transformStorage == "array":
+        transformsNode = self.createTransformArrayFromTransformData(transforms, numberOfFrames)
+      else:
+        transformsNode = self.createTransformNodesFromTransformData(shNode, transforms, numberOfFrames)
+      timings[numberOfFrames] = (time.perf_counter() - startTime) * 1000.0 / numberOfFrames
+      numberOfNodesAdded = slicer.mrmlScene.GetNumberOfNodes() - numberOfSceneNodes
+      if transformStorage == "array":
+        self.removeTransformArray()
+      elif transformsNode:
+        slicer.mrmlScene.RemoveNode(transformsNode)
+      print(f"Creating the transforms of {numberOfFrames} frames took {timings[numberOfFrames]:.3f} ms per frame "
+            f"and added {numberOfNodesAdded} nodes to the scene")
+    return timings
+
+  def benchmarkSpreadsheetReading(self, filepath, columnNames):
+    """
+    Reads the selected columns of a spreadsheet by loading the whole workbook, as transforms
+    spreadsheets used to be read, and by streaming its cells with readSpreadsheetTable, and reports
+    the time and peak memory taken by each.
+    :param filepath: path to the .xlsx or .xls file
+    :param columnNames: names of the columns to read
+    :return: dictionary with the time (in seconds) and peak memory (in megabytes) of the "full" and
+    "streaming" reads
+    """
+    def readFullWorkbook():
+      if filepath.endswith('.xlsx'):
+        openpyxl = __import__('openpyxl')
+        rows = iter(openpyxl.load_workbook(filepath).active.iter_rows(values_only=True))
+        headerRow = next(rows)
+      else:
+        xlrd = __import__('xlrd')
+        sheet = xlrd.open_workbook(filepath).sheet_by_index(0)
+        headerRow = sheet.row_values(0)
+        rows = (sheet.row_values(rowIndex) for rowIndex in range(1, sheet.nrows))
+      indices = [headerRow.index(name) for name in columnNames]
+      return [[float(row[index]) for index in indices] for row in rows]
+
+    def readStreaming():
+      return readSpreadsheetTable(filepath, columnNames).getColumns(columnNames)
+
+    results = {}
+    for name, read in [("full", readFullWorkbook), ("streaming", readStreaming)]:
+      startTime = time.perf_counter()
+      read()
+      seconds = time.perf_counter() - startTime
+      # Tracing allocations slows reading down, so the memory is measured in a second run
+      tracemalloc.start()
+      read()
+      results[name] = {"seconds": seconds, "peakMB": tracemalloc.get_traced_memory()[1] / 1e6}
+      tracemalloc.stop()
+      print(f"Reading {os.path.basename(filepath)} ({name}) took {results[name]['seconds']:.2f} s "
+            f"and {results[name]['peakMB']:.1f} MB")
+    return results
+
   def getColumnNamesFromTransformsInput(self, filepath):
       
     fileName = os.path.basename(filepath)
     fileExtension = os.path.splitext(filepath)[1]
 
     if re.match('.*\.(csv|xls|xlsx|txt)', filepath):
-      # Check that the transforms file is a .csv type
-      if filepath.endswith('.csv'):
-        encodings = ["utf-8-sig", "cp1252", "iso-8859-1", "latin1"]
-        for encoding in encodings:
-          try:
-            with open(filepath, "r", encoding = encoding) as f:
-              reader = csv.reader(f)
-              headers = next(reader)
-              # if we can read without error, break of the encoding loop
-              break
-          except:
-            print(f"Encoding {encoding} failed, trying next encoding")
-        return headers
-   
-      if filepath.endswith('.txt'):
-        with open(filepath, "r") as f:
-          headers = next(f).strip().split(',')
-          return headers
+      # Check that the transforms file is a .csv or .txt type. The whole file is parsed once, so
+      # that switching columns and validating them does not read it again.
+      if filepath.endswith('.csv') or filepath.endswith('.txt'):
+        return self.readTransformsColumnNames(filepath)
       if filepath.endswith('.xlsx'):
         try:
           import openpyxl
@@ -164,12 +922,9 @@ class TrackLogic(ScriptedLoadableModuleLogic):
             slicer.util.warningDisplay(f"{fileName} failed to load.\nPlease load a .csv or .txt file instead. ",
                                       "Failed to Load File")
             return
-        openpyxl = __import__('openpyxl')
-        wb = openpyxl.load_workbook(filepath)
-        sheet = wb.active
-        headers = next(sheet.iter_rows(values_only=True))
-        # print(headers)
-        return headers
+        # A file that is not a valid workbook is reported as one that cannot be read
+        return self.readTransformsColumnNames(filepath, (zipfile.BadZipFile,
+                                                         openpyxl.utils.exceptions.InvalidFileException))
       elif filepath.endswith('.xls'):
         try:
           import xlrd
@@ -206,26 +961,50 @@ class TrackLogic(ScriptedLoadableModuleLogic):
             slicer.util.warningDisplay(f"{fileName} file not loaded.\nPlease load a .csv or .txt file instead. ",
                                       "Failed to Load File")
             return 
-        xlrd = __import__('xlrd')
-        wb = xlrd.open_workbook(filepath)
-        sheet = wb.sheet_by_index(0)
-        return sheet.row_values(0)
+        return self.readTransformsColumnNames(filepath, (xlrd.XLRDError,))
     
     # if we get here, we failed to read the the headers -> print out warning and return a empty list for headers   
     slicer.util.warningDisplay(f"Cannot read header row from {fileName}.\nPlease load another file instead. ",
                                   "Failed to Load File")
     return []
 
-  def validateTransformsInput(self, filepath, numImages,headers):
+  def readTransformsColumnNames(self, filepath, readErrors=()):
+    """
+    Returns the column names of a transforms file, parsing it into the table cache, or warns that the
+    file cannot be read and returns an empty list.
+    :param filepath: path to the transforms file
+    :param readErrors: exception types raised by the spreadsheet package for files it cannot read
+    """
+    try:
+      return self.getTransformsTable(filepath).columnNames
+    except (OSError, ValueError, *readErrors) as e:
+      print(e)
+      slicer.util.warningDisplay(f"Cannot read header row from {os.path.basename(filepath)}.\nPlease load another "
+                                 "file instead. ", "Failed to Load File")
+      return []
+
+  def validateTransformsInput(self, filepath, numImages,headers, transformType="translation", rotationColumns=(),
+                              timestampColumn=None, frameTimes=None, resampling="linear", showDialogs=True):
     """
     Checks to ensure that the data in the provided transformation file is valid and matches the
-    number of 2D images that have been loaded into 3D Slicer.
+    number of 2D images that have been loaded into 3D Slicer. Every row of the selected columns is
+    checked, and all the problems found are reported at once. The report is kept in
+    self.transformsValidationReport.
     :param filepath: path to the transforms file (which should be a .csv file)
     :param numImages: the number of cine images that have already been loaded
+    :param headers: names of the X, Y and Z translation columns
+    :param transformType: "translation" for translations only, or "euler", "quaternion" or "matrix"
+    for rigid transforms whose rotations are read from `rotationColumns`
+    :param rotationColumns: names of the Euler angle, quaternion or matrix element columns
+    :param timestampColumn: name of the column holding the time (in seconds) each transform was
+    logged at. If provided, the transforms are sampled at `frameTimes` rather than read one row per
+    cine image, so the file may be logged at any rate
+    :param frameTimes: (numImages,) array of the frame acquisition times, counted from the first
+    transform, as returned by getFrameTimes
+    :param resampling: "linear" or "nearest", see resampleTransforms
+    :param showDialogs: whether problems are shown in a dialog, rather than only printed
+    :return: list of [x, y, z] translations, or (N, 4, 4) array of matrices for rigid transforms
     """
-    # NOTE: The current logic of this function will only ensure that the first {numImages}
-    # transformations found within the CSV file are valid, so playback can occur. The playback will
-    # still occur if later transformations after the first {numImages} transformations are corrupt.
     transformationsList = []
     fileName = os.path.basename(filepath)
     fileExtension = os.path.splitext(filepath)[1]
@@ -233,109 +1012,119 @@ class TrackLogic(ScriptedLoadableModuleLogic):
     headerY = headers[1]
     headerZ = headers[2]
     if re.match('.*\.(csv|xls|xlsx|txt)', filepath):
-      # Check that the transforms file is a .csv type
-      if filepath.endswith('.csv'):
-        encodings = ["utf-8-sig", "cp1252", "iso-8859-1", "latin1"]
-        for encoding in encodings:
-          try:
-            with open(filepath, "r", encoding = encoding) as f:
-              # Using a DictReader allows us to recognize the CSV header
-              reader = csv.DictReader(f)
-              for row in reader:
-                # Extract floating point values from row
-                transformationsList.append([float(row[headerX]), float(row[headerY]), float(row[headerZ])])
-              
-              # if we can read the file without error, break the encoding loop
-              break
-          except:
-            print(f"Encoding {encoding} failed, trying next encoding")
-          
-      if len(transformationsList) == 0 and filepath.endswith('.csv'):
-        slicer.util.warningDisplay(f"{fileName} file failed to load.\nPlease load another file instead. ",
-                                  "Failed to Load File")
+      # The file was parsed when its columns were listed, so only the selected columns are taken
+      # from the parsed table here
+      self.transformsValidationReport = None
+      try:
+        report = self.getTransformsValidationReport(filepath, numImages, headers, transformType, rotationColumns,
+                                                    timestampColumn)
+      except (OSError, ValueError) as e:
+        print(e)
+        if showDialogs:
+          slicer.util.warningDisplay(f"An error was encountered while reading the {fileExtension} file: "
+                                     f"{fileName}",
+                                     "Validation Error")
         return
-      
-      # Check that the transforms file is a .txt type
-      elif filepath.endswith('.txt'):
-        with open(filepath, "r") as f:
-          next(f)
-          for line in f:
-            values = line.strip().split(',')
-            try:
-              x, y, z = map(float, values)
-              transformationsList.append([x, y, z])
-            except:
-              # If there was an error reading the values, break out because we can't/shouldn't
-              # perform the playback if the transformation data is corrupt or missing.
-              slicer.util.warningDisplay(f"An error was encountered while reading the {fileExtension} file: "
-                                   f"{fileName}",
-                                   "Validation Error")
-              break
-
-      # Check that the transforms file is a .xlsx type
-      elif filepath.endswith('.xlsx') or filepath.endswith('.xlsx'):
-        openpyxl = __import__('openpyxl')        
-        wb = openpyxl.load_workbook(filepath)
-        sheet = wb.active
-        rows = iter(sheet.iter_rows(values_only=True))
-        header_row = next(rows)
-        
-        x_index = header_row.index(headerX)
-        y_index = header_row.index(headerY)
-        z_index = header_row.index(headerZ)
-
-        for row in rows:
-          try:
-            x, y, z = map(float, [row[x_index], row[y_index], row[z_index]])
-            transformationsList.append([x,y,z])
-          except Exception as e:
-            print(e)
-            slicer.util.warningDisplay(f"{fileName} file failed to load.\nPlease load a .csv or .txt file instead. ",
-                                      "Failed to Load File")
-            break
-        
-      # Check that the transforms file is a .xls type
-      elif filepath.endswith('.xls'):
-        xlrd = __import__('xlrd')    
-        workbook = xlrd.open_workbook(filepath)
-        sheet = workbook.sheet_by_index(0)
-        header_row = sheet.row_values(0)
-        
-        x_index = header_row.index(headerX)
-        y_index = header_row.index(headerY)
-        z_index = header_row.index(headerZ)
-        
-        for row_idx in range(1, sheet.nrows):  # Start from the second row, assuming first row is header
-          values = sheet.row_values(row_idx)
-          try:
-            x, y, z = map(float, [values[x_index], values[y_index], values[z_index]])
-            transformationsList.append([x, y, z])
-          except:
-            # If there was an error reading the values, break out because we can't/shouldn't
-            # perform the playback if the transformation data is corrupt or missing.
-            slicer.util.warningDisplay(f"An error was encountered while reading the {fileExtension} file: "
+      self.transformsValidationReport = report
+      if not report.isValid:
+        print(f"{fileName}:\n{report}")
+        if showDialogs:
+          slicer.util.warningDisplay(f"The transforms in {fileName} cannot be used:\n\n{report}", "Validation Error")
+        return None
+      if report.hasWarnings:
+        print(f"{fileName}:\n{report}")
+
+      try:
+        table = self.getTransformsTable(filepath)
+        if transformType == "translation":
+          transformationsList = table.getColumns([headerX, headerY, headerZ])
+        else:
+          transformationsList = matricesFromTable(table, [headerX, headerY, headerZ], transformType,
+                                                  list(rotationColumns))
+        if timestampColumn:
+          if frameTimes is None or len(frameTimes) != numImages:
+            raise ValueError("The acquisition times of the cine images are not known")
+          timestamps = table.getColumns([timestampColumn])[:, 0]
+          # Timestamps are counted from the first transform logged
+          timestamps = timestamps - timestamps.min()
+          transformationsList = resampleTransforms(timestamps, transformationsList, frameTimes, resampling)
+        if transformType == "translation":
+          transformationsList = transformationsList.tolist()
+      except (OSError, ValueError) as e:
+        # If there was an error reading the values, we can't/shouldn't perform the playback if
+        # the transformation data is corrupt or missing.
+        print(e)
+        if showDialogs:
+          slicer.util.warningDisplay(f"An error was encountered while reading the {fileExtension} file: "
                                      f"{fileName}",
                                      "Validation Error")
-            break
+        return
 
+      return transformationsList
 
-      if len(transformationsList) == numImages:
-        return transformationsList
-      else:
-        # Extension will not create transforms nodes if the number of cine images and
-        # the number of rows in the transforms file are not equal
-        print(os.path.basename(filepath))
-        slicer.util.warningDisplay(f"Error loading transforms file. Ensure proper formatting and matching number of transforms to cine images",
-                           "Validation Error")
-        
+  def getTransformsValidationReport(self, filepath, numImages, headers, transformType="translation",
+                                    rotationColumns=(), timestampColumn=None):
+    """
+    Checks every row of the selected columns of a transforms file without showing any dialog, for
+    scripts. See validateTransformsInput for the parameters.
+    :return: TransformsValidationReport
+    :raises OSError: if the file cannot be read
+    """
+    table = self.getTransformsTable(filepath)
+    rotationColumns = list(rotationColumns) if transformType != "translation" else []
+    return validateTransformsTable(table, list(headers[:3]), numImages, rotationColumns, timestampColumn)
+
+  def getFrameTimes(self, imagesSequenceNode, frameTimeSource="interval", frameInterval=0.1, timeOffset=0.0):
+    """
+    Returns the acquisition time of every cine frame, counted from the first frame and shifted by an
+    offset, for sampling timestamped transforms.
+    :param imagesSequenceNode: sequence node containing the cine images
+    :param frameTimeSource: "dicom" reads the acquisition times from the DICOM headers of the images,
+    "interval" assumes the frames were acquired at a constant interval
+    :param frameInterval: time between two frames in seconds, for "interval"
+    :param timeOffset: time of the first frame in seconds, counted from the first transform logged
+    :return: (N,) array of frame times in seconds, or None if the DICOM acquisition times of the
+    images are not all known
+    """
+    numberOfFrames = imagesSequenceNode.GetNumberOfDataNodes()
+    if frameTimeSource == "dicom":
+      sequenceNodeID, files = self.frameFiles
+      if sequenceNodeID != imagesSequenceNode.GetID() or len(files) != numberOfFrames or \
+         not all(path.lower().endswith(".dcm") for path in files):
         return None
+      # The headers were indexed while the images were ordered, so they are read from the index
+      headers = indexDicomFiles(files, defaultWorkerCount())
+      times = [headers[path]["acquisitionTime"] if headers[path] is not None else None for path in files]
+      if None in times:
+        return None
+      frameTimes = np.array(times) - times[0]
+    else:
+      frameTimes = np.arange(numberOfFrames) * frameInterval
+    return frameTimes + timeOffset
+
+  def getTransformsTable(self, filepath):
+    """
+    Returns the parsed columns of a transforms file. The file is only parsed again once its size or
+    modification time changed.
+    :param filepath: path to the .csv, .txt, .xlsx or .xls transforms file
+    """
+    readTable = readSpreadsheetTable if filepath.endswith(('.xlsx', '.xls')) else readTransformsTable
+    return self.transformsTableCache.getTable(filepath, readTable, self.useTransformsSidecar)
+
+  def setTransformsSidecar(self, useSidecar):
+    """
+    Chooses whether parsed transforms files are also saved as binary sidecar files next to them,
+    which are read instead of the transforms files when these are opened again.
+    """
+    self.useTransformsSidecar = useSidecar
 
   def createTransformNodesFromTransformData(self, shNode, transforms, numImages):
     """
     For every image and it's matching transformation, create a transform node which will hold
     the transformation data for that image wthin 3D Slicer. Place them in a sequence node.
     :param shNode: node representing the subject hierarchy
-    :param transforms: list of transforms extrapolated from the transforms .csv file
+    :param transforms: list of [x, y, z] translations extrapolated from the transforms .csv file, or
+    (N, 4, 4) array of transform matrices
     :param numImages: number of 2D images loaded into 3D Slicer
     """
     # NOTE: This represents a node within the MRML scene, not within the subject hierarchy
@@ -346,69 +1135,102 @@ class TrackLogic(ScriptedLoadableModuleLogic):
     progressDialog = qt.QProgressDialog("Creating Transform Nodes From Transformation Data", "Cancel",
                                         0, numImages)
     progressDialog.minimumDuration = 0
-
-    # 3D Slicer works with 4x4 transform matrices internally
-    LPSToRASMatrix = vtk.vtkMatrix4x4()
-    LPSToRASMatrix.SetElement(0, 0, -1)
-    LPSToRASMatrix.SetElement(1, 1, -1)
-
-    # NOTE: It is very important that we loop using the number of 2D images loaded, versus the size
-    # of the transforms array/list. This is because we may provide a CSV with more transforms than
-    # needed, but we only need to create as many transform nodes as there are 2D images.
-    for i in range(numImages):
-      # If the 'Cancel' button was pressed, we want to return to a default state
-      if progressDialog.wasCanceled:
-        # Remove sequence node
-        shNode.RemoveNode(transformsSequenceNode)
-        return None
-
-      # 3D Slicer uses the RAS (Right, Anterior, Superior) basis for their coordinate system.
-      # However, the transformation data we use was generated outside of 3D Slicer, using DICOM
-      # images, which corresponds to the LPS (Left, Prosterier, Superior) basis. In order to use
-      # this data, we must convert it from LPS to RAS, in order to correctly transform the images
-      # we load into 3D Slicer. See the following links for more detail:
-      # https://www.slicer.org/wiki/Coordinate_systems#Anatomical_coordinate_system
-      # https://github.com/Slicer/Slicer/blob/main/Libs/MRML/Core/vtkITKTransformConverter.h#L246
-      # This is a simple conversion. It can be mathematically represented as:
-      # /ΔLR\   /-1  0  0  0\   /X\
-      # |ΔPA| = | 0 -1  0  0| * |Y|
-      # |ΔIS|   | 0  0  1  0|   |Z|
-      # \ 0 /   \ 0  0  0  1/   \0/
-      # Where X, Y, and Z represent the transformation in LPS.
-
-      # Convert transform from LPS to RAS
-      currentTransform = transforms[i]
-      currentTransform.append(0) # Needs to be 4x1 to multiply with a 4x4
-      convertedTransform = [0, 0, 0, 0]
-      LPSToRASMatrix.MultiplyPoint(currentTransform, convertedTransform)
-
-      # Create a transform matrix from the converted transform
-      transformMatrix = vtk.vtkMatrix4x4()
-      transformMatrix.SetElement(0, 3, convertedTransform[0])  # LR translation
-      transformMatrix.SetElement(1, 3, convertedTransform[1])  # PA translation
-      transformMatrix.SetElement(2, 3, convertedTransform[2])  # IS translation
-
-      # Create a LinearTransform node to hold our transform matrix
-      transformNode = \
-             slicer.mrmlScene.AddNewNodeByClass("vtkMRMLLinearTransformNode", f"Transform {i + 1}")
-      transformNode.ApplyTransformMatrix(transformMatrix)
-
-      # Add the transform node to the transforms sequence node
-      transformsSequenceNode.SetDataNodeAtValue(transformNode, str(i))
-      # Remove the transform node
-      transformNodeID = shNode.GetItemByDataNode(transformNode)
-      shNode.RemoveItem(transformNodeID)
-
-      # Update how far we are in the progress bar
-      progressDialog.setValue(i + 1)
-
-      # This render step is needed for the progress bar to visually update in the GUI
-      slicer.util.forceRenderAllViews()
-      slicer.app.processEvents()
+    progress = ProgressReporter(progressDialog, "Creating Transform Nodes From Transformation Data", "transforms")
+
+    # 3D Slicer uses the RAS (Right, Anterior, Superior) basis for their coordinate system.
+    # However, the transformation data we use was generated outside of 3D Slicer, using DICOM
+    # images, which corresponds to the LPS (Left, Prosterier, Superior) basis. In order to use
+    # this data, we must convert it from LPS to RAS, in order to correctly transform the images
+    # we load into 3D Slicer. See the following links for more detail:
+    # https://www.slicer.org/wiki/Coordinate_systems#Anatomical_coordinate_system
+    # https://github.com/Slicer/Slicer/blob/main/Libs/MRML/Core/vtkITKTransformConverter.h#L246
+    # 3D Slicer works with 4x4 transform matrices internally, and the conversion of a matrix M can
+    # be mathematically represented as:
+    #          /-1  0  0  0\       /-1  0  0  0\
+    # M_RAS =  | 0 -1  0  0| * M * | 0 -1  0  0|
+    #          | 0  0  1  0|       | 0  0  1  0|
+    #          \ 0  0  0  1/       \ 0  0  0  1/
+    # For a translation (X, Y, Z) in LPS, this gives the translation (-X, -Y, Z) in RAS. All the
+    # matrices are built and converted at once, leaving the provided transforms unchanged.
+    transformMatrices = lpsToRasMatrices(transformsToMatrices(transforms[:numImages]))
+
+    # The sequence node fires a single modified event once all the transforms are in place, rather
+    # than one per transform
+    cancelled = False
+    wasModifying = transformsSequenceNode.StartModify()
+    try:
+      # NOTE: It is very important that we loop using the number of 2D images loaded, versus the size
+      # of the transforms array/list. This is because we may provide a CSV with more transforms than
+      # needed, but we only need to create as many transform nodes as there are 2D images.
+      for i in range(numImages):
+        # If the 'Cancel' button was pressed, we want to return to a default state
+        if progress.wasCanceled:
+          cancelled = True
+          break
+
+        # Create a transform matrix from the converted transform
+        transformMatrix = slicer.util.vtkMatrixFromArray(transformMatrices[i])
+
+        # Create a LinearTransform node to hold our transform matrix. The node is not added to the
+        # scene, so that no scene or subject hierarchy events are fired and no subject hierarchy item
+        # has to be removed after the node was placed into the sequence.
+        transformNode = slicer.vtkMRMLLinearTransformNode()
+        transformNode.SetName(f"Transform {i + 1}")
+        transformNode.SetMatrixTransformToParent(transformMatrix)
+
+        # Add the transform node to the transforms sequence node
+        transformsSequenceNode.SetDataNodeAtValue(transformNode, str(i))
+
+        # Update how far we are in the progress bar
+        progress.update(i + 1)
+    finally:
+      transformsSequenceNode.EndModify(wasModifying)
+
+    # If the 'Cancel' button was pressed, we want to return to a default state
+    if cancelled:
+      # Remove sequence node
+      slicer.mrmlScene.RemoveNode(transformsSequenceNode)
+      return None
 
     print(f"{numImages} transforms were loaded into 3D Slicer as transform nodes")
     return transformsSequenceNode
 
+  def createTransformArrayFromTransformData(self, transforms, numImages):
+    """
+    Keeps the transforms of all the images in a single array, shown through one transform node whose
+    matrix is updated when the selected image changes. This replaces the transform nodes of any
+    earlier array-backed transforms. See createTransformNodesFromTransformData for the conversion
+    from LPS to RAS.
+    :param transforms: list of [x, y, z] translations or (N, 4, 4) array of transform matrices, or
+    None for the identity transform at every image, which needs no array at all
+    :param numImages: number of 2D images loaded into 3D Slicer
+    :return: the transform node
+    """
+    self.removeTransformArray()
+    matrices = None
+    if transforms is not None:
+      matrices = lpsToRasMatrices(transformsToMatrices(transforms[:numImages]))
+    self.transformArray = TransformArray(matrices, numImages)
+    print(f"{numImages} transforms were loaded into 3D Slicer as a single transform node")
+    return self.transformArray.transformNode
+
+  def getTransformArray(self, transformNode):
+    """
+    Returns the array-backed transforms shown through the provided transform node, or None if the
+    node does not show array-backed transforms.
+    :param transformNode: linear transform node
+    """
+    if self.transformArray is None or transformNode is None:
+      return None
+    if self.transformArray.transformNode.GetID() != transformNode.GetID():
+      return None
+    return self.transformArray
+
+  def removeTransformArray(self):
+    if self.transformArray is not None:
+      self.transformArray.remove()
+      self.transformArray = None
+
   def clearSliceForegrounds(self):
     """
     Clear each slice view from having anything visible in the foreground. This often happens
@@ -418,29 +1240,320 @@ class TrackLogic(ScriptedLoadableModuleLogic):
     for viewName in layoutManager.sliceViewNames():
       layoutManager.sliceWidget(viewName).mrmlSliceCompositeNode().SetForegroundVolumeID("None")
 
+  def _updateProxyImageNode(self, sequenceBrowser, sequenceNode2DImages):
+    """
+    Fills in the image data of the selected frame in the proxy image node, which is the downsampled
+    frame while scrubbing or playing quickly, or the frame decoded by the frame source of sequences
+    loaded on demand.
+    :return: tuple of the proxy image node and the index of the selected frame
+    """
+    # The proxy image node represents the current selected image within the sequence
+    proxy2DImageNode = sequenceBrowser.GetProxyNode(sequenceNode2DImages)
+    selectedItemNumber = sequenceBrowser.GetSelectedItemNumber()
+    proxyFrames = self.getProxyFrames(sequenceNode2DImages)
+    if self.lowResolution and proxyFrames is not None and selectedItemNumber in proxyFrames:
+      # Show the downsampled frame while scrubbing or playing quickly
+      proxyFrames.updateProxyNode(proxy2DImageNode, sequenceNode2DImages.GetNthDataNode(selectedItemNumber),
+                                  selectedItemNumber)
+    else:
+      if proxyFrames is not None and proxyFrames.isShownIn(proxy2DImageNode):
+        proxyFrames.restoreProxyNode(proxy2DImageNode, sequenceNode2DImages.GetNthDataNode(selectedItemNumber))
+      # Sequences loaded on demand only hold placeholder image data, so decode the selected frame
+      frameSource = self.getFrameSource(sequenceNode2DImages)
+      if frameSource is not None:
+        frameSource.updateProxyNode(proxy2DImageNode, selectedItemNumber)
+    return proxy2DImageNode, selectedItemNumber
+
+  def _updateTransformNode(self, sequenceBrowser, sequenceNodeTransforms, selectedItemNumber):
+    """
+    Returns the transform node holding the transform of the selected image, which is the proxy node
+    of the transforms sequence or the single node of array-backed transforms.
+    :return: tuple of the transform node, or None, and whether its transform may have changed. The
+    proxy node of a transforms sequence was already updated by the sequence browser, so it is taken to
+    have changed. The matrix of array-backed transforms may also have been updated already, by their
+    browser observer, so it is compared with the matrix last shown.
+    """
+    if sequenceNodeTransforms is not None:
+      # The proxy transform node represents the current selected transform within the sequence
+      return sequenceBrowser.GetProxyNode(sequenceNodeTransforms), True
+    if self.transformArray is not None and self.transformArray.transformNode.GetScene() is not None:
+      # Array-backed transforms have a single transform node, updated in place for the selected image
+      self.transformArray.setFrame(selectedItemNumber)
+      shownTransform = (self.transformArray.transformNode.GetID(), self.transformArray.matrixVersion)
+      changed = shownTransform != self._shownTransform
+      self._shownTransform = shownTransform
+      return self.transformArray.transformNode, changed
+    return None, False
+
+  def _visualizationKey(self, sequenceBrowser, sequenceNode2DImages, segmentationLabelMapID, transformNode,
+                        opacity, overlayAsOutline, overlayThickness):
+    # Inputs and display settings the views were configured for by visualize
+    return (sequenceBrowser.GetID(), sequenceNode2DImages.GetID(), segmentationLabelMapID,
+            transformNode.GetID() if transformNode is not None else None, opacity, overlayAsOutline,
+            overlayThickness)
+
+  def _frameOrientation(self, imageNode):
+    # Axis directions of a frame, which decide the slice view showing it
+    imageNode.GetIJKToRASDirectionMatrix(self._directionMatrix)
+    return tuple(round(self._directionMatrix.GetElement(row, column), 4) for row in range(3) for column in range(3))
+
+  def _requestViewRenders(self, sliceViewNames=(), threeDViews=False):
+    """
+    Requests the given slice views, and optionally the 3D views, to be rendered by the next flush of
+    the render scheduler. Views not in the layout are ignored.
+    :param sliceViewNames: names of the slice views (e.g. "Red"), None is ignored
+    :param threeDViews: whether to request the 3D views as well
+    """
+    layoutManager = slicer.app.layoutManager()
+    if layoutManager is None:
+      return
+    for name in sliceViewNames:
+      sliceWidget = layoutManager.sliceWidget(name) if name is not None else None
+      if sliceWidget is not None:
+        self.renderScheduler.requestRender(sliceWidget.sliceView())
+    if threeDViews:
+      for threeDViewIndex in range(layoutManager.threeDViewCount):
+        threeDWidget = layoutManager.threeDWidget(threeDViewIndex)
+        if threeDWidget and threeDWidget.threeDView():
+          self.renderScheduler.requestRender(threeDWidget.threeDView())
+
+  def getRenderStatistics(self):
+    """
+    Returns the number of views rendered and the time spent rendering per frame shown by visualize
+    and visualizeFrame, see RenderScheduler.getStatistics.
+    """
+    return self.renderScheduler.getStatistics()
+
+  def visualizeFrame(self, sequenceBrowser, sequenceNode2DImages, segmentationLabelMapID,
+                     sequenceNodeTransforms, opacity, overlayAsOutline, overlayThickness, show=False,
+                     customParamNode=None):
+    """
+    Per-frame counterpart of visualize, used while playing back or stepping through the sequence.
+    Once visualize configured the views for the same inputs and display settings, only the image
+    shown in the slice view, the transform and the frame label are updated. Otherwise, or if the
+    selected frame has another orientation than the frame configured, it falls back to visualize.
+    Only 2D frames, shown in a single slice view, have this fast path: 3D frames always fall back to
+    visualize. The parameters are those of visualize.
+    """
+    state = self.visualizationState
+    proxy2DImageNode = sequenceBrowser.GetProxyNode(sequenceNode2DImages)
+    selectedItemNumber = sequenceBrowser.GetSelectedItemNumber()
+    transformNode, transformChanged = self._updateTransformNode(sequenceBrowser, sequenceNodeTransforms,
+                                                                selectedItemNumber)
+    background = getattr(self, state["sliceViewName"].lower() + "Background") if state is not None else None
+    # A pending color, opacity or thickness change is applied by visualize
+    if self.displayDirty or background is None or background.GetScene() is None or proxy2DImageNode is None or \
+       state["key"] != self._visualizationKey(sequenceBrowser, sequenceNode2DImages, segmentationLabelMapID,
+                                              transformNode, opacity, overlayAsOutline, overlayThickness) or \
+       state["orientation"] != self._frameOrientation(proxy2DImageNode):
+      self.visualize(sequenceBrowser, sequenceNode2DImages, segmentationLabelMapID, sequenceNodeTransforms, opacity,
+                     overlayAsOutline, overlayThickness, show, customParamNode)
+      return
+    self.frameUpdateCounts["fast"] += 1
+
+    proxy2DImageNode, selectedItemNumber = self._updateProxyImageNode(sequenceBrowser, sequenceNode2DImages)
+
+    # Swap the image shown in the slice view. Low resolution frames have a different spacing, so the
+    # geometry is copied as well. The background node fires a single modified event.
+    baseName = proxy2DImageNode.GetAttribute("Sequences.BaseName")
+    wasModifying = background.StartModify()
+    background.CopyOrientation(proxy2DImageNode)
+    background.SetAndObserveImageData(proxy2DImageNode.GetImageData())
+    background.SetAttribute("Sequences.BaseName", baseName)
+    background.SetName(baseName)
+    background.EndModify(wasModifying)
+
+    # Update the frame label. Observers keeping the "Current Alignment" text while paused are removed,
+    # as visualize does.
+    sliceView = slicer.app.layoutManager().sliceWidget(state["sliceViewName"]).sliceView()
+    cornerAnnotation = sliceView.cornerAnnotation()
+    if cornerAnnotation.HasObserver(vtk.vtkCommand.ModifiedEvent):
+      cornerAnnotation.RemoveAllObservers()
+    cornerAnnotation.ClearAllTexts()
+    cornerAnnotation.SetText(0, baseName)
+    if show:
+      cornerAnnotation.SetText(vtk.vtkCornerAnnotation.UpperLeft, "Current Alignment")
+
+    # Only the slice view showing the frame changed, unless the transform moved the label map, which
+    # is also shown in the other slice views and the 3D views
+    self.renderScheduler.requestRender(sliceView)
+    if transformChanged:
+      self._requestViewRenders(self.backgrounds, threeDViews=True)
+    self.renderScheduler.flush()
+
+  def benchmarkFrameUpdates(self, sequenceBrowser, sequenceNode2DImages, segmentationLabelMapID,
+                            sequenceNodeTransforms, opacity, overlayAsOutline, overlayThickness, numberOfFrames=50):
+    """
+    Steps through the sequence with visualize, then with visualizeFrame, and reports the median time
+    taken to show a frame, including the rendering of the views. The selected frame is restored
+    afterwards.
+    :param numberOfFrames: number of frames shown with each path
+    :return: dictionary mapping "full" and "fast" to the median latency per frame, in milliseconds
+    """
+    selectedItemNumber = sequenceBrowser.GetSelectedItemNumber()
+    numberOfItems = sequenceBrowser.GetNumberOfItems()
+    arguments = (sequenceBrowser, sequenceNode2DImages, segmentationLabelMapID, sequenceNodeTransforms, opacity,
+                 overlayAsOutline, overlayThickness)
+    timings = {}
+    for path, update in (("full", self.visualize), ("fast", self.visualizeFrame)):
+      # The first frame configures the views
+      self.visualize(*arguments)
+      slicer.app.processEvents()
+      latencies = []
+      for index in range(1, numberOfFrames + 1):
+        sequenceBrowser.SetSelectedItemNumber(index % numberOfItems)
+        startTime = time.perf_counter()
+        update(*arguments)
+        slicer.app.processEvents()
+        latencies.append(time.perf_counter() - startTime)
+      timings[path] = float(np.median(latencies)) * 1000.0
+      print(f"Showing a frame with the {path} update path took {timings[path]:.2f} ms")
+    sequenceBrowser.SetSelectedItemNumber(selectedItemNumber)
+    self.visualize(*arguments)
+    return timings
+
+  def markDisplayDirty(self):
+    """
+    Requests the color table, slice intersection thickness and volume rendering of the label map to
+    be refreshed by the next call to visualize, after a color, opacity or thickness change.
+    """
+    self.displayDirty = True
+
+  def _getDisplayState(self, labelMapNode, overlayThickness):
+    # Color table and thickness the label map was last shown with. The modification time of the color
+    # table changes whenever a color is edited, even from outside this module.
+    displayNode = labelMapNode.GetDisplayNode() if labelMapNode is not None else None
+    colorNode = displayNode.GetColorNode() if displayNode is not None else None
+    return (labelMapNode.GetID() if labelMapNode is not None else None,
+            colorNode.GetID() if colorNode is not None else None,
+            colorNode.GetMTime() if colorNode is not None else None,
+            overlayThickness)
+
+  def _consumeDisplayRefresh(self, labelMapNode, overlayThickness):
+    """
+    Returns whether the display of the label map must be refreshed, because it was marked dirty or
+    its color table or thickness changed since it was last shown, and clears the dirty flag.
+    """
+    refresh = self.displayDirty or self._displayState != self._getDisplayState(labelMapNode, overlayThickness)
+    self.displayDirty = False
+    if refresh:
+      self.displayRefreshCount += 1
+    return refresh
+
+  def benchmarkPlaybackFps(self, sequenceBrowser, sequenceNode2DImages, segmentationLabelMapID,
+                           sequenceNodeTransforms, opacity, overlayAsOutline, overlayThickness, numberOfFrames=100):
+    """
+    Plays frames back with the 3D view visible and reports the frame rate reached, with the display
+    of the label map refreshed at every frame as visualize used to do, with visualize refreshing it
+    only after a change, and with the per-frame path of visualizeFrame. The layout is switched to a
+    layout with a 3D view for the benchmark, then restored, as is the selected frame.
+    :param numberOfFrames: number of frames shown in each case
+    :return: dictionary mapping "refreshEveryFrame", "visualize" and "visualizeFrame" to frames per second
+    """
+    layoutManager = slicer.app.layoutManager()
+    layout = layoutManager.layout
+    if layoutManager.threeDViewCount == 0 or not layoutManager.threeDWidget(0).visible:
+      layoutManager.setLayout(slicer.vtkMRMLLayoutNode.SlicerLayoutFourUpView)
+    selectedItemNumber = sequenceBrowser.GetSelectedItemNumber()
+    numberOfItems = sequenceBrowser.GetNumberOfItems()
+    arguments = (sequenceBrowser, sequenceNode2DImages, segmentationLabelMapID, sequenceNodeTransforms, opacity,
+                 overlayAsOutline, overlayThickness)
+
+    def refreshEveryFrame(*arguments):
+      self.markDisplayDirty()
+      self.visualize(*arguments)
+
+    fps = {}
+    for case, update in (("refreshEveryFrame", refreshEveryFrame), ("visualize", self.visualize),
+                         ("visualizeFrame", self.visualizeFrame)):
+      self.visualize(*arguments)
+      slicer.app.processEvents()
+      startTime = time.perf_counter()
+      for index in range(1, numberOfFrames + 1):
+        sequenceBrowser.SetSelectedItemNumber(index % numberOfItems)
+        update(*arguments)
+        # Rendering happens while processing the events, as during playback
+        slicer.app.processEvents()
+      fps[case] = numberOfFrames / (time.perf_counter() - startTime)
+      print(f"Playing back with {case} reached {fps[case]:.1f} frames per second")
+
+    sequenceBrowser.SetSelectedItemNumber(selectedItemNumber)
+    self.visualize(*arguments)
+    layoutManager.setLayout(layout)
+    return fps
+
+  def _refreshLabelMapDisplay(self, labelMapNode, threeDViewNode):
+    """
+    Shows a color, opacity or thickness change of the label map in the slice views and, through its
+    volume rendering, in the 3D views. This rebuilds the volume rendering, so it is only done after
+    such a change, once per call to visualize.
+    :param labelMapNode: label map node of the 3D segmentation
+    :param threeDViewNode: 3D view node showing the label map, or None
+    """
+    if threeDViewNode:
+      # CRITICAL: Force volume rendering to update colors
+      volumeRenderingLogic = slicer.modules.volumerendering.logic()
+      volumeRenderingDisplayNode = volumeRenderingLogic.GetFirstVolumeRenderingDisplayNode(labelMapNode)
+
+      if volumeRenderingDisplayNode:
+        # Force volume rendering to refresh with new color table
+        volumeRenderingDisplayNode.Modified()
+        volumePropertyNode = volumeRenderingDisplayNode.GetVolumePropertyNode()
+        if volumePropertyNode:
+          volumePropertyNode.Modified()
+
+        # Force visibility update to trigger refresh
+        wasVisible = volumeRenderingDisplayNode.GetVisibility()
+        volumeRenderingDisplayNode.SetVisibility(False)
+        slicer.app.processEvents()
+        volumeRenderingDisplayNode.SetVisibility(wasVisible)
+
+      # Update all display nodes including volume rendering
+      for displayNodeIndex in range(labelMapNode.GetNumberOfDisplayNodes()):
+        volumeDisplayNode = labelMapNode.GetNthDisplayNode(displayNodeIndex)
+        if volumeDisplayNode:
+          volumeDisplayNode.Modified()
+          if volumeDisplayNode.IsA("vtkMRMLVolumeRenderingDisplayNode"):
+            # Update volume rendering to reflect color changes
+            volumeProperty = volumeDisplayNode.GetVolumePropertyNode()
+            if volumeProperty:
+              volumeProperty.Modified()
+
+    # Force display node to update first, then the label map node itself
+    displayNode = labelMapNode.GetDisplayNode()
+    if displayNode:
+      displayNode.Modified()
+    labelMapNode.Modified()
+
   def visualize(self, sequenceBrowser, sequenceNode2DImages, segmentationLabelMapID,
                     sequenceNodeTransforms, opacity, overlayAsOutline, overlayThickness, show=False, customParamNode=None):
     """
     Visualizes the image data (2D images and 3D segmentation overlay) within the slice views and
     enables the alignment of the 3D segmentation label map according to the transformation data.
+    This configures the views from scratch, see visualizeFrame for showing another frame once they are.
     :param sequenceBrowser: sequence browser node used to control the playback operation
     :param sequenceNode2DImages: sequence node containing the 2D images
     :param segmentationLabelMapID: subject hierarchy ID of the 3D segmentation label map
-    :param sequenceNodeTransforms: sequence node containing the transforms
+    :param sequenceNodeTransforms: sequence node containing the transforms, or None for array-backed
+    transforms
     :param opacity: opacity value of overlay layer (3D segmentation label map layer)
     :param overlayAsOutline: whether to show the overlay as an outline or a filled region
     """
     shNode = slicer.mrmlScene.GetSubjectHierarchyNode()
     layoutManager = slicer.app.layoutManager()
+    self.frameUpdateCounts["full"] += 1
+    # The views are configured again, so visualizeFrame may only be used once this completes
+    self.visualizationState = None
 
-    # The proxy image node represents the current selected image within the sequence
-    proxy2DImageNode = sequenceBrowser.GetProxyNode(sequenceNode2DImages)
-    # The proxy transform node represents the current selected transform within the sequence
-    proxyTransformNode = sequenceBrowser.GetProxyNode(sequenceNodeTransforms)
+    proxy2DImageNode, selectedItemNumber = self._updateProxyImageNode(sequenceBrowser, sequenceNode2DImages)
+    proxyTransformNode, _ = self._updateTransformNode(sequenceBrowser, sequenceNodeTransforms, selectedItemNumber)
     labelMapNode = shNode.GetItemDataNode(segmentationLabelMapID)
 
+    # The color table and volume rendering are only refreshed after a color, opacity or thickness
+    # change, rather than at every frame
+    refreshDisplay = self._consumeDisplayRefresh(labelMapNode, overlayThickness)
     displayNode = labelMapNode.GetDisplayNode()
-    if displayNode:
+    if displayNode and refreshDisplay:
       # Ensure the color node is properly set and updated
       colorNode = displayNode.GetColorNode()
       if colorNode:
@@ -455,6 +1568,7 @@ class TrackLogic(ScriptedLoadableModuleLogic):
       
       # Force the display node to update
       displayNode.Modified()
+    self._displayState = self._getDisplayState(labelMapNode, overlayThickness)
 
     if proxy2DImageNode.GetImageData().GetDataDimension() == 2:
       sliceWidget = self.getSliceWidget(layoutManager, proxy2DImageNode)
@@ -499,55 +1613,6 @@ class TrackLogic(ScriptedLoadableModuleLogic):
       threeDViewNode = layoutManager.activeMRMLThreeDViewNode()
       shNode.ShowItemsInView(tmpIdList, threeDViewNode)
       
-      # Ensure 3D viewer properly reflects any color table changes
-      if threeDViewNode:
-        # Force update any volume rendering display nodes for the 3D view
-        labelMapNode = shNode.GetItemDataNode(segmentationLabelMapID)
-        if labelMapNode:
-          # Update the main display node
-          displayNode = labelMapNode.GetDisplayNode()
-          if displayNode:
-            displayNode.Modified()
-            
-          # CRITICAL: Force volume rendering to update colors
-          volumeRenderingLogic = slicer.modules.volumerendering.logic()
-          volumeRenderingDisplayNode = volumeRenderingLogic.GetFirstVolumeRenderingDisplayNode(labelMapNode)
-          
-          if volumeRenderingDisplayNode:
-            # Force volume rendering to refresh with new color table
-            volumeRenderingDisplayNode.Modified()
-            volumePropertyNode = volumeRenderingDisplayNode.GetVolumePropertyNode()
-            if volumePropertyNode:
-              volumePropertyNode.Modified()
-            
-            # Force visibility update to trigger refresh
-            wasVisible = volumeRenderingDisplayNode.GetVisibility()
-            volumeRenderingDisplayNode.SetVisibility(False)
-            slicer.app.processEvents()
-            volumeRenderingDisplayNode.SetVisibility(wasVisible)
-            
-          # Update all display nodes including volume rendering
-          for displayNodeIndex in range(labelMapNode.GetNumberOfDisplayNodes()):
-            volumeDisplayNode = labelMapNode.GetNthDisplayNode(displayNodeIndex)
-            if volumeDisplayNode:
-              volumeDisplayNode.Modified()
-              if volumeDisplayNode.IsA("vtkMRMLVolumeRenderingDisplayNode"):
-                # Update volume rendering to reflect color changes
-                volumeProperty = volumeDisplayNode.GetVolumePropertyNode()
-                if volumeProperty:
-                  volumeProperty.Modified()
-          
-          # Force the label map node itself to update
-          labelMapNode.Modified()
-          
-          # Force 3D view to re-render
-          layoutManager = slicer.app.layoutManager()
-          if layoutManager:
-            for threeDViewIndex in range(layoutManager.threeDViewCount):
-              threeDWidget = layoutManager.threeDWidget(threeDViewIndex)
-              if threeDWidget and threeDWidget.threeDView():
-                threeDWidget.threeDView().forceRender()
-
       # If the sliceNode is now showing an image, fit the slice view to the current background image   
       if fitSlice:
         sliceWidget.fitSliceToBackground()
@@ -563,7 +1628,9 @@ class TrackLogic(ScriptedLoadableModuleLogic):
           setattr(self, name.lower() + 'Background', volumesLogic.CloneVolume(slicer.mrmlScene,
                   proxy2DImageNode, f"{proxy2DImageNode.GetAttribute('Sequences.BaseName')}"))
         else:
-          # Background exists, just replace the data to represent the next image in the sequence
+          # Background exists, just replace the data to represent the next image in the sequence.
+          # Low resolution frames have a different spacing, so the geometry is copied as well.
+          background.CopyOrientation(proxy2DImageNode)
           background.SetAndObserveImageData(proxy2DImageNode.GetImageData())
           background.SetAttribute("Sequences.BaseName", proxy2DImageNode.GetAttribute("Sequences.BaseName"))
       
@@ -605,15 +1672,23 @@ class TrackLogic(ScriptedLoadableModuleLogic):
       if proxyTransformNode is not None:
         labelMapNode.SetAndObserveTransformNodeID(proxyTransformNode.GetID())
 
-      # Render changes
-      # Force display node to update first
-      displayNode = labelMapNode.GetDisplayNode()
-      if displayNode:
-        displayNode.Modified()
-      labelMapNode.Modified()
-      
-      slicer.util.forceRenderAllViews()
-      slicer.app.processEvents()
+      # A color, opacity or thickness change is shown in the slice views and the 3D views
+      if refreshDisplay:
+        self._refreshLabelMapDisplay(labelMapNode, threeDViewNode)
+
+      # Render the slice view showing the frame, the slice views whose background and label changed,
+      # and the 3D views showing the label map, each of them once
+      self._requestViewRenders([name, *self.backgrounds], threeDViews=True)
+      self.renderScheduler.flush()
+
+      # The views are configured, so the next frames only need the image, transform and label updated
+      if name in self.backgrounds:
+        self.visualizationState = {
+          "key": self._visualizationKey(sequenceBrowser, sequenceNode2DImages, segmentationLabelMapID,
+                                        proxyTransformNode, opacity, overlayAsOutline, overlayThickness),
+          "sliceViewName": name,
+          "orientation": self._frameOrientation(proxy2DImageNode),
+        }
 
     else:
       sliceWidgets = self.getSliceWidgets(layoutManager, proxy2DImageNode)
@@ -658,55 +1733,6 @@ class TrackLogic(ScriptedLoadableModuleLogic):
         threeDViewNode = layoutManager.activeMRMLThreeDViewNode()
         shNode.ShowItemsInView(tmpIdList, threeDViewNode)
 
-        # Ensure 3D viewer properly reflects any color table changes
-        if threeDViewNode:
-          # Force update any volume rendering display nodes for the 3D view
-          labelMapNode = shNode.GetItemDataNode(segmentationLabelMapID)
-          if labelMapNode:
-            # Update the main display node
-            displayNode = labelMapNode.GetDisplayNode()
-            if displayNode:
-              displayNode.Modified()
-              
-            # CRITICAL: Force volume rendering to update colors
-            volumeRenderingLogic = slicer.modules.volumerendering.logic()
-            volumeRenderingDisplayNode = volumeRenderingLogic.GetFirstVolumeRenderingDisplayNode(labelMapNode)
-            
-            if volumeRenderingDisplayNode:
-              # Force volume rendering to refresh with new color table
-              volumeRenderingDisplayNode.Modified()
-              volumePropertyNode = volumeRenderingDisplayNode.GetVolumePropertyNode()
-              if volumePropertyNode:
-                volumePropertyNode.Modified()
-              
-              # Force visibility update to trigger refresh
-              wasVisible = volumeRenderingDisplayNode.GetVisibility()
-              volumeRenderingDisplayNode.SetVisibility(False)
-              slicer.app.processEvents()
-              volumeRenderingDisplayNode.SetVisibility(wasVisible)
-              
-            # Update all display nodes including volume rendering
-            for displayNodeIndex in range(labelMapNode.GetNumberOfDisplayNodes()):
-              volumeDisplayNode = labelMapNode.GetNthDisplayNode(displayNodeIndex)
-              if volumeDisplayNode:
-                volumeDisplayNode.Modified()
-                if volumeDisplayNode.IsA("vtkMRMLVolumeRenderingDisplayNode"):
-                  # Update volume rendering to reflect color changes
-                  volumeProperty = volumeDisplayNode.GetVolumePropertyNode()
-                  if volumeProperty:
-                    volumeProperty.Modified()
-            
-            # Force the label map node itself to update
-            labelMapNode.Modified()
-            
-            # Force 3D view to re-render
-            layoutManager = slicer.app.layoutManager()
-            if layoutManager:
-              for threeDViewIndex in range(layoutManager.threeDViewCount):
-                threeDWidget = layoutManager.threeDWidget(threeDViewIndex)
-                if threeDWidget and threeDWidget.threeDView():
-                  threeDWidget.threeDView().forceRender()
-
         # If the sliceNode is now showing an image, fit the slice view to the current background image   
         if fitSlice:
           sliceWidget.fitSliceToBackground()
@@ -722,7 +1748,9 @@ class TrackLogic(ScriptedLoadableModuleLogic):
             setattr(self, name.lower() + 'Background', volumesLogic.CloneVolume(slicer.mrmlScene,
                     proxy2DImageNode, f"{proxy2DImageNode.GetAttribute('Sequences.BaseName')}"))
           else:
-            # Background exists, just replace the data to represent the next image in the sequence
+            # Background exists, just replace the data to represent the next image in the sequence.
+            # Low resolution frames have a different spacing, so the geometry is copied as well.
+            background.CopyOrientation(proxy2DImageNode)
             background.SetAndObserveImageData(proxy2DImageNode.GetImageData())
             background.SetAttribute("Sequences.BaseName", proxy2DImageNode.GetAttribute("Sequences.BaseName"))
         
@@ -759,99 +1787,51 @@ class TrackLogic(ScriptedLoadableModuleLogic):
         if proxyTransformNode is not None:
           labelMapNode.SetAndObserveTransformNodeID(proxyTransformNode.GetID())
 
-        # Render changes
-        # Force display node to update first
-        displayNode = labelMapNode.GetDisplayNode()
-        if displayNode:
-          displayNode.Modified()
-        labelMapNode.Modified()
-        
-        slicer.util.forceRenderAllViews()
-        slicer.app.processEvents()
+        # Views changed by every slice view are rendered once, after the last one is configured
+        self._requestViewRenders([name, *self.backgrounds], threeDViews=True)
+      # The label map display is refreshed once, whatever the number of slice views showing the frame
+      if refreshDisplay:
+        self._refreshLabelMapDisplay(labelMapNode, layoutManager.activeMRMLThreeDViewNode())
+      self.renderScheduler.flush()
   
+  def getSliceOrientation(self, imageNode):
+    """
+    Returns the orientation of the slice view showing the provided image: "Sagittal", "Coronal" or
+    "Axial". It only depends on the image dimensions and axis directions, so it is computed once per
+    frame geometry and looked up for the other frames, without reading any voxel.
+    :param imageNode: node representing the 2D image
+    """
+    imageData = imageNode.GetImageData()
+    dimensions = tuple(imageData.GetDimensions()) if imageData is not None else (1, 1, 1)
+    key = (dimensions, self._frameOrientation(imageNode))
+    orientation = self.sliceOrientations.get(key)
+    if orientation is None:
+      orientation = sliceOrientationFromGeometry(dimensions, np.array(key[1]).reshape(3, 3))
+      self.sliceOrientations[key] = orientation
+    return orientation
+
   def getSliceWidget(self, layoutManager, imageNode):
     """
     This function helps to determine the slice widget that corresponds to the orientation of the
     provided image. (i.e. the slice widget that would display the image)
     :param layoutManager: node representing the MRML layout manager
     :param imageNode: node representing the 2D image
+    :return: the slice widget, or None if no slice view has the orientation of the image
     """
-    
-    def get_anatomical_orientation(image):
-      """
-      Helper function for fixing images with incorrect anatomical orientation.
-      Determine the anatomical orientation of an image based on its direction cosines.
-      """
-      direction = image.GetDirection()
-      anatomical_labels = ['R', 'A', 'I', 'L', 'P', 'S']
-      orientation = []
-
-      # Determine the dominant direction for each axis
-      for axis in range(3):
-        # Extract the direction vector for the current axis
-        vector = direction[axis::3]
-        # Determine the index of the dominant direction
-        max_index = max(range(3), key=lambda i: abs(vector[i]))
-        # Append the corresponding anatomical label
-        orientation.append(anatomical_labels[max_index + (3 if vector[max_index] < 0 else 0)])
-
-      return ''.join(orientation)
-
-    def reorient_image(image, orientation):
-      """
-      Helper function for fixing images oritentation.
-      Reorient the image based on the anatomical orientation.
-      """
-      if image.GetSize()[0] == 1:
-        # Single-slice in x-direction, check for sagittal, coronal, or axial
-        if orientation[0] in ('L', 'R'):
-          return sitk.DICOMOrient(image, 'PIR')  # Sagittal
-        elif orientation[0] in ('A', 'P'):
-          return sitk.DICOMOrient(image, 'LIA')  # Coronal
-        else:
-          return sitk.DICOMOrient(image, 'LPS')  # Axial
-      elif image.GetSize()[1] == 1:
-        # Single-slice in y-direction, check for sagittal, coronal, or axial
-        if orientation[1] in ('L', 'R'):
-          return sitk.DICOMOrient(image, 'PIR')  # Sagittal
-        elif orientation[1] in ('A', 'P'):
-          return sitk.DICOMOrient(image, 'LIA')  # Coronal
-        else:
-          return sitk.DICOMOrient(image, 'LPS')  # Axial
-      return image
-  
-    # Determine the orientation of the image
-    sitk_image = sitkUtils.PullVolumeFromSlicer(imageNode)
-    if sitk_image.GetSize()[2] != 1:
-      orientation = get_anatomical_orientation(sitk_image)
-      reoriented_image = reorient_image(sitk_image, orientation)
-      imageNode = sitkUtils.PushVolumeToSlicer(reoriented_image, None, name=imageNode.GetName())
-    tmpMatrix = vtk.vtkMatrix4x4()
-    if imageNode is not None:
-      imageNode.GetIJKToRASMatrix(tmpMatrix)
-      scanOrder = imageNode.ComputeScanOrderFromIJKToRAS(tmpMatrix)
-
-      if scanOrder == "LR" or scanOrder == "RL":
-        imageOrientation = "Sagittal"
-      elif scanOrder == "AP" or scanOrder == "PA":
-        imageOrientation = "Coronal"
-      elif scanOrder == "IS" or scanOrder == "SI":
-        imageOrientation = "Axial"
-      else:
-        print(f"Error: Unexpected image scan order {scanOrder}.")
-        exit(1)
+    if imageNode is None:
+      return None
+    imageOrientation = self.getSliceOrientation(imageNode)
 
-      # Find the slice widget that has the same orientation as the image
-      sliceWidget = None
-      for name in layoutManager.sliceViewNames():
-        if layoutManager.sliceWidget(name).sliceOrientation == imageOrientation:
-          sliceWidget = layoutManager.sliceWidget(name)
+    # Find the slice widget that has the same orientation as the image
+    sliceWidget = None
+    for name in layoutManager.sliceViewNames():
+      if layoutManager.sliceWidget(name).sliceOrientation == imageOrientation:
+        sliceWidget = layoutManager.sliceWidget(name)
 
-      if not sliceWidget:
-        print(f"Error: A slice with the {imageOrientation} orientation was not found.")
-        exit(1)
+    if not sliceWidget:
+      print(f"Error: A slice with the {imageOrientation} orientation was not found.")
 
-      return sliceWidget
+    return sliceWidget
 
   def getSliceWidgets(self, layoutManager, imageNode):
     """
@@ -865,6 +1845,6 @@ class TrackLogic(ScriptedLoadableModuleLogic):
       if layoutManager.sliceWidget(name).sliceOrientation == "Axial" or layoutManager.sliceWidget(name).sliceOrientation == "Sagittal" or layoutManager.sliceWidget(name).sliceOrientation == "Coronal":
         sliceWidgets.append(layoutManager.sliceWidget(name))
       else:
-        print(f"Error: A slice with the required orientations was not found.")
-        exit(1)
+        # Reformatted views cannot show the image, so they are left out
+        print(f"Error: The {name} slice view is not axial, sagittal or coronal.")
     return sliceWidgets
\ No newline at end of file
@@ -0,0 +1,89 @@
+import numpy as np
+import vtk
+import slicer
+
+class TransformArray:
+  """
+  Holds the transforms of all the cine frames in a single (N, 4, 4) array, and shows the transform of
+  the selected frame through one persistent linear transform node, whose matrix is updated in place
+  when the frame changes. Unlike a sequence of transform nodes, this adds a single node to the scene
+  whatever the number of frames. Sessions without transforms keep no array at all.
+  """
+
+  def __init__(self, matrices, numberOfFrames, name="Transform Array"):
+    """
+    :param matrices: (N, 4, 4) array of the RAS transform matrices of the frames, or None for the
+    identity transform at every frame
+    :param numberOfFrames: number of cine frames
+    :param name: name of the transform node. It differs from the name of the proxy node of a
+    transforms sequence, so the node is only removed through remove().
+    """
+    self.matrices = None if matrices is None else np.ascontiguousarray(matrices[:numberOfFrames], dtype=np.float64)
+    self.numberOfFrames = numberOfFrames
+    self.transformNode = slicer.mrmlScene.AddNewNodeByClass("vtkMRMLLinearTransformNode", name)
+    self.currentIndex = None
+    # Incremented whenever the matrix of the transform node is modified
+    self.matrixVersion = 0
+    # Matrix reused for every frame, so no VTK object is created while playing back
+    self._matrix = vtk.vtkMatrix4x4()
+    self._browserNode = None
+    self._browserObserver = None
+    self.setFrame(0)
+
+  def getNumberOfFrames(self):
+    return self.numberOfFrames
+
+  def getMatrix(self, index):
+    """
+    Returns the 4x4 RAS transform matrix of a frame.
+    """
+    if self.matrices is None:
+      return np.eye(4)
+    return self.matrices[index]
+
+  def setFrame(self, index):
+    """
+    Shows the transform of a frame in the transform node. Nothing is modified if the frame is already
+    shown or the node was removed from the scene.
+    :param index: index of the frame
+    :return: True if the matrix of the transform node was modified
+    """
+    if index == self.currentIndex or self.transformNode.GetScene() is None:
+      return False
+    if not 0 <= index < self.numberOfFrames:
+      return False
+    modified = self.matrices is not None or self.currentIndex is None
+    if modified:
+      slicer.util.updateVTKMatrixFromArray(self._matrix, self.getMatrix(index))
+      self.transformNode.SetMatrixTransformToParent(self._matrix)
+      self.matrixVersion += 1
+    self.currentIndex = index
+    return modified
+
+  def observeBrowser(self, browserNode):
+    """
+    Follows the frame selected in a sequence browser, so that the transform node is updated by
+    playback and scrubbing the same way as the proxy nodes of the synchronized sequences.
+    :param browserNode: sequence browser node
+    """
+    self.stopObservingBrowser()
+    self._browserNode = browserNode
+    self._browserObserver = browserNode.AddObserver(vtk.vtkCommand.ModifiedEvent, self._onBrowserModified)
+    self.setFrame(browserNode.GetSelectedItemNumber())
+
+  def stopObservingBrowser(self):
+    if self._browserNode is not None:
+      self._browserNode.RemoveObserver(self._browserObserver)
+    self._browserNode = None
+    self._browserObserver = None
+
+  def _onBrowserModified(self, browserNode, event):
+    self.setFrame(browserNode.GetSelectedItemNumber())
+
+  def remove(self):
+    """
+    Stops following the sequence browser and removes the transform node from the scene.
+    """
+    self.stopObservingBrowser()
+    if self.transformNode.GetScene() is not None:
+      slicer.mrmlScene.RemoveNode(self.transformNode)
@@ -0,0 +1,758 @@
+import os, csv, codecs, itertools, collections
+
+import numpy as np
+
+# Encodings tried, in order, on a sample of a transforms file that has no byte order mark. Latin-1
+# decodes any byte, so it is the last resort.
+TEXT_ENCODINGS = ["utf-8", "cp1252", "latin1"]
+
+# Number of rows parsed at once when streaming a transforms file
+DEFAULT_CHUNK_ROWS = 1000000
+
+# Diagonal of the matrix converting between the LPS (DICOM) and RAS (3D Slicer) bases. A transform
+# matrix M expressed in LPS becomes diag(D) @ M @ diag(D) in RAS.
+LPS_TO_RAS_DIAGONAL = np.array([-1.0, -1.0, 1.0, 1.0])
+
+# Steps between consecutive translations larger than this many times the median step are reported
+# as implausible jumps, unless they are shorter than MIN_JUMP_STEP (in millimeters)
+JUMP_STEP_FACTOR = 10.0
+MIN_JUMP_STEP = 1.0
+
+# Number of rows listed per problem in the text of a validation report
+REPORTED_ROWS = 10
+
+# Numbers of rotation columns accepted by each kind of transform: Euler angles (in degrees, about X
+# then Y then Z), quaternions (W, X, Y, Z), and matrices (row-major, the first 3 or all 4 rows)
+ROTATION_COLUMN_COUNTS = {"euler": (3,), "quaternion": (4,), "matrix": (12, 16)}
+
+def detectEncoding(path, sampleSize=65536):
+  """
+  Detects the text encoding of a transforms file from a sample of its first bytes, so that the
+  file is only read once.
+  :param path: path to the .csv or .txt file
+  :param sampleSize: number of bytes sampled
+  :return: name of the encoding
+  """
+  with open(path, "rb") as f:
+    sample = f.read(sampleSize)
+  if sample.startswith(codecs.BOM_UTF8):
+    return "utf-8-sig"
+  for encoding in TEXT_ENCODINGS:
+    try:
+      # The sample may end in the middle of a multi-byte character, which is not an error
+      codecs.getincrementaldecoder(encoding)().decode(sample, final=len(sample) < sampleSize)
+      return encoding
+    except UnicodeDecodeError:
+      continue
+  return TEXT_ENCODINGS[-1]
+
+def _parseHeader(line):
+  return [name.strip() for name in next(csv.reader([line]))]
+
+def readTransformsHeader(path, encoding=None):
+  """
+  Reads the column names from the header row of a .csv or .txt transforms file.
+  :param path: path to the transforms file
+  :param encoding: text encoding of the file, detected if not provided
+  :return: list of the column names
+  """
+  if encoding is None:
+    encoding = detectEncoding(path)
+  with open(path, "r", encoding=encoding, newline="") as f:
+    return _parseHeader(next(f, ""))
+
+def iterTransformColumns(path, columnNames, chunkRows=DEFAULT_CHUNK_ROWS, encoding=None):
+  """
+  Streams the selected columns of a .csv or .txt transforms file as float64 arrays. Each chunk of
+  rows is parsed in a single vectorized pass, and only one chunk is held in memory at a time, so
+  files larger than memory can be processed.
+  :param path: path to the transforms file
+  :param columnNames: names of the columns to read, in the order of the returned array columns
+  :param chunkRows: maximum number of rows per chunk
+  :param encoding: text encoding of the file, detected if not provided
+  :return: generator of (rows, len(columnNames)) arrays
+  :raises ValueError: if a column is missing or a value is not a number
+  """
+  return _iterColumns(path, columnNames, chunkRows, encoding, np.float64)
+
+def _iterColumns(path, columnNames, chunkRows, encoding, dtype):
+  if encoding is None:
+    encoding = detectEncoding(path)
+  with open(path, "r", encoding=encoding, newline="") as f:
+    columnIndices = _selectColumns(_parseHeader(next(f, "")), columnNames)
+    for firstRow, lines in _iterLineChunks(f, chunkRows):
+      try:
+        yield _parseChunk(lines, columnIndices, dtype)
+      except ValueError as e:
+        raise ValueError(f"Rows {firstRow} to {firstRow + len(lines) - 1} could not be read: {e}") from e
+
+def _selectColumns(header, columnNames):
+  missingColumns = [name for name in columnNames if name not in header]
+  if missingColumns:
+    raise ValueError(f"Columns {', '.join(missingColumns)} were not found in the header row")
+  return [header.index(name) for name in columnNames]
+
+def _iterLineChunks(f, chunkRows):
+  """
+  Yields the lines of a transforms file following its header row, a chunk at a time, with the row
+  number of the first line of each chunk, counting the header as row 1.
+  """
+  firstRow = 2
+  while True:
+    lines = list(itertools.islice(f, chunkRows))
+    if not lines:
+      return
+    # Blank lines are skipped, but a chunk holding only blank lines has no columns to select
+    if any(line.strip() for line in lines):
+      yield firstRow, lines
+    firstRow += len(lines)
+
+def _parseChunk(lines, columnIndices, dtype):
+  # Cells are unquoted as the header row is, so quoted numbers and quoted commas are read too
+  return np.loadtxt(lines, delimiter=",", quotechar='"', usecols=columnIndices, dtype=dtype, ndmin=2)
+
+def readTransformColumns(path, columnNames, chunkRows=DEFAULT_CHUNK_ROWS, encoding=None):
+  """
+  Reads the selected columns of a .csv or .txt transforms file into a float64 array.
+  :param path: path to the transforms file
+  :param columnNames: names of the columns to read, in the order of the returned array columns
+  :param chunkRows: maximum number of rows parsed at once
+  :param encoding: text encoding of the file, detected if not provided
+  :return: (rows, len(columnNames)) array
+  :raises ValueError: if a column is missing or a value is not a number
+  """
+  chunks = list(iterTransformColumns(path, columnNames, chunkRows, encoding))
+  if not chunks:
+    return np.zeros((0, len(columnNames)))
+  return np.concatenate(chunks)
+
+def _convertTextColumn(values):
+  """
+  Converts the cells of a text column to a float64 array. Empty cells and cells that are not
+  numbers become NaN, and the rows of the latter are returned too. Each distinct cell is only
+  converted once.
+  :param values: array of the cell strings
+  :return: tuple of the column and the array of the row indices holding values that are not numbers
+  """
+  try:
+    # Columns that only hold numbers are converted at once
+    return values.astype(np.float64), np.zeros(0, dtype=int)
+  except ValueError:
+    pass
+  uniqueValues, inverse = np.unique(np.char.strip(values), return_inverse=True)
+  converted = np.full(len(uniqueValues), np.nan)
+  invalid = np.zeros(len(uniqueValues), dtype=bool)
+  for index, value in enumerate(uniqueValues):
+    if value == "":
+      continue
+    try:
+      converted[index] = float(value)
+    except ValueError:
+      invalid[index] = True
+  inverse = inverse.reshape(-1)
+  return converted[inverse], np.flatnonzero(invalid[inverse])
+
+def _columnError(column, invalidRows):
+  """
+  Returns the reason a column cannot be used at all, which is when none of its cells is a number
+  (a date or comment column, for instance), or None.
+  """
+  if len(invalidRows) > 0 and np.isnan(column).all():
+    # Row numbers count the header as row 1
+    return f"Row {invalidRows[0] + 2} could not be read: the column holds no numbers"
+  return None
+
+class TransformsTable:
+  """
+  Columnar in-memory table of a transforms file. Every column is parsed once into a float64 array,
+  so that listing the column names, switching the X/Y/Z columns and validating the selection do not
+  read the file again. Cells that are empty or not numbers are NaN, and the rows of the latter are
+  kept so that they can be reported. Columns holding no numbers at all keep the parsing error instead.
+  """
+
+  def __init__(self, columnNames, columns, errors=None, invalidRows=None):
+    """
+    :param columnNames: names of the columns, in file order
+    :param columns: dictionary mapping each numeric column name to its float64 array
+    :param errors: dictionary mapping the names of the other columns to the reason they could not be read
+    :param invalidRows: dictionary mapping numeric column names to the array of the row indices
+    holding values that are not numbers, for the columns having any
+    """
+    self.columnNames = list(columnNames)
+    self.columns = columns
+    self.errors = errors if errors is not None else {}
+    self.invalidRows = invalidRows if invalidRows is not None else {}
+
+  def getNumberOfRows(self):
+    return max((len(column) for column in self.columns.values()), default=0)
+
+  def getColumns(self, columnNames):
+    """
+    Returns the selected columns as a (rows, len(columnNames)) float64 array.
+    :param columnNames: names of the columns, in the order of the returned array columns
+    :raises ValueError: if a column is missing, not numeric or has empty cells
+    """
+    for name in columnNames:
+      if name in self.errors:
+        raise ValueError(f"Column {name} could not be read: {self.errors[name]}")
+      if name not in self.columns:
+        raise ValueError(f"Column {name} was not found in the header row")
+    for name in columnNames:
+      if len(self.invalidRows.get(name, ())) > 0:
+        raise ValueError(f"Row {self.invalidRows[name][0] + 2} could not be read: a value of column {name} "
+                         "is not a number")
+    selected = np.stack([self.columns[name] for name in columnNames], axis=1)
+    missingRows = np.flatnonzero(np.isnan(selected).any(axis=1))
+    if len(missingRows) > 0:
+      # Row numbers count the header as row 1
+      raise ValueError(f"Row {missingRows[0] + 2} has missing values")
+    return selected
+
+def readTransformsTable(path, chunkRows=DEFAULT_CHUNK_ROWS, columnNames=None):
+  """
+  Parses the columns of a .csv or .txt transforms file in a single pass. Each chunk of rows is
+  parsed as numbers at once, and only the chunks that fail are parsed again, from memory, as text,
+  so that one text column (a comment or a date, for instance) or a few bad cells do not prevent the
+  others from being used, and every bad cell is found rather than only the first.
+  :param path: path to the transforms file
+  :param chunkRows: maximum number of rows parsed at once
+  :param columnNames: names of the columns to read, all of them if not provided
+  :raises ValueError: if a requested column is missing or a row cannot be split into cells
+  """
+  encoding = detectEncoding(path)
+  with open(path, "r", encoding=encoding, newline="") as f:
+    header = _parseHeader(next(f, ""))
+    # Only the first of several columns sharing a name can be selected
+    names = list(dict.fromkeys(header if columnNames is None else columnNames))
+    columnIndices = _selectColumns(header, names)
+    chunks = {name: [] for name in names}
+    invalidChunks = {name: [] for name in names}
+    numberOfRows = 0
+    for firstRow, lines in _iterLineChunks(f, chunkRows):
+      try:
+        data = _parseChunk(lines, columnIndices, np.float64)
+        for index, name in enumerate(names):
+          chunks[name].append(data[:, index])
+      except ValueError:
+        try:
+          data = _parseChunk(lines, columnIndices, str)
+        except ValueError as e:
+          raise ValueError(f"Rows {firstRow} to {firstRow + len(lines) - 1} could not be read: {e}") from e
+        for index, name in enumerate(names):
+          column, invalid = _convertTextColumn(data[:, index])
+          chunks[name].append(column)
+          invalidChunks[name].append(invalid + numberOfRows)
+      numberOfRows += len(data)
+
+  columns = {}
+  errors = {}
+  invalidRows = {}
+  for name in names:
+    column = np.concatenate(chunks[name]) if chunks[name] else np.zeros(0)
+    invalid = np.concatenate(invalidChunks[name]) if invalidChunks[name] else np.zeros(0, dtype=int)
+    error = _columnError(column, invalid)
+    if error is not None:
+      errors[name] = error
+    else:
+      columns[name] = column
+      if len(invalid) > 0:
+        invalidRows[name] = invalid
+  return TransformsTable(header, columns, errors, invalidRows)
+
+# Number of spreadsheet rows buffered before they are converted to arrays
+SPREADSHEET_CHUNK_ROWS = 65536
+
+def _convertSpreadsheetColumn(values):
+  """
+  Converts the cells of a spreadsheet column to a float64 array. Empty cells and cells that are not
+  numbers become NaN.
+  :param values: cell values of the column
+  :return: tuple of the column and the array of the indices of the cells that are not numbers
+  """
+  try:
+    # Empty cells are None, which NumPy converts to NaN
+    return np.array(values, dtype=np.float64), np.zeros(0, dtype=int)
+  except (TypeError, ValueError):
+    pass
+  column = np.full(len(values), np.nan)
+  invalid = []
+  for index, value in enumerate(values):
+    if value is None or value == "":
+      continue
+    try:
+      column[index] = float(value)
+    except (TypeError, ValueError):
+      invalid.append(index)
+  return column, np.array(invalid, dtype=int)
+
+def _spreadsheetTable(header, columns, invalid):
+  """
+  Builds the table of a spreadsheet from its converted columns.
+  :param columns: dictionary mapping column names to their float64 arrays
+  :param invalid: dictionary mapping column names to the row indices of cells that are not numbers
+  """
+  errors = {}
+  for name in list(columns):
+    error = _columnError(columns[name], invalid[name])
+    if error is not None:
+      errors[name] = error
+      del columns[name]
+  return TransformsTable(header, columns, errors,
+                         {name: rows for name, rows in invalid.items() if name in columns and len(rows) > 0})
+
+def _spreadsheetColumnNames(header):
+  return ["" if name is None else str(name).strip() for name in header]
+
+def _selectSpreadsheetColumns(header, columnNames):
+  """
+  Returns the names of the columns to read, and the index of each in the header row. Only the
+  first of several columns sharing a name is read.
+  """
+  indices = {}
+  for index, name in enumerate(header):
+    if (columnNames is None or name in columnNames) and name not in indices:
+      indices[name] = index
+  return indices
+
+def readSpreadsheetTable(path, columnNames=None):
+  """
+  Parses the first sheet of an .xlsx (with openpyxl) or .xls (with xlrd) transforms file, whose
+  first row is the header row. The cells are streamed rather than loaded as a whole workbook, and
+  only the requested columns are converted, so memory stays bounded by the resulting arrays. The
+  package must already be installed.
+  :param path: path to the spreadsheet
+  :param columnNames: names of the columns to read, all of them if not provided
+  """
+  if path.endswith('.xlsx'):
+    return _readXlsxTable(path, columnNames)
+  return _readXlsTable(path, columnNames)
+
+def _readXlsxTable(path, columnNames):
+  openpyxl = __import__('openpyxl')
+  # Read-only mode streams the rows from the file instead of building every cell object, and
+  # data-only mode returns the values of formulas
+  workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+  try:
+    rows = workbook.active.iter_rows(values_only=True)
+    header = _spreadsheetColumnNames(next(rows, ()))
+    indices = _selectSpreadsheetColumns(header, columnNames)
+    chunks = {name: [] for name in indices}
+    invalidChunks = {name: [] for name in indices}
+    buffers = {name: [] for name in indices}
+    firstRow = 0  # Row index of the first buffered row
+
+    def convertBuffers():
+      for name, values in buffers.items():
+        column, invalid = _convertSpreadsheetColumn(values)
+        chunks[name].append(column)
+        invalidChunks[name].append(invalid + firstRow)
+        values.clear()
+
+    numberOfRows = 0
+    for row in rows:
+      # Formatted but empty rows past the data are not rows of transforms
+      if not any(value is not None and value != "" for value in row):
+        continue
+      for name, index in indices.items():
+        buffers[name].append(row[index] if index < len(row) else None)
+      numberOfRows += 1
+      if numberOfRows % SPREADSHEET_CHUNK_ROWS == 0:
+        convertBuffers()
+        firstRow += SPREADSHEET_CHUNK_ROWS
+    convertBuffers()
+  finally:
+    # Read-only workbooks keep the file open until they are closed
+    workbook.close()
+
+  columns = {name: np.concatenate(chunks[name]) for name in indices}
+  invalid = {name: np.concatenate(invalidChunks[name]) for name in indices}
+  return _spreadsheetTable(header, columns, invalid)
+
+def _readXlsTable(path, columnNames):
+  xlrd = __import__('xlrd')
+  # On-demand mode only loads the first sheet
+  workbook = xlrd.open_workbook(path, on_demand=True)
+  try:
+    sheet = workbook.sheet_by_index(0)
+    if sheet.nrows == 0:
+      return TransformsTable([], {})
+    header = _spreadsheetColumnNames(sheet.row_values(0))
+    columns = {}
+    invalid = {}
+    for name, index in _selectSpreadsheetColumns(header, columnNames).items():
+      # Columns are read directly, without going through the rows
+      columns[name], invalid[name] = _convertSpreadsheetColumn(sheet.col_values(index, start_rowx=1))
+  finally:
+    workbook.release_resources()
+  return _spreadsheetTable(header, columns, invalid)
+
+def _sidecarPath(path):
+  return os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.TrackTable.npz")
+
+class TransformsTableCache:
+  """
+  Keeps the tables of the most recently used transforms files, keyed by path, size and modification
+  time, so that a file is only parsed again once it changed. The tables can also be saved as binary
+  sidecar files next to the transforms files, which are much faster to read than text or
+  spreadsheets when the same file is opened in a later session.
+  """
+
+  def __init__(self, maxEntries=4):
+    """
+    :param maxEntries: number of tables kept in memory
+    """
+    self.maxEntries = maxEntries
+    self._tables = collections.OrderedDict()  # absolute path -> ((size, modification time), table)
+    self.resetStatistics()
+
+  def getTable(self, path, readTable, useSidecar=False):
+    """
+    Returns the table of a transforms file, parsing it only if it is not cached or has changed.
+    :param path: path to the transforms file
+    :param readTable: function parsing the file into a TransformsTable
+    :param useSidecar: whether to read and write the binary sidecar file
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    key = (stat.st_size, stat.st_mtime_ns)
+    entry = self._tables.get(path)
+    if entry is not None and entry[0] == key:
+      self._tables.move_to_end(path)
+      self.hits += 1
+      return entry[1]
+
+    table = self._loadSidecar(path, key) if useSidecar else None
+    if table is not None:
+      self.sidecarLoads += 1
+    else:
+      table = readTable(path)
+      self.misses += 1
+      if useSidecar:
+        self._saveSidecar(path, key, table)
+
+    self._tables[path] = (key, table)
+    self._tables.move_to_end(path)
+    while len(self._tables) > self.maxEntries:
+      self._tables.popitem(last=False)
+    return table
+
+  def _loadSidecar(self, path, key):
+    try:
+      with np.load(_sidecarPath(path), allow_pickle=False) as sidecar:
+        if tuple(int(value) for value in sidecar["key"]) != key:
+          return None
+        columnNames = [str(name) for name in sidecar["columnNames"]]
+        numericNames = [str(name) for name in sidecar["numericNames"]]
+        data = sidecar["data"]
+        errors = dict(zip((str(name) for name in sidecar["errorNames"]),
+                          (str(message) for message in sidecar["errorMessages"])))
+        invalidRows = dict(zip((str(name) for name in sidecar["invalidNames"]),
+                               np.split(sidecar["invalidRows"], np.cumsum(sidecar["invalidCounts"])[:-1])))
+    except (OSError, KeyError, ValueError):
+      return None
+    return TransformsTable(columnNames, {name: data[:, index] for index, name in enumerate(numericNames)}, errors,
+                           invalidRows)
+
+  def _saveSidecar(self, path, key, table):
+    numericNames = list(table.columns)
+    data = np.stack([table.columns[name] for name in numericNames], axis=1) if numericNames \
+      else np.zeros((0, 0))
+    invalidRows = list(table.invalidRows.values())
+    sidecarPath = _sidecarPath(path)
+    try:
+      # Written to a temporary file first, so that an interrupted write never leaves a truncated sidecar
+      with open(sidecarPath + ".tmp", "wb") as f:
+        np.savez(f, key=np.array(key, dtype=np.int64), columnNames=np.array(table.columnNames, dtype=str),
+                 numericNames=np.array(numericNames, dtype=str), data=data,
+                 errorNames=np.array(list(table.errors), dtype=str),
+                 errorMessages=np.array(list(table.errors.values()), dtype=str),
+                 invalidNames=np.array(list(table.invalidRows), dtype=str),
+                 invalidCounts=np.array([len(rows) for rows in invalidRows], dtype=np.int64),
+                 invalidRows=np.concatenate(invalidRows).astype(np.int64) if invalidRows
+                 else np.zeros(0, dtype=np.int64))
+      os.replace(sidecarPath + ".tmp", sidecarPath)
+    except OSError as e:
+      # Read-only folders are parsed again next session
+      print(f"Could not save the parsed transforms of {path}: {e}")
+
+  def clear(self):
+    self._tables.clear()
+
+  def resetStatistics(self):
+    self.hits = 0
+    self.misses = 0
+    self.sidecarLoads = 0
+
+  def getStatistics(self):
+    """
+    Returns the number of tables found in memory, parsed from the transforms files and read from
+    sidecar files since the statistics were last reset.
+    """
+    return {"hits": self.hits, "misses": self.misses, "sidecarLoads": self.sidecarLoads}
+
+def translationsToMatrices(translations):
+  """
+  Builds the 4x4 matrices of pure translations.
+  :param translations: (N, 3) array of X, Y, Z translations
+  :return: (N, 4, 4) array
+  """
+  translations = np.asarray(translations, dtype=np.float64)
+  matrices = np.tile(np.eye(4), (len(translations), 1, 1))
+  matrices[:, :3, 3] = translations
+  return matrices
+
+def _axisRotations(axis, cosines, sines):
+  rotations = np.tile(np.eye(3), (len(cosines), 1, 1))
+  i, j = {"x": (1, 2), "y": (2, 0), "z": (0, 1)}[axis]
+  rotations[:, i, i] = cosines
+  rotations[:, i, j] = -sines
+  rotations[:, j, i] = sines
+  rotations[:, j, j] = cosines
+  return rotations
+
+def eulerAnglesToMatrices(translations, angles, order="xyz", degrees=True):
+  """
+  Builds the 4x4 matrices of rigid transforms given as translations and Euler angles. The rotations
+  are about the fixed axes, applied in the given order.
+  :param translations: (N, 3) array of X, Y, Z translations
+  :param angles: (N, 3) array of the rotation angles about the axes listed in `order`
+  :param order: axes of the successive rotations
+  :param degrees: whether the angles are in degrees rather than radians
+  :return: (N, 4, 4) array
+  """
+  angles = np.asarray(angles, dtype=np.float64)
+  if degrees:
+    angles = np.radians(angles)
+  cosines = np.cos(angles)
+  sines = np.sin(angles)
+  rotations = np.tile(np.eye(3), (len(angles), 1, 1))
+  for axisIndex, axis in enumerate(order):
+    # A rotation about a fixed axis applies after the previous ones, so it multiplies them on the left
+    rotations = _axisRotations(axis, cosines[:, axisIndex], sines[:, axisIndex]) @ rotations
+  matrices = translationsToMatrices(translations)
+  matrices[:, :3, :3] = rotations
+  return matrices
+
+def quaternionsToMatrices(translations, quaternions):
+  """
+  Builds the 4x4 matrices of rigid transforms given as translations and rotation quaternions.
+  :param translations: (N, 3) array of X, Y, Z translations
+  :param quaternions: (N, 4) array of W, X, Y, Z quaternion components, normalized here
+  :return: (N, 4, 4) array
+  """
+  quaternions = np.asarray(quaternions, dtype=np.float64)
+  w, x, y, z = (quaternions / np.linalg.norm(quaternions, axis=1, keepdims=True)).T
+  matrices = translationsToMatrices(translations)
+  matrices[:, 0, :3] = np.stack([1 - 2 * (y * y + z * z), 2 * (x * y - w * z), 2 * (x * z + w * y)], axis=1)
+  matrices[:, 1, :3] = np.stack([2 * (x * y + w * z), 1 - 2 * (x * x + z * z), 2 * (y * z - w * x)], axis=1)
+  matrices[:, 2, :3] = np.stack([2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x * x + y * y)], axis=1)
+  return matrices
+
+def matrixColumnsToMatrices(values):
+  """
+  Builds 4x4 matrices from their elements in row-major order.
+  :param values: (N, 16) array of all the elements, or (N, 12) array of the first 3 rows
+  :return: (N, 4, 4) array
+  """
+  values = np.asarray(values, dtype=np.float64)
+  matrices = np.tile(np.eye(4), (len(values), 1, 1))
+  matrices.reshape(len(values), 16)[:, :values.shape[1]] = values
+  return matrices
+
+def transformsToMatrices(transforms):
+  """
+  Returns the 4x4 matrices of transforms given either as X, Y, Z translations or as matrices.
+  :param transforms: list of [x, y, z] translations, (N, 3) array of translations or (N, 4, 4)
+  array of matrices
+  :return: (N, 4, 4) array, never sharing memory with `transforms`
+  """
+  transforms = np.asarray(transforms, dtype=np.float64)
+  if transforms.ndim == 3:
+    return transforms.copy()
+  return translationsToMatrices(transforms.reshape(-1, 3))
+
+def lpsToRasMatrices(matrices):
+  """
+  Converts transform matrices from the LPS basis to the RAS basis, all at once.
+  :param matrices: (N, 4, 4) array of matrices in LPS, left unchanged
+  :return: (N, 4, 4) array of the matrices in RAS
+  """
+  # Multiplying on both sides by a diagonal matrix scales the rows and the columns
+  return matrices * LPS_TO_RAS_DIAGONAL[:, np.newaxis] * LPS_TO_RAS_DIAGONAL[np.newaxis, :]
+
+def matricesFromTable(table, translationColumns, transformType, rotationColumns):
+  """
+  Builds the 4x4 matrices of the rigid transforms stored in a transforms table.
+  :param table: TransformsTable of the transforms file
+  :param translationColumns: names of the X, Y, Z translation columns, unused for matrices
+  :param transformType: "euler", "quaternion" or "matrix", see ROTATION_COLUMN_COUNTS
+  :param rotationColumns: names of the rotation columns, or of the matrix elements
+  :return: (N, 4, 4) array of the matrices, in the basis of the file
+  :raises ValueError: if the number of rotation columns does not match the transform type, or the
+  columns cannot be read
+  """
+  columnCounts = ROTATION_COLUMN_COUNTS[transformType]
+  if len(rotationColumns) not in columnCounts:
+    raise ValueError(f"{' or '.join(str(count) for count in columnCounts)} rotation columns are needed, "
+                     f"{len(rotationColumns)} were given")
+  rotations = table.getColumns(rotationColumns)
+  if transformType == "matrix":
+    return matrixColumnsToMatrices(rotations)
+  translations = table.getColumns(translationColumns)
+  if transformType == "euler":
+    return eulerAnglesToMatrices(translations, rotations)
+  return quaternionsToMatrices(translations, rotations)
+
+def _orthonormalize(rotations):
+  """
+  Returns the rotation matrices nearest to the given 3x3 matrices.
+  """
+  u, _, vt = np.linalg.svd(rotations)
+  # Flipping the last axis where needed gives rotations rather than reflections
+  signs = np.sign(np.linalg.det(u @ vt))
+  u[:, :, 2] *= signs[:, np.newaxis]
+  return u @ vt
+
+def resampleTransforms(timestamps, transforms, frameTimes, method="linear"):
+  """
+  Samples transforms logged at their own timestamps at the acquisition times of the cine frames,
+  for all the frames at once. Frames acquired before the first or after the last timestamp take the
+  first or last transform.
+  :param timestamps: (M,) array of the times of the transforms, in any order
+  :param transforms: (M, 3) array of X, Y, Z translations or (M, 4, 4) array of matrices
+  :param frameTimes: (N,) array of the frame acquisition times, on the same clock as `timestamps`
+  :param method: "linear" interpolates between the two transforms around each frame time, "nearest"
+  takes the transform logged closest to it
+  :return: (N, 3) or (N, 4, 4) array of the transforms of the frames
+  """
+  timestamps = np.asarray(timestamps, dtype=np.float64)
+  transforms = np.asarray(transforms, dtype=np.float64)
+  frameTimes = np.asarray(frameTimes, dtype=np.float64)
+  if np.any(np.diff(timestamps) < 0):
+    order = np.argsort(timestamps, kind="stable")
+    timestamps = timestamps[order]
+    transforms = transforms[order]
+
+  # Index of the last transform logged at or before each frame time
+  before = np.clip(np.searchsorted(timestamps, frameTimes, side="right") - 1, 0, len(timestamps) - 1)
+  after = np.minimum(before + 1, len(timestamps) - 1)
+  interval = timestamps[after] - timestamps[before]
+  weights = np.divide(frameTimes - timestamps[before], interval, out=np.zeros_like(frameTimes), where=interval > 0)
+  weights = np.clip(weights, 0.0, 1.0)
+
+  if method == "nearest":
+    return transforms[np.where(weights < 0.5, before, after)]
+
+  weights = weights.reshape((-1,) + (1,) * (transforms.ndim - 1))
+  resampled = transforms[before] * (1.0 - weights) + transforms[after] * weights
+  if transforms.ndim == 3:
+    # Averaging two rotation matrices does not give a rotation, so the result is projected back
+    resampled[:, :3, :3] = _orthonormalize(resampled[:, :3, :3])
+  return resampled
+
+class TransformsValidationReport:
+  """
+  Every problem found in the selected columns of a transforms file, so that they can all be fixed
+  at once. Row indices count the data rows from 0. Errors prevent the transforms from being used,
+  while duplicate timestamps and jumps are only reported.
+  """
+
+  def __init__(self, numberOfRows, numImages, timestamped=False):
+    """
+    :param numberOfRows: number of data rows in the file
+    :param numImages: number of cine images the transforms are for
+    :param timestamped: whether the transforms are sampled at the frame times rather than read one
+    row per cine image
+    """
+    self.numberOfRows = numberOfRows
+    self.numImages = numImages
+    self.timestamped = timestamped
+    self.columnErrors = {}  # column name -> reason the column cannot be used
+    self.invalidRows = np.zeros(0, dtype=int)  # rows holding values that are not numbers
+    self.missingRows = np.zeros(0, dtype=int)  # rows holding empty cells
+    self.duplicateTimestampRows = np.zeros(0, dtype=int)  # rows logged at the time of an earlier row
+    self.jumpRows = np.zeros(0, dtype=int)  # rows whose translation jumped from the previous row
+
+  @property
+  def countMismatch(self):
+    return not self.timestamped and self.numberOfRows != self.numImages
+
+  @property
+  def isValid(self):
+    return not (self.columnErrors or len(self.invalidRows) or len(self.missingRows) or self.countMismatch)
+
+  @property
+  def hasWarnings(self):
+    return len(self.duplicateTimestampRows) > 0 or len(self.jumpRows) > 0
+
+  def getText(self, maxRows=REPORTED_ROWS):
+    """
+    Describes the problems found, one per line, listing the first `maxRows` rows of each. Row numbers
+    count the header as row 1, as spreadsheet applications do.
+    """
+    def rowList(rows):
+      listed = ", ".join(str(row + 2) for row in rows[:maxRows])
+      return listed + (f" and {len(rows) - maxRows} more" if len(rows) > maxRows else "")
+
+    lines = [f"Column {name}: {error}" for name, error in self.columnErrors.items()]
+    if len(self.invalidRows) > 0:
+      lines.append(f"Values that are not numbers in rows {rowList(self.invalidRows)}")
+    if len(self.missingRows) > 0:
+      lines.append(f"Missing values in rows {rowList(self.missingRows)}")
+    if self.countMismatch:
+      lines.append(f"{self.numberOfRows} transforms for {self.numImages} cine images")
+    if len(self.duplicateTimestampRows) > 0:
+      lines.append(f"Duplicate timestamps in rows {rowList(self.duplicateTimestampRows)}")
+    if len(self.jumpRows) > 0:
+      lines.append(f"Implausible jumps in rows {rowList(self.jumpRows)}")
+    return "\n".join(lines) if lines else "No problems found"
+
+  def __str__(self):
+    return self.getText()
+
+def validateTransformsTable(table, translationColumns, numImages, rotationColumns=(), timestampColumn=None,
+                            maxStep=None):
+  """
+  Checks the selected columns of a transforms table in a single vectorized pass over all the rows.
+  :param table: TransformsTable of the file
+  :param translationColumns: names of the X, Y and Z translation columns
+  :param numImages: number of cine images the transforms are for
+  :param rotationColumns: names of the rotation columns, if any
+  :param timestampColumn: name of the timestamp column, if the transforms are sampled at the frame times
+  :param maxStep: largest plausible distance between consecutive translations. If not provided,
+  it is derived from the median step (see JUMP_STEP_FACTOR).
+  :return: TransformsValidationReport
+  """
+  report = TransformsValidationReport(table.getNumberOfRows(), numImages, bool(timestampColumn))
+  names = list(dict.fromkeys(list(translationColumns) + list(rotationColumns) +
+                             ([timestampColumn] if timestampColumn else [])))
+  for name in names:
+    if name in table.errors:
+      report.columnErrors[name] = table.errors[name]
+    elif name not in table.columns:
+      report.columnErrors[name] = "not found in the header row"
+  available = [name for name in names if name in table.columns]
+  if not available:
+    return report
+
+  values = np.stack([table.columns[name] for name in available], axis=1)
+  invalid = np.zeros(values.shape, dtype=bool)
+  for index, name in enumerate(available):
+    invalid[table.invalidRows.get(name, np.zeros(0, dtype=int)), index] = True
+  report.invalidRows = np.flatnonzero(invalid.any(axis=1))
+  report.missingRows = np.flatnonzero((np.isnan(values) & ~invalid).any(axis=1))
+
+  if timestampColumn in table.columns:
+    timestamps = table.columns[timestampColumn]
+    order = np.argsort(timestamps, kind="stable")
+    duplicates = timestamps[order][1:] == timestamps[order][:-1]
+    report.duplicateTimestampRows = np.sort(order[1:][duplicates])
+
+  if all(name in table.columns for name in translationColumns) and report.numberOfRows > 1:
+    translations = np.stack([table.columns[name] for name in translationColumns], axis=1)
+    steps = np.linalg.norm(np.diff(translations, axis=0), axis=1)
+    finiteSteps = steps[np.isfinite(steps)]
+    if maxStep is None:
+      maxStep = max(JUMP_STEP_FACTOR * np.median(finiteSteps), MIN_JUMP_STEP) if len(finiteSteps) else np.inf
+    report.jumpRows = np.flatnonzero(steps > maxStep) + 1
+  return report